@@ -0,0 +1,6 @@
+"""Performance benchmarks for the Notebook API.
+
+Run a benchmark from the project root, for example::
+
+    python -m benchmarks.bench_serialization
+"""
@@ -0,0 +1,118 @@
+"""Compare the database work of the old and the current login flow.
+
+The old flow stored every new refresh token in the ``users`` row, so a login
+was a SELECT, an UPDATE, a commit and a second SELECT from ``refresh``. The
+current flow only looks the user up; the session row is appended to
+``user_sessions`` by a background task after the response. Both are measured
+on a file-backed SQLite database with the production session settings
+(``expire_on_commit=True``); password verification costs the same in both
+flows and is left out.
+
+Usage::
+
+    python -m benchmarks.bench_login --users 1000 --logins 5000
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.database.models import Base, User
+from src.repository.sessions import SessionRepository
+from src.repository.users import UserRepository
+from src.services.auth import create_refresh_token, create_session_refresh_token
+
+
+async def legacy_login(session, username: str) -> None:
+    user = await UserRepository(session).get_user_by_username(username)
+    user.refresh_token = await create_refresh_token({"sub": username})
+    await session.commit()
+    await session.refresh(user)
+
+
+async def login(session, username: str) -> tuple:
+    user = await UserRepository(session).get_user_by_username(username)
+    _, jti, expires_at = await create_session_refresh_token(username)
+    return user.id, jti, expires_at
+
+
+async def record(session, user_id: int, jti: str, expires_at: datetime) -> None:
+    await SessionRepository(session).add(user_id, jti, expires_at)
+
+
+async def measure(session_maker, names: list[str], flow) -> list[float]:
+    """Run one login per name in a fresh session; return per-login timings."""
+    timings = []
+    for name in names:
+        async with session_maker() as session:
+            started = time.perf_counter()
+            await flow(session, name)
+            timings.append(time.perf_counter() - started)
+    return timings
+
+
+async def run(users: int, logins: int) -> dict:
+    """Seed a temporary database and time both flows."""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(
+                insert(User),
+                [
+                    {
+                        "username": f"bench{i}",
+                        "email": f"bench{i}@example.com",
+                        "hashed_password": "x",
+                        "confirmed": True,
+                    }
+                    for i in range(users)
+                ],
+            )
+        session_maker = async_sessionmaker(engine)
+        rng = random.Random(0)
+        names = [f"bench{rng.randrange(users)}" for _ in range(logins)]
+
+        pending = []
+
+        async def current(session, name):
+            pending.append(await login(session, name))
+
+        async def background(session, args):
+            await record(session, *args)
+
+        results = {
+            "legacy (update row)": await measure(session_maker, names, legacy_login),
+            "current (read only)": await measure(session_maker, names, current),
+            "current background": await measure(session_maker, pending, background),
+        }
+        await engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--logins", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"{'flow':<22} {'logins/s':>10} {'median ms':>10} {'p99 ms':>8}")
+    for name, timings in asyncio.run(run(args.users, args.logins)).items():
+        timings.sort()
+        p99 = timings[int(len(timings) * 0.99) - 1]
+        print(
+            f"{name:<22} {len(timings) / sum(timings):>10.0f} "
+            f"{statistics.median(timings) * 1000:>10.3f} {p99 * 1000:>8.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Compare ORM and read-only (Core) contact reads by throughput and memory.
+
+For each row count the same ``get_all_contacts`` call is run with a regular
+``ContactRepository`` (ORM ``Contact`` objects tracked by the identity map) and
+with ``ContactRepository(read_only=True)`` (``ContactRecord`` slots records).
+Memory is the peak traced allocation while the result list is alive.
+
+Usage::
+
+    python -m benchmarks.bench_read_path --rows 10000 100000 --repeat 3
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import tracemalloc
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from benchmarks.bench_serialization import seed
+from src.database.models import Base
+from src.repository.contacts import ContactRepository
+
+
+async def measure_mode(session_maker, user, read_only: bool, repeat: int) -> dict:
+    """Time ``get_all_contacts`` and trace its peak memory in a fresh session."""
+    timings = []
+    for _ in range(repeat):
+        async with session_maker() as session:
+            repo = ContactRepository(session, read_only=read_only)
+            started = time.perf_counter()
+            contacts = await repo.get_all_contacts(user)
+            timings.append(time.perf_counter() - started)
+
+    async with session_maker() as session:
+        repo = ContactRepository(session, read_only=read_only)
+        tracemalloc.start()
+        contacts = await repo.get_all_contacts(user)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    median = statistics.median(timings)
+    return {
+        "rows_per_s": len(contacts) / median,
+        "median_ms": median * 1000,
+        "peak_mib": peak / 2**20,
+    }
+
+
+async def run(rows: int, repeat: int) -> dict:
+    """Seed a fresh in-memory database and measure both read modes."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_maker() as session:
+        user = await seed(session, rows)
+
+    results = {
+        "orm": await measure_mode(session_maker, user, False, repeat),
+        "core records": await measure_mode(session_maker, user, True, repeat),
+    }
+    await engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'mode':<14} {'rows/s':>12} {'median ms':>10} {'peak MiB':>9}")
+    for rows in args.rows:
+        for name, stats in asyncio.run(run(rows, args.repeat)).items():
+            print(
+                f"{rows:>8} {name:<14} {stats['rows_per_s']:>12.0f} "
+                f"{stats['median_ms']:>10.2f} {stats['peak_mib']:>9.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""Microbenchmarks for ``ContactRepository`` and ``UserRepository`` methods.
+
+For every size the database is filled by :mod:`benchmarks.datagen` with
+``size`` contacts spread over ``size / --per-user`` users, and each
+repository method is timed over ``--rounds`` rounds after a short warm-up.
+The reported statistics follow pytest-benchmark (min, max, mean, stddev,
+median, ops).
+
+Usage::
+
+    python -m benchmarks.bench_repository --sizes 1000 100000 1000000
+    python -m benchmarks.bench_repository --db-url postgresql+asyncpg://... \\
+        --json repository.json
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from benchmarks.datagen import bulk_load
+from src.database.models import Base, Contact, User
+from src.repository.contacts import ContactRepository
+from src.repository.users import UserRepository
+from src.schemas import ContactCreate, ContactUpdate
+
+
+def stats(timings: list[float]) -> dict:
+    """Summarize timings (seconds) the way pytest-benchmark does."""
+    mean = statistics.fmean(timings)
+    return {
+        "rounds": len(timings),
+        "min": min(timings),
+        "max": max(timings),
+        "mean": mean,
+        "stddev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "median": statistics.median(timings),
+        "ops": 1 / mean if mean else 0.0,
+    }
+
+
+def cases(user: User, contact_id: int, batch: list[int]) -> dict:
+    """Return benchmark name to ``async (session) -> None`` callable mapping."""
+    today = date(2024, 6, 1)
+    body = ContactCreate(
+        first_name="Bench",
+        last_name="Mark",
+        email="bench@example.com",
+        phone="+380123456789",
+        birthday=today,
+    )
+
+    async def create_and_remove(session):
+        repo = ContactRepository(session)
+        contact = await repo.create_contact(user, body)
+        await repo.remove_contact(user, contact.id)
+
+    return {
+        "ContactRepository.get_contacts": lambda s: ContactRepository(s).get_contacts(
+            user
+        ),
+        "ContactRepository.get_contacts[read_only]": lambda s: ContactRepository(
+            s, read_only=True
+        ).get_contacts(user),
+        "ContactRepository.get_contacts[filter]": lambda s: ContactRepository(
+            s
+        ).get_contacts(user, first_name="ol", email="example"),
+        "ContactRepository.get_contact_by_id": lambda s: ContactRepository(
+            s
+        ).get_contact_by_id(user, contact_id),
+        "ContactRepository.get_all_contacts": lambda s: ContactRepository(
+            s
+        ).get_all_contacts(user),
+        "ContactRepository.get_all_contacts[read_only]": lambda s: ContactRepository(
+            s, read_only=True
+        ).get_all_contacts(user),
+        "ContactRepository.get_upcoming_birthdays": lambda s: ContactRepository(
+            s
+        ).get_upcoming_birthdays([user.id], today, 7),
+        "ContactRepository.get_upcoming_birthdays[batch]": lambda s: ContactRepository(
+            s
+        ).get_upcoming_birthdays(batch, today, 7),
+        "ContactRepository.update_contact": lambda s: ContactRepository(
+            s
+        ).update_contact(user, contact_id, ContactUpdate(extra_info="bench")),
+        "ContactRepository.create_contact+remove_contact": create_and_remove,
+        "UserRepository.get_user_by_id": lambda s: UserRepository(s).get_user_by_id(
+            user.id
+        ),
+        "UserRepository.get_user_by_username": lambda s: UserRepository(
+            s
+        ).get_user_by_username(user.username),
+        "UserRepository.get_user_by_email": lambda s: UserRepository(
+            s
+        ).get_user_by_email(user.email),
+        "UserRepository.get_users_batch": lambda s: UserRepository(s).get_users_batch(
+            0, 500
+        ),
+    }
+
+
+async def run_size(db_url: str, size: int, per_user: int, rounds: int) -> dict:
+    """Load ``size`` contacts into a fresh schema and time every case."""
+    engine = create_async_engine(db_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    users = max(1, size // per_user)
+    load_started = time.perf_counter()
+    user_ids = await bulk_load(engine, users, min(per_user, size))
+    load_seconds = time.perf_counter() - load_started
+
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_maker() as session:
+        user = await UserRepository(session).get_user_by_id(user_ids[0])
+        result = await session.execute(
+            select(Contact.id).where(Contact.user_id == user.id).limit(1)
+        )
+        contact_id = result.scalar_one()
+
+    results = {}
+    for name, case in cases(user, contact_id, user_ids[:100]).items():
+        timings = []
+        for i in range(rounds + 2):
+            async with session_maker() as session:
+                started = time.perf_counter()
+                await case(session)
+                elapsed = time.perf_counter() - started
+            if i >= 2:
+                timings.append(elapsed)
+        results[name] = stats(timings)
+
+    await engine.dispose()
+    return {"rows": size, "users": users, "load_seconds": load_seconds, **results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db-url", help="Defaults to a temporary SQLite file")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000])
+    parser.add_argument("--per-user", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--json", type=Path, help="Write JSON results here")
+    args = parser.parse_args()
+
+    db_url = args.db_url or (
+        f"sqlite+aiosqlite:///{Path(tempfile.mkdtemp()) / 'bench_repository.db'}"
+    )
+
+    report = []
+    for size in args.sizes:
+        result = asyncio.run(run_size(db_url, size, args.per_user, args.rounds))
+        report.append(result)
+        print(
+            f"\n{size} rows, {result['users']} users "
+            f"(loaded in {result['load_seconds']:.1f}s)"
+        )
+        print(f"{'name':<50} {'min ms':>9} {'median ms':>10} {'stddev':>8} {'ops':>9}")
+        for name, value in result.items():
+            if isinstance(value, dict):
+                print(
+                    f"{name:<50} {value['min'] * 1000:>9.3f} "
+                    f"{value['median'] * 1000:>10.3f} "
+                    f"{value['stddev'] * 1000:>8.3f} {value['ops']:>9.1f}"
+                )
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
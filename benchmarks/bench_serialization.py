@@ -0,0 +1,128 @@
+"""Compare the ORM + Pydantic response path with the column-row + orjson path.
+
+The ORM path reproduces what ``GET /api/contacts`` used to do: load ``Contact``
+instances, wrap them in ``ContactsGet`` (``from_attributes`` validation), let
+FastAPI dump and re-validate the model against ``response_model`` and encode it
+with the stdlib ``json``. The row path selects plain columns and encodes them
+with orjson directly.
+
+Usage::
+
+    python -m benchmarks.bench_serialization --rows 1000 10000 --repeat 5
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import date, timedelta
+
+import orjson
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.database.models import Base, Contact, User
+from src.repository.contacts import ContactRepository
+from src.schemas import ContactsGet
+
+
+async def seed(session: AsyncSession, rows: int) -> User:
+    """Create one user owning ``rows`` contacts."""
+    user = User(username="bench", email="bench@example.com", hashed_password="x")
+    session.add(user)
+    await session.commit()
+
+    start = date(1980, 1, 1)
+    await session.execute(
+        insert(Contact),
+        [
+            {
+                "first_name": f"First{i}",
+                "last_name": f"Last{i}",
+                "email": f"contact{i}@example.com",
+                "phone": f"+380{i:09d}",
+                "birthday": start + timedelta(days=i % 15000),
+                "extra_info": "benchmark",
+                "user_id": user.id,
+            }
+            for i in range(rows)
+        ],
+    )
+    await session.commit()
+    return user
+
+
+async def orm_path(repo: ContactRepository, user: User, rows: int) -> bytes:
+    contacts = await repo.get_contacts(user, limit=rows)
+    response = ContactsGet(data=contacts)
+    validated = ContactsGet.model_validate(response.model_dump())
+    return json.dumps(validated.model_dump(mode="json")).encode()
+
+
+async def row_path(repo: ContactRepository, user: User, rows: int) -> bytes:
+    contacts = await repo.get_contacts(user, limit=rows)
+    return orjson.dumps({"data": contacts})
+
+
+async def measure(func, repeat: int) -> list[float]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+async def run(rows: int, repeat: int) -> dict:
+    """Seed a fresh in-memory database and time both paths."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    results = {}
+    async with session_maker() as session:
+        user = await seed(session, rows)
+        repos = {
+            "orm+pydantic+json": (ContactRepository(session), orm_path),
+            "rows+orjson": (ContactRepository(session, read_only=True), row_path),
+        }
+
+        bodies = [await path(repo, user, rows) for repo, path in repos.values()]
+        assert orjson.loads(bodies[0]) == orjson.loads(bodies[1])
+
+        for name, (repo, path) in repos.items():
+            session.expunge_all()
+            timings = await measure(lambda: path(repo, user, rows), repeat)
+            results[name] = {
+                "median_ms": statistics.median(timings),
+                "min_ms": min(timings),
+            }
+
+    await engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'path':<20} {'median ms':>10} {'min ms':>10}")
+    for rows in args.rows:
+        results = asyncio.run(run(rows, args.repeat))
+        for name, stats in results.items():
+            print(
+                f"{rows:>8} {name:<20} {stats['median_ms']:>10.2f} {stats['min_ms']:>10.2f}"
+            )
+        speedup = (
+            results["orm+pydantic+json"]["median_ms"]
+            / results["rows+orjson"]["median_ms"]
+        )
+        print(f"{rows:>8} {'speedup':<20} {speedup:>10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Measure the Python overhead per query of the hot repository statements.
+
+Compares the former ``select()`` chains of ``ContactRepository.get_contacts``
+and ``UserRepository.get_user_by_username`` with the cached lambda
+statements now used by the repositories, in two ways:
+
+* ``build``: constructing the statement and computing its cache key, the
+  work SQLAlchemy does on every execution before it finds the compiled SQL.
+* ``execute``: a full ``session.execute()`` on an in-memory SQLite database
+  with a few rows, so most of the time is Python overhead.
+
+Server-side prepared statements (``DB_PREPARED_STATEMENT_CACHE_SIZE``) save
+PostgreSQL's parse and plan time and only show up against a real server; run
+``benchmarks.bench_repository`` with ``--db-url postgresql+asyncpg://...``.
+
+Usage::
+
+    python -m benchmarks.bench_statements --rounds 20000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import insert, lambda_stmt, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.database.models import Base, Contact, User
+from src.repository.contacts import CONTACT_COLUMNS, ContactRepository, _owned
+
+FILTERS = {"skip": 0, "limit": 10, "first_name": "an", "last_name": None}
+
+
+def legacy_contacts_stmt(
+    user, read_only, skip, limit, first_name, last_name, email=None
+):
+    stmt = select(*CONTACT_COLUMNS) if read_only else select(Contact)
+    stmt = stmt.where(*_owned(user)).offset(skip).limit(limit)
+    if first_name:
+        stmt = stmt.where(Contact.first_name.ilike(f"%{first_name}%"))
+    if last_name:
+        stmt = stmt.where(Contact.last_name.ilike(f"%{last_name}%"))
+    if email:
+        stmt = stmt.where(Contact.email.ilike(f"%{email}%"))
+    return stmt
+
+
+def legacy_username_stmt(username):
+    return select(User).filter_by(username=username)
+
+
+def current_username_stmt(username):
+    # Same construct as UserRepository.get_user_by_username.
+    return lambda_stmt(lambda: select(User).where(User.username == username))
+
+
+def statements(user) -> dict:
+    """Return benchmark name to ``(legacy, current)`` statement factories."""
+    contacts = ContactRepository(None, read_only=True)
+    return {
+        "get_contacts[read_only]": (
+            lambda: legacy_contacts_stmt(user, True, **FILTERS),
+            lambda: contacts._contacts_stmt(user, email=None, **FILTERS),
+        ),
+        "get_user_by_username": (
+            lambda: legacy_username_stmt(user.username),
+            lambda: current_username_stmt(user.username),
+        ),
+    }
+
+
+def time_per_call(func, rounds: int) -> float:
+    """Return the median microseconds per call over five batches."""
+    batches = []
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(rounds // 5):
+            func()
+        batches.append((time.perf_counter() - started) / (rounds // 5))
+    return statistics.median(batches) * 1e6
+
+
+async def time_executions(session, factory, rounds: int) -> float:
+    """Return the median microseconds per executed statement."""
+    batches = []
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(rounds // 5):
+            (await session.execute(factory())).all()
+        batches.append((time.perf_counter() - started) / (rounds // 5))
+    return statistics.median(batches) * 1e6
+
+
+async def run(rounds: int) -> dict:
+    """Seed an in-memory database and time every statement both ways."""
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(
+            insert(User).values(username="bench", email="bench@example.com")
+        )
+        await conn.execute(
+            insert(Contact),
+            [
+                {
+                    "first_name": f"Dana {i}",
+                    "last_name": "Bench",
+                    "email": f"dana{i}@example.com",
+                    "phone": "+380123456789",
+                    "user_id": 1,
+                }
+                for i in range(20)
+            ],
+        )
+
+    results = {}
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        user = await session.get(User, 1)
+        for name, (legacy, current) in statements(user).items():
+            results[name] = {
+                "build legacy": time_per_call(
+                    lambda: legacy()._generate_cache_key(), rounds
+                ),
+                "build current": time_per_call(
+                    lambda: current()._generate_cache_key(), rounds
+                ),
+                "execute legacy": await time_executions(session, legacy, rounds // 10),
+                "execute current": await time_executions(
+                    session, current, rounds // 10
+                ),
+            }
+    await engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'query':<26} {'step':<16} {'us/query':>9}")
+    for name, steps in asyncio.run(run(args.rounds)).items():
+        for step, micros in steps.items():
+            print(f"{name:<26} {step:<16} {micros:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
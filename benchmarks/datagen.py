@@ -0,0 +1,144 @@
+"""Deterministic synthetic users and contacts for benchmarks.
+
+The same ``seed`` always produces the same rows. Contact phones use formats
+accepted by the ``ContactBase.phone`` pattern, emails are unique and
+birthdays are spread evenly over every day of the year.
+
+Rows are inserted in chunks with ``executemany``; on PostgreSQL with asyncpg
+the contacts are streamed with ``COPY`` instead, which loads millions of rows
+in seconds.
+"""
+
+import random
+from datetime import date, datetime, timedelta
+from itertools import islice
+from typing import Iterable, Iterator
+
+from sqlalchemy import insert, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.database.models import Contact, User
+from src.repository.contacts import with_normalized
+
+FIRST_NAMES = [
+    "Olena", "Andrii", "Maria", "Taras", "Iryna", "Dmytro", "Sofia", "Oleh",
+    "Anna", "Mykola", "Kateryna", "Ivan", "John", "Emma", "Liam", "Olivia",
+    "Noah", "Ava", "Lucas", "Mia", "Mateo", "Zoe", "Hugo", "Lea",
+]  # fmt: skip
+
+LAST_NAMES = [
+    "Shevchenko", "Kovalenko", "Bondarenko", "Tkachenko", "Kravchenko",
+    "Melnyk", "Boyko", "Smith", "Johnson", "Brown", "Garcia", "Miller",
+    "Davis", "Martin", "Bernard", "Dubois", "Muller", "Schmidt", "Rossi",
+    "Novak",
+]  # fmt: skip
+
+DOMAINS = ["example.com", "mail.example.org", "corp.example.net"]
+
+PHONE_FORMATS = [
+    "+380#########",
+    "+380 ## ### ## ##",
+    "(0##) ###-##-##",
+    "+1-###-###-####",
+    "+44 (###) ### ####",
+    "##########",
+]
+
+
+def _phone(rng: random.Random) -> str:
+    pattern = rng.choice(PHONE_FORMATS)
+    return "".join(str(rng.randrange(10)) if c == "#" else c for c in pattern)
+
+
+def generate_users(count: int, seed: int = 0, prefix: str = "user") -> Iterator[dict]:
+    """Yield ``count`` user rows with unique usernames and emails."""
+    rng = random.Random(seed)
+    for i in range(count):
+        yield {
+            "username": f"{prefix}{i}",
+            "email": f"{prefix}{i}@{rng.choice(DOMAINS)}",
+            "hashed_password": "x",
+            "confirmed": True,
+            "role": "user",
+        }
+
+
+def generate_contacts(
+    user_ids: Iterable[int], per_user: int, seed: int = 0
+) -> Iterator[dict]:
+    """Yield ``per_user`` contact rows for every user ID.
+
+    The n-th contact is born on day ``n * 7 % 365`` of a non-leap year (7 is
+    coprime with 365), so every day of the year gets the same number of
+    birthdays.
+    """
+    rng = random.Random(seed)
+    n = 0
+    for user_id in user_ids:
+        for _ in range(per_user):
+            first = rng.choice(FIRST_NAMES)
+            last = rng.choice(LAST_NAMES)
+            year = rng.randrange(1950, 2006)
+            day = date(2001, 1, 1) + timedelta(days=n * 7 % 365)
+            birthday = day.replace(year=year)
+            yield {
+                "first_name": first,
+                "last_name": last,
+                "email": f"{first}.{last}.{n}@{rng.choice(DOMAINS)}".lower(),
+                "phone": _phone(rng),
+                "birthday": birthday,
+                "extra_info": None if n % 3 else f"note {n}",
+                "user_id": user_id,
+            }
+            n += 1
+
+
+def _chunks(rows: Iterable[dict], size: int) -> Iterator[list[dict]]:
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def copy_records(rows: list[dict]) -> tuple[list[str], list[tuple]]:
+    """Return the columns and records to ``COPY`` for generated contact rows.
+
+    Only the generated columns, their normalized forms and ``updated_at``
+    are copied; the ``insert()`` path fills ``updated_at`` from the Python
+    default, and the remaining columns (``id``, ``version``, ``deleted_at``)
+    take their server defaults.
+    """
+    now = datetime.now()
+    rows = [{**with_normalized(row), "updated_at": now} for row in rows]
+    columns = list(rows[0]) if rows else []
+    return columns, [tuple(row[c] for c in columns) for row in rows]
+
+
+async def bulk_load(
+    engine: AsyncEngine,
+    users: int,
+    contacts_per_user: int,
+    seed: int = 0,
+    chunk_size: int = 10000,
+) -> list[int]:
+    """Insert generated users and contacts and return the new user IDs."""
+    async with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            await conn.execute(text("PRAGMA synchronous = OFF"))
+
+        for chunk in _chunks(generate_users(users, seed), chunk_size):
+            await conn.execute(insert(User), chunk)
+        result = await conn.execute(select(User.id).order_by(User.id))
+        user_ids = list(result.scalars())[-users:] if users else []
+
+        contacts = generate_contacts(user_ids, contacts_per_user, seed)
+        if engine.dialect.driver == "asyncpg":
+            raw = await conn.get_raw_connection()
+            for chunk in _chunks(contacts, chunk_size):
+                columns, records = copy_records(chunk)
+                await raw.driver_connection.copy_records_to_table(
+                    Contact.__tablename__, records=records, columns=columns
+                )
+        else:
+            for chunk in _chunks(contacts, chunk_size):
+                await conn.execute(insert(Contact), chunk)
+    return user_ids
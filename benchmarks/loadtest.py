@@ -0,0 +1,411 @@
+"""Load test for the Notebook API routes.
+
+Seeds ``--users`` users with ``--contacts`` contacts each, then drives every
+benchmarked route with ``--concurrency`` concurrent clients and records
+requests per second, latency percentiles, status codes and (in-process mode)
+the number of SQL statements per request. Results are written as JSON so runs
+of different releases can be compared.
+
+Two transports are supported:
+
+* ``asgi`` calls the application in-process through ``httpx.ASGITransport``.
+  Redis is replaced with an in-memory stand-in and rate limiting is disabled.
+* ``uvicorn`` starts a server in a subprocess and talks HTTP to it: plain
+  ``uvicorn main:app`` (``--server default``) or the production entry point
+  ``python -m src.serve`` (``--server serve``). It needs the Redis server
+  from the settings to be reachable.
+
+Routes that talk to external services (registration and password reset
+emails, avatar upload) are not benchmarked.
+
+Usage::
+
+    python -m benchmarks.loadtest --users 50 --contacts 200 --requests 2000 \\
+        --concurrency 20 --output results.json
+    python -m benchmarks.loadtest --baseline results.json
+    python -m benchmarks.loadtest --transport uvicorn --workers 2
+    python -m benchmarks.loadtest --transport uvicorn --server serve \\
+        --workers 2 --baseline uvicorn-default.json
+    python -m benchmarks.loadtest --db-url postgresql+asyncpg://... --reset
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, UTC
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+async def seed_database(db_url: str, users: int, contacts: int, reset: bool) -> list:
+    """Create the schema and insert benchmark users and their contacts.
+
+    :return: ``(user_id, username, refresh_token)`` of the seeded users.
+    """
+    from sqlalchemy import insert, select
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from src.database.models import Base, Contact, User
+    from src.services.auth import Hash, create_refresh_token
+
+    engine = create_async_engine(db_url)
+    async with engine.begin() as conn:
+        if reset:
+            await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+        hashed = Hash().get_password_hash("benchmark")
+        await conn.execute(
+            insert(User),
+            [
+                {
+                    "username": f"bench{i}",
+                    "email": f"bench{i}@example.com",
+                    "hashed_password": hashed,
+                    "confirmed": True,
+                    "role": "user",
+                    "refresh_token": await create_refresh_token({"sub": f"bench{i}"}),
+                }
+                for i in range(users)
+            ],
+        )
+        result = await conn.execute(
+            select(User.id, User.username, User.refresh_token).where(
+                User.username.like("bench%")
+            )
+        )
+        seeded = [tuple(row) for row in result]
+
+        start = date(1970, 1, 1)
+        for user_id, _, _ in seeded:
+            await conn.execute(
+                insert(Contact),
+                [
+                    {
+                        "first_name": f"First{j}",
+                        "last_name": f"Last{j}",
+                        "email": f"contact{j}.{user_id}@example.com",
+                        "phone": f"+380{j:09d}",
+                        "birthday": start + timedelta(days=(user_id * 37 + j) % 18000),
+                        "user_id": user_id,
+                    }
+                    for j in range(contacts)
+                ],
+            )
+    await engine.dispose()
+    return seeded
+
+
+async def build_scenarios(seeded: list, db_url: str) -> dict:
+    """Return route name to request factory mapping.
+
+    Each factory takes a random generator and returns ``(method, url, kwargs)``.
+    """
+    from sqlalchemy import select
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from src.database.models import Contact
+    from src.services.auth import create_access_token
+
+    tokens = {}
+    for user_id, username, refresh_token in seeded:
+        tokens[user_id] = (
+            await create_access_token({"sub": username}),
+            refresh_token,
+        )
+
+    engine = create_async_engine(db_url)
+    async with engine.connect() as conn:
+        result = await conn.execute(select(Contact.user_id, Contact.id))
+        contact_ids = {}
+        for user_id, contact_id in result:
+            contact_ids.setdefault(user_id, []).append(contact_id)
+    await engine.dispose()
+
+    def auth(rng):
+        user_id, username, _ = rng.choice(seeded)
+        headers = {"Authorization": f"Bearer {tokens[user_id][0]}"}
+        return user_id, username, headers
+
+    def login(rng):
+        _, username, _ = auth(rng)
+        return (
+            "POST",
+            "/api/auth/login",
+            {"data": {"username": username, "password": "benchmark"}},
+        )
+
+    def refresh_token(rng):
+        user_id, _, _ = auth(rng)
+        return (
+            "POST",
+            "/api/auth/refresh-token",
+            {"json": {"refresh_token": tokens[user_id][1]}},
+        )
+
+    def read_contact(rng):
+        user_id, _, headers = auth(rng)
+        contact_id = rng.choice(contact_ids.get(user_id, [0]))
+        return "GET", f"/api/contacts/{contact_id}", {"headers": headers}
+
+    def create_contact(rng):
+        _, _, headers = auth(rng)
+        body = {
+            "first_name": "Load",
+            "last_name": "Test",
+            "email": f"load{rng.randrange(10**9)}@example.com",
+            "phone": "+380123456789",
+            "birthday": "1990-01-01",
+        }
+        return "POST", "/api/contacts/", {"json": body, "headers": headers}
+
+    def update_contact(rng):
+        user_id, _, headers = auth(rng)
+        contact_id = rng.choice(contact_ids.get(user_id, [0]))
+        body = {"extra_info": f"updated {rng.randrange(10**6)}"}
+        return (
+            "PATCH",
+            f"/api/contacts/{contact_id}",
+            {"json": body, "headers": headers},
+        )
+
+    def get(url):
+        def factory(rng):
+            _, _, headers = auth(rng)
+            return "GET", url, {"headers": headers}
+
+        return factory
+
+    # new_token runs before login_user, which replaces the stored refresh token
+    return {
+        "healthchecker": lambda rng: ("GET", "/api/healthchecker", {}),
+        "new_token": refresh_token,
+        "login_user": login,
+        "me": get("/api/users/me"),
+        "read_contacts": get("/api/contacts/"),
+        "read_contacts_filtered": get("/api/contacts/?first_name=First1"),
+        "read_contact": read_contact,
+        "upcoming_birthdays": get("/api/contacts/birthdays/next7"),
+        "create_contact": create_contact,
+        "update_contact": update_contact,
+    }
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Return the ``pct`` percentile of ``values`` (nearest-rank)."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def drive(
+    client: httpx.AsyncClient, factory, requests: int, concurrency: int, seed: int
+) -> dict:
+    """Send ``requests`` requests from ``concurrency`` workers and time them."""
+    rng = random.Random(seed)
+    planned = [factory(rng) for _ in range(requests)]
+    queue = iter(planned)
+    latencies = []
+    status_codes = {}
+
+    async def worker():
+        for method, url, kwargs in queue:
+            started = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append((time.perf_counter() - started) * 1000)
+            status_codes[response.status_code] = (
+                status_codes.get(response.status_code, 0) + 1
+            )
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "requests": requests,
+        "errors": sum(n for code, n in status_codes.items() if code >= 400),
+        "status_codes": {str(code): n for code, n in sorted(status_codes.items())},
+        "rps": requests / elapsed,
+        "p50_ms": percentile(latencies, 50),
+        "p90_ms": percentile(latencies, 90),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": max(latencies),
+    }
+
+
+class QueryCounter:
+    """Count SQL statements executed by an engine."""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+
+async def run_asgi(scenarios: dict, routes: list[str], args) -> dict:
+    """Benchmark routes in-process through ``httpx.ASGITransport``."""
+    from main import app
+    from src.api import users
+    from src.database.db import sessionmanager
+    from src.services import auth
+    from tests.fakes import DummyRedis
+
+    auth.redis_client = DummyRedis()
+    users.limiter.enabled = False
+    counter = QueryCounter(sessionmanager.engine)
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+        for i, route in enumerate(routes):
+            await drive(c, scenarios[route], args.warmup, args.concurrency, i)
+            counter.count = 0
+            stats = await drive(
+                c, scenarios[route], args.requests, args.concurrency, 1000 + i
+            )
+            stats["queries_per_request"] = counter.count / args.requests
+            results[route] = stats
+    await sessionmanager.close()
+    return results
+
+
+async def run_uvicorn(scenarios: dict, routes: list[str], args) -> dict:
+    """Benchmark routes against a server running in a subprocess."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    if args.server == "serve":
+        command = [sys.executable, "-m", "src.serve", "--host", "127.0.0.1"]
+        command += ["--port", str(port)]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port)]
+        command += ["--log-level", "warning"]
+    command += ["--workers", str(args.workers)]
+    server = subprocess.Popen(command, cwd=ROOT, env=os.environ.copy())
+    base_url = f"http://127.0.0.1:{port}"
+
+    results = {}
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits) as c:
+            for _ in range(100):
+                try:
+                    await c.get("/api/healthchecker")
+                    break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.1)
+            for i, route in enumerate(routes):
+                await drive(c, scenarios[route], args.warmup, args.concurrency, i)
+                stats = await drive(
+                    c, scenarios[route], args.requests, args.concurrency, 1000 + i
+                )
+                stats["queries_per_request"] = None
+                results[route] = stats
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+    return results
+
+
+async def run(args) -> dict:
+    seeded = await seed_database(args.db_url, args.users, args.contacts, args.reset)
+    scenarios = await build_scenarios(seeded, args.db_url)
+    routes = args.routes or list(scenarios)
+
+    runner = run_asgi if args.transport == "asgi" else run_uvicorn
+    results = await runner(scenarios, routes, args)
+    return {
+        "meta": {
+            "timestamp": datetime.now(UTC).isoformat(),
+            "transport": args.transport,
+            "server": args.server if args.transport == "uvicorn" else None,
+            "db_url": args.db_url.split("@")[-1],
+            "users": args.users,
+            "contacts_per_user": args.contacts,
+            "requests_per_route": args.requests,
+            "concurrency": args.concurrency,
+            "python": platform.python_version(),
+        },
+        "routes": results,
+    }
+
+
+def compare(baseline: dict, report: dict) -> None:
+    """Print the RPS and p99 change of every route relative to ``baseline``."""
+    print(f"\n{'route':<24} {'rps change':>11} {'p99 change':>11}")
+    for route, stats in report["routes"].items():
+        before = baseline["routes"].get(route)
+        if before is None:
+            continue
+        rps = (stats["rps"] / before["rps"] - 1) * 100
+        p99 = (stats["p99_ms"] / before["p99_ms"] - 1) * 100
+        print(f"{route:<24} {rps:>+10.1f}% {p99:>+10.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transport", choices=["asgi", "uvicorn"], default="asgi")
+    parser.add_argument("--db-url", help="Defaults to a temporary SQLite file")
+    parser.add_argument("--reset", action="store_true", help="Drop tables first")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--contacts", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument(
+        "--server",
+        choices=["default", "serve"],
+        default="default",
+        help="uvicorn transport: plain uvicorn or python -m src.serve",
+    )
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--routes", nargs="+", help="Subset of routes to run")
+    parser.add_argument("--output", type=Path, help="Write JSON results here")
+    parser.add_argument("--baseline", type=Path, help="Compare with earlier JSON")
+    args = parser.parse_args()
+
+    if args.db_url is None:
+        path = Path(tempfile.mkdtemp()) / "loadtest.db"
+        args.db_url = f"sqlite+aiosqlite:///{path}"
+        args.reset = True
+    os.environ["DB_URL"] = args.db_url
+
+    report = asyncio.run(run(args))
+
+    print(
+        f"{'route':<24} {'rps':>9} {'p50 ms':>8} {'p90 ms':>8} "
+        f"{'p99 ms':>8} {'errors':>7} {'queries':>8}"
+    )
+    for route, stats in report["routes"].items():
+        queries = stats["queries_per_request"]
+        print(
+            f"{route:<24} {stats['rps']:>9.1f} {stats['p50_ms']:>8.2f} "
+            f"{stats['p90_ms']:>8.2f} {stats['p99_ms']:>8.2f} {stats['errors']:>7} "
+            f"{'-' if queries is None else f'{queries:.2f}':>8}"
+        )
+
+    if args.baseline:
+        compare(json.loads(args.baseline.read_text()), report)
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,56 @@
 """Entry point of the Notebook API application.
 
 This module creates the FastAPI application instance, configures middleware,
-exception handlers and includes all API routers.
+exception handlers and includes all API routers. Logging is set up in the
+lifespan handler, see :mod:`src.services.logs`.
+
+Expensive resources (database engines, the mail client, the bcrypt backend)
+are created on first use. The lifespan handler warms them up at start-up when
+``WARMUP_ENABLED`` is set and disposes them on shutdown.
 """
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request, status
+from fastapi.responses import ORJSONResponse
 
-from src.api import contacts, utils, auth, users
+from src.api import contacts, utils, auth, users, admin
 
 from starlette.responses import JSONResponse
 from slowapi.errors import RateLimitExceeded
 
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI()
+from src.conf.config import settings
+from src.services import tracing
+from src.services.logs import RequestContextMiddleware
+from src.services.profiler import RequestProfilerMiddleware
+from src.services.tracing import TracingMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up resources on start-up and release them on shutdown."""
+    from src.database.db import sessionmanager
+    from src.database.shards import shard_router
+    from src.services.events import event_broker
+    from src.services.logs import setup_logging
+
+    log_listener = setup_logging()
+    if settings.WARMUP_ENABLED:
+        from src.services.warmup import warm_up
+
+        app.state.warmup_timings = await warm_up()
+
+    yield
+
+    await event_broker.close()
+    await shard_router.close()
+    await sessionmanager.close()
+    log_listener.stop()
+
+
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
 
 
 @app.exception_handler(RateLimitExceeded)
@@ -40,13 +77,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID"],
 )
+if settings.PROFILER_TOKEN:
+    app.add_middleware(RequestProfilerMiddleware)
+if tracing.tracer is not None:
+    app.add_middleware(TracingMiddleware)
+app.add_middleware(RequestContextMiddleware)
 
 
 app.include_router(utils.router, prefix="/api")
 app.include_router(contacts.router, prefix="/api")
 app.include_router(auth.router, prefix="/api")
 app.include_router(users.router, prefix="/api")
+app.include_router(admin.router, prefix="/api")
 
 if __name__ == "__main__":
     import uvicorn
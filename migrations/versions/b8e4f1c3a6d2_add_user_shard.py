@@ -0,0 +1,35 @@
+"""add persisted shard assignment to users
+
+Revision ID: b8e4f1c3a6d2
+Revises: a7d3e5b9c2f1
+Create Date: 2026-10-19 18:02:41.518230
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "b8e4f1c3a6d2"
+down_revision: Union[str, Sequence[str], None] = "a7d3e5b9c2f1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("users", sa.Column("shard", sa.String(length=50), nullable=True))
+    op.add_column(
+        "users",
+        sa.Column(
+            "shard_moving", sa.Boolean(), server_default=sa.false(), nullable=False
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("users", "shard_moving")
+    op.drop_column("users", "shard")
@@ -0,0 +1,39 @@
+"""add normalized email and phone to contacts
+
+Revision ID: c4e8a1f2b7d3
+Revises: baabec45a5bb
+Create Date: 2026-10-19 10:12:31.204117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8a1f2b7d3'
+down_revision: Union[str, Sequence[str], None] = 'baabec45a5bb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('contacts', sa.Column('email_normalized', sa.String(length=100), nullable=True))
+    op.add_column('contacts', sa.Column('phone_normalized', sa.String(length=30), nullable=True))
+    op.execute(
+        "UPDATE contacts SET "
+        "email_normalized = lower(trim(email)), "
+        "phone_normalized = regexp_replace(phone, '[[:space:]()-]', '', 'g')"
+    )
+    op.create_index('ix_contacts_user_id_email_normalized', 'contacts', ['user_id', 'email_normalized'], unique=False)
+    op.create_index('ix_contacts_user_id_phone_normalized', 'contacts', ['user_id', 'phone_normalized'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_contacts_user_id_phone_normalized', table_name='contacts')
+    op.drop_index('ix_contacts_user_id_email_normalized', table_name='contacts')
+    op.drop_column('contacts', 'phone_normalized')
+    op.drop_column('contacts', 'email_normalized')
@@ -0,0 +1,36 @@
+"""add soft delete, updated_at and sync version to contacts
+
+Revision ID: e2f9c6a4d1b8
+Revises: c4e8a1f2b7d3
+Create Date: 2026-10-19 11:03:52.518440
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2f9c6a4d1b8'
+down_revision: Union[str, Sequence[str], None] = 'c4e8a1f2b7d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('contacts', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.add_column('contacts', sa.Column('deleted_at', sa.DateTime(), nullable=True))
+    op.add_column('contacts', sa.Column('version', sa.BigInteger(), server_default='1', nullable=False))
+    op.execute("UPDATE contacts SET updated_at = now()")
+    op.create_index('ix_contacts_user_id_version', 'contacts', ['user_id', 'version'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_contacts_user_id_version', table_name='contacts')
+    op.execute("DELETE FROM contacts WHERE deleted_at IS NOT NULL")
+    op.drop_column('contacts', 'version')
+    op.drop_column('contacts', 'deleted_at')
+    op.drop_column('contacts', 'updated_at')
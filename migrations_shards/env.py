@@ -0,0 +1,74 @@
+"""Alembic environment of the contact shard databases.
+
+Shard databases only hold the ``contacts`` table, without its foreign key
+to ``users``, which stay on the primary database. Without a ``url``
+attribute (``alembic -n shards upgrade head``) every ``SHARD_URLS`` entry
+is migrated; :func:`src.database.shards.migrate_shards` migrates them one
+at a time.
+
+Each shard's contact IDs start in their own range, passed to the revisions
+as ``contact_id_start``, so contacts keep their IDs when moved.
+"""
+
+import asyncio
+from logging.config import fileConfig
+
+from sqlalchemy import pool
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from alembic import context
+
+from src.database.shards import shard_migration_targets
+
+config = context.config
+
+if config.config_file_name is not None and config.attributes.get(
+    "configure_logger", True
+):
+    fileConfig(config.config_file_name)
+
+
+def targets() -> list[tuple[str, str, int]]:
+    if "url" in config.attributes:
+        return [
+            (
+                config.attributes.get("shard", "shard"),
+                config.attributes["url"],
+                config.attributes["contact_id_start"],
+            )
+        ]
+    return shard_migration_targets()
+
+
+def run_migrations_offline(url: str, contact_id_start: int) -> None:
+    context.configure(
+        url=url,
+        target_metadata=None,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations(contact_id_start=contact_id_start)
+
+
+def run_migrations(connection: Connection, contact_id_start: int):
+    context.configure(connection=connection, target_metadata=None)
+    with context.begin_transaction():
+        context.run_migrations(contact_id_start=contact_id_start)
+
+
+async def run_async_migrations(url: str, contact_id_start: int):
+    connectable = create_async_engine(url, poolclass=pool.NullPool)
+
+    async with connectable.connect() as connection:
+        await connection.run_sync(run_migrations, contact_id_start)
+
+    await connectable.dispose()
+
+
+for name, url, contact_id_start in targets():
+    if context.is_offline_mode():
+        run_migrations_offline(url, contact_id_start)
+    else:
+        asyncio.run(run_async_migrations(url, contact_id_start))
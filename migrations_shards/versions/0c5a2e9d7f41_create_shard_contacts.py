@@ -0,0 +1,80 @@
+"""create contacts on a shard
+
+Revision ID: 0c5a2e9d7f41
+Revises:
+Create Date: 2026-10-19 18:10:12.902317
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0c5a2e9d7f41"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade(contact_id_start: int = 1) -> None:
+    """Upgrade schema.
+
+    Same columns as ``contacts`` on the primary, without the foreign key to
+    ``users``; IDs are 64-bit and start at ``contact_id_start``.
+    """
+    op.create_table(
+        "contacts",
+        sa.Column(
+            "id",
+            sa.BigInteger().with_variant(sa.Integer(), "sqlite"),
+            sa.Identity(start=contact_id_start),
+            nullable=False,
+        ),
+        sa.Column("first_name", sa.String(length=50), nullable=True),
+        sa.Column("last_name", sa.String(length=50), nullable=True),
+        sa.Column("email", sa.String(length=100), nullable=True),
+        sa.Column("phone", sa.String(length=30), nullable=True),
+        sa.Column("birthday", sa.Date(), nullable=True),
+        sa.Column("extra_info", sa.Text(), nullable=True),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("email_normalized", sa.String(length=100), nullable=True),
+        sa.Column("phone_normalized", sa.String(length=30), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.Column("deleted_at", sa.DateTime(), nullable=True),
+        sa.Column("version", sa.BigInteger(), server_default="1", nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sqlite_autoincrement=True,
+    )
+    if op.get_context().dialect.name == "sqlite" and contact_id_start > 1:
+        op.execute(
+            sa.text(
+                "INSERT INTO sqlite_sequence (name, seq) VALUES ('contacts', :seq)"
+            ).bindparams(seq=contact_id_start - 1)
+        )
+    op.create_index(op.f("ix_contacts_id"), "contacts", ["id"], unique=False)
+    op.create_index(
+        "ix_contacts_user_id_version", "contacts", ["user_id", "version"], unique=False
+    )
+    op.create_index(
+        "ix_contacts_user_id_email_normalized",
+        "contacts",
+        ["user_id", "email_normalized"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_contacts_user_id_phone_normalized",
+        "contacts",
+        ["user_id", "phone_normalized"],
+        unique=False,
+    )
+
+
+def downgrade(contact_id_start: int = 1) -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_contacts_user_id_phone_normalized", table_name="contacts")
+    op.drop_index("ix_contacts_user_id_email_normalized", table_name="contacts")
+    op.drop_index("ix_contacts_user_id_version", table_name="contacts")
+    op.drop_index(op.f("ix_contacts_id"), table_name="contacts")
+    op.drop_table("contacts")
@@ -0,0 +1,78 @@
+"""Admin-only diagnostics routes.
+
+Profiling endpoints act on the worker process that serves the request;
+with several workers, each one has its own profiler.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from src.conf.config import settings
+from src.services.auth import get_current_admin_user
+from src.services.profiler import SamplingProfiler, request_profiles, worker_profiler
+from src.services.tracing import TracedRoute
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(get_current_admin_user)],
+    route_class=TracedRoute,
+)
+
+
+def collapsed_response(profiler: SamplingProfiler, name: str) -> PlainTextResponse:
+    """Return a profile as a downloadable collapsed-stack file."""
+    return PlainTextResponse(
+        profiler.collapsed(),
+        headers={
+            "Content-Disposition": f'attachment; filename="{name}.collapsed"',
+            "X-Profile-Samples": str(profiler.samples),
+            "X-Profile-Seconds": f"{profiler.duration:.3f}",
+        },
+    )
+
+
+@router.post("/profiler/start", status_code=status.HTTP_202_ACCEPTED)
+async def start_profiler(
+    seconds: float = Query(30, gt=0, le=settings.PROFILER_MAX_SECONDS),
+    interval_ms: float = Query(settings.PROFILER_INTERVAL_MS, ge=1, le=1000),
+):
+    """Start sampling this worker; sampling stops by itself after ``seconds``.
+
+    :raises HTTPException: 409 if the profiler is already running.
+    """
+    try:
+        worker_profiler.start(seconds, interval_ms / 1000)
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return {"message": "Profiler started", "seconds": seconds}
+
+
+@router.post("/profiler/stop", response_class=PlainTextResponse)
+async def stop_profiler():
+    """Stop the profiler and return its collapsed stacks.
+
+    Returns the last finished session if sampling already stopped.
+
+    :raises HTTPException: 404 if the profiler was never started.
+    """
+    profiler = worker_profiler.stop()
+    if profiler is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="No profile recorded"
+        )
+    return collapsed_response(profiler, "worker")
+
+
+@router.get("/profiler/requests/{profile_id}", response_class=PlainTextResponse)
+async def get_request_profile(profile_id: str):
+    """Return the profile of a request made with the ``X-Profile`` header.
+
+    :raises HTTPException: 404 if the profile is unknown or was evicted.
+    """
+    profiler = request_profiles.get(profile_id)
+    if profiler is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found"
+        )
+    return collapsed_response(profiler, profile_id)
@@ -4,6 +4,8 @@ Provides endpoints for user registration, login, email confirmation,
 token refresh and password reset.
 """
 
+import asyncio
+
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Request
 from sqlalchemy.orm import Session
 from fastapi.security import OAuth2PasswordRequestForm
@@ -20,15 +22,17 @@ from src.services.auth import (
     create_access_token,
     Hash,
     get_email_from_token,
-    create_refresh_token,
+    create_session_refresh_token,
     verify_refresh_token,
 )
+from src.repository.users import UserAlreadyExists
 from src.services.users import UserService
 from src.database.db import get_db
+from src.services.tracing import TracedRoute
 
 from src.services.email import send_email, send_reset_password_email
 
-router = APIRouter(prefix="/auth", tags=["auth"])
+router = APIRouter(prefix="/auth", tags=["auth"], route_class=TracedRoute)
 
 
 @router.post("/register", response_model=User, status_code=status.HTTP_201_CREATED)
@@ -40,41 +44,65 @@ async def register_user(
 ):
     """Register a new user and send a confirmation email.
 
-    The user is created in the database and an email with a verification
-    link is sent in the background.
+    The user is created in the database; the avatar lookup and an email with
+    a verification link run in the background. Taken emails and usernames are
+    rejected before the password is hashed, and the hash is computed in a
+    thread; the insert still rejects a concurrent duplicate.
 
     :raises HTTPException: 409 if email or username is already used.
     :return: Created user.
     """
     user_service = UserService(db)
 
-    email_user = await user_service.get_user_by_email(user_data.email)
-    if email_user:
-        raise HTTPException(
+    def conflict(field: str) -> HTTPException:
+        return HTTPException(
             status_code=status.HTTP_409_CONFLICT,
-            detail="Email is used",
+            detail="Email is used" if field == "email" else "Name is used",
         )
 
-    username_user = await user_service.get_user_by_username(user_data.username)
-    if username_user:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="Name is used",
-        )
-    user_data.password = Hash().get_password_hash(user_data.password)
-    new_user = await user_service.create_user(user_data)
+    field = await user_service.conflicting_field(user_data.email, user_data.username)
+    if field is not None:
+        raise conflict(field)
+    user_data.password = await asyncio.to_thread(
+        Hash().get_password_hash, user_data.password
+    )
+    try:
+        new_user = await user_service.create_user(user_data)
+    except UserAlreadyExists as e:
+        raise conflict(e.field)
+    background_tasks.add_task(user_service.resolve_avatar, new_user.id, new_user.email)
     background_tasks.add_task(
         send_email, new_user.email, new_user.username, request.base_url
     )
     return new_user
 
 
+async def upgrade_password_hash(
+    user_service: UserService, user_id: int, old_hash: str, password: str
+) -> None:
+    """Hash ``password`` with the current scheme and cost and store it.
+
+    Hashing takes as long as a login's verification, so it runs in a thread
+    after the response is sent.
+    """
+    new_hash = await asyncio.to_thread(Hash().get_password_hash, password)
+    await user_service.rehash_password(user_id, old_hash, new_hash)
+
+
 @router.post("/login", response_model=Token)
 async def login_user(
-    form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
+    background_tasks: BackgroundTasks,
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: Session = Depends(get_db),
 ):
     """Authenticate user and return access and refresh tokens.
 
+    Only reads the user; the refresh-token session, and the password hash
+    when its scheme or cost is outdated, are written in background tasks
+    after the response is sent. Until the session row is committed, a few
+    milliseconds later, ``/refresh-token`` rejects the new refresh token
+    with 401; clients refresh only when the access token expires.
+
     :raises HTTPException: 401 if credentials are invalid or email is not confirmed.
     :return: JWT token pair.
     """
@@ -92,11 +120,16 @@ async def login_user(
             detail="Email is not confirmed",
         )
     access_token = await create_access_token(data={"sub": user.username})
-    refresh_token = await create_refresh_token(data={"sub": user.username})
-
-    user.refresh_token = refresh_token
-    await db.commit()
-    await db.refresh(user)
+    refresh_token, jti, expires_at = await create_session_refresh_token(user.username)
+    background_tasks.add_task(user_service.record_session, user.id, jti, expires_at)
+    if Hash().needs_update(user.hashed_password):
+        background_tasks.add_task(
+            upgrade_password_hash,
+            user_service,
+            user.id,
+            user.hashed_password,
+            form_data.password,
+        )
     return {
         "access_token": access_token,
         "refresh_token": refresh_token,
@@ -1,19 +1,86 @@
 """Contacts API routes.
 
-Provides CRUD operations for contacts and an endpoint to get upcoming birthdays.
+Provides CRUD operations for contacts, endpoints to get upcoming birthdays,
+to sync changes incrementally or stream them, and to find and merge
+duplicate contacts.
+
+List endpoints use the read-only repository mode and serialize the returned
+records straight to JSON with orjson instead of validating ORM objects through
+Pydantic.
 """
 
-from fastapi import APIRouter, HTTPException, Depends, status, Query
+import math
+
+from fastapi import APIRouter, HTTPException, Depends, Request, status, Query
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.db import get_db
-from src.schemas import ContactCreate, ContactUpdate, ContactGet, ContactsGet
+from src.database.db import request_session
+from src.database.shards import shard_router
+from src.conf.config import settings
+from src.schemas import (
+    ContactBatchRequest,
+    ContactBatchResponse,
+    ContactChangesGet,
+    ContactCreate,
+    ContactDuplicatesGet,
+    ContactMerge,
+    ContactUpdate,
+    ContactGet,
+    ContactsGet,
+)
 from src.services.contacts import ContactService
+from src.services.dedup import DedupService
+from src.services.events import event_broker, sse_stream
 
 from src.database.models import User
-from src.services.auth import get_current_user
+from src.services.auth import get_current_user, oauth2_scheme
+from src.services.tracing import TracedRoute
+
+router = APIRouter(prefix="/contacts", tags=["contacts"], route_class=TracedRoute)
+
+
+async def get_contact_db(request: Request, user: User = Depends(get_current_user)):
+    """Yield a session on the shard that stores the current user's contacts.
+
+    :raises HTTPException: 503 while the contacts are being moved to
+        another shard.
+    """
+    if getattr(user, "shard_moving", False):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Contacts are being moved, retry shortly",
+            headers={"Retry-After": str(math.ceil(settings.SHARD_MOVE_GRACE_SECONDS))},
+        )
+    manager = shard_router.manager_for(user.id, getattr(user, "shard", None))
+    async with request_session(request, manager) as session:
+        yield session
+
+
+async def get_contact_read_db(request: Request, user: User = Depends(get_current_user)):
+    """Yield a read session on the shard that stores the current user's contacts.
+
+    While the contacts are being moved, reads go to the source shard's
+    primary: its replicas may lag, and the target is not complete yet.
+    """
+    manager = shard_router.manager_for(user.id, getattr(user, "shard", None))
+    read_only = not getattr(user, "shard_moving", False)
+    async with request_session(request, manager, read_only=read_only) as session:
+        yield session
+
+
+async def get_stream_user(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(oauth2_scheme),
+):
+    """Return the current user for a long-lived stream.
 
-router = APIRouter(prefix="/contacts", tags=["contacts"])
+    The session that loads the user is closed before the stream starts, so an
+    open stream holds no primary or replica connection.
+    """
+    async with request_session(request, read_only=True) as db:
+        return await get_current_user(credentials, db)
 
 
 @router.get("/", response_model=ContactsGet)
@@ -23,14 +90,14 @@ async def read_contacts(
     first_name: str | None = Query(default=None),
     last_name: str | None = Query(default=None),
     email: str | None = Query(default=None),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_contact_read_db),
     user: User = Depends(get_current_user),
 ):
     """Get a list of contacts for the current user.
 
     Supports pagination and optional filtering by first name, last name and email.
     """
-    contact_service = ContactService(db)
+    contact_service = ContactService(db, read_only=True)
     contacts = await contact_service.get_contacts(
         user=user,
         skip=skip,
@@ -39,31 +106,107 @@ async def read_contacts(
         last_name=last_name,
         email=email,
     )
-    return ContactsGet(data=contacts)
+    return ORJSONResponse({"data": contacts})
 
 
 @router.get("/birthdays/next7", response_model=ContactsGet)
 async def upcoming_birthdays(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_contact_read_db),
     user: User = Depends(get_current_user),
 ):
     """Get contacts whose birthdays are in the next 7 days."""
-    contact_service = ContactService(db)
+    contact_service = ContactService(db, read_only=True)
     contacts = await contact_service.get_upcoming_birthdays(user, days=7)
-    return ContactsGet(data=contacts)
+    return ORJSONResponse({"data": contacts})
+
+
+@router.get("/changes", response_model=ContactChangesGet)
+async def read_changes(
+    since: int = Query(default=0, ge=0),
+    limit: int = Query(
+        default=settings.CONTACT_CHANGES_PAGE_SIZE,
+        ge=1,
+        le=settings.CONTACT_CHANGES_PAGE_SIZE,
+    ),
+    cursor: str | None = Query(default=None, pattern=r"^\d+:\d+$"),
+    db: AsyncSession = Depends(get_contact_read_db),
+    user: User = Depends(get_current_user),
+):
+    """Get contacts changed since a sync token, one page at a time.
+
+    Returns changed contacts, IDs of deleted contacts and the ``sync_token``
+    to send as ``since`` on the next call. ``since=0`` returns everything.
+    While ``next_cursor`` is set there are more changes: repeat the call with
+    the same ``since`` and ``cursor=<next_cursor>``, and keep the
+    ``sync_token`` of the last page.
+    """
+    contact_service = ContactService(db, read_only=True)
+    changes = await contact_service.get_changes(user, since, limit, cursor)
+    return ORJSONResponse(changes)
+
+
+@router.get("/stream")
+async def stream_changes(user: User = Depends(get_stream_user)):
+    """Stream ``created``, ``updated`` and ``deleted`` events as server-sent events.
+
+    The event ID is the contact's sync token; a client that reconnects can
+    catch up with ``GET /contacts/changes?since=<last event ID>``.
+    """
+
+    async def events():
+        with event_broker.subscribe(user.id) as queue:
+            async for frame in sse_stream(queue):
+                yield frame
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/duplicates", response_model=ContactDuplicatesGet)
+async def read_duplicates(
+    db: AsyncSession = Depends(get_contact_read_db),
+    user: User = Depends(get_current_user),
+):
+    """Get clusters of contacts sharing a normalized email or phone."""
+    clusters = await DedupService(db).find_duplicates(user)
+    return ORJSONResponse({"data": clusters})
+
+
+@router.post("/duplicates/merge", response_model=ContactGet)
+async def merge_duplicates(
+    body: ContactMerge,
+    db: AsyncSession = Depends(get_contact_db),
+    user: User = Depends(get_current_user),
+):
+    """Merge duplicate contacts into a primary contact and delete them.
+
+    Empty fields of the primary contact are filled from the duplicates.
+
+    :raises HTTPException: 404 if any of the contacts is not found.
+    """
+    contact = await DedupService(db).merge(user, body.primary_id, body.duplicate_ids)
+    if contact is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Contact not found",
+        )
+    return contact
 
 
 @router.get("/{contact_id}", response_model=ContactGet)
 async def read_contact(
     contact_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_contact_read_db),
     user: User = Depends(get_current_user),
 ):
     """Get a single contact by ID for the current user.
 
     :raises HTTPException: 404 if contact is not found.
     """
-    contact_service = ContactService(db)
+    contact_service = ContactService(db, read_only=True)
     contact = await contact_service.get_contact(user, contact_id)
     if contact is None:
         raise HTTPException(
@@ -76,7 +219,7 @@ async def read_contact(
 @router.post("/", response_model=ContactGet, status_code=status.HTTP_201_CREATED)
 async def create_contact(
     body: ContactCreate,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_contact_db),
     user: User = Depends(get_current_user),
 ):
     """Create a new contact belonging to the current user."""
@@ -84,11 +227,34 @@ async def create_contact(
     return await contact_service.create_contact(user, body)
 
 
+@router.post("/batch", response_model=ContactBatchResponse)
+async def batch_contacts(
+    body: ContactBatchRequest,
+    db: AsyncSession = Depends(get_contact_db),
+    user: User = Depends(get_current_user),
+):
+    """Create, update and delete several contacts in one transaction.
+
+    Creates run first, then updates, then deletes. Each operation gets its own
+    result; operations on contacts that do not exist report status 404.
+
+    :raises HTTPException: 413 if the batch exceeds ``CONTACT_BATCH_MAX_SIZE``.
+    """
+    if len(body.operations) > settings.CONTACT_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=f"Batch exceeds {settings.CONTACT_BATCH_MAX_SIZE} operations",
+        )
+    contact_service = ContactService(db)
+    results = await contact_service.apply_batch(user, body.operations)
+    return {"results": results}
+
+
 @router.patch("/{contact_id}", response_model=ContactGet)
 async def update_contact(
     body: ContactUpdate,
     contact_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_contact_db),
     user: User = Depends(get_current_user),
 ):
     """Partially update a contact for the current user.
@@ -108,7 +274,7 @@ async def update_contact(
 @router.delete("/{contact_id}", response_model=ContactGet)
 async def remove_contact(
     contact_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_contact_db),
     user: User = Depends(get_current_user),
 ):
     """Delete a contact for the current user.
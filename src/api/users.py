@@ -15,9 +15,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src.database.db import get_db
 from src.services.users import UserService
 from src.services.upload_file import UploadFileService
+from src.services.tracing import TracedRoute
 from src.conf.config import settings
 
-router = APIRouter(prefix="/users", tags=["users"])
+router = APIRouter(prefix="/users", tags=["users"], route_class=TracedRoute)
 
 limiter = Limiter(key_func=get_remote_address)
 
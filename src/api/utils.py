@@ -1,12 +1,20 @@
 """Utility API routes."""
 
+import logging
+
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 
 from src.database.db import get_db
+from src.services import health
+from src.services.redis import redis_client
+from src.services.tracing import TracedRoute
+
+logger = logging.getLogger(__name__)
 
-router = APIRouter(tags=["utils"])
+router = APIRouter(tags=["utils"], route_class=TracedRoute)
 
 
 @router.get("/healthchecker")
@@ -27,9 +35,48 @@ async def healthchecker(db: AsyncSession = Depends(get_db)):
                 detail="Database is not configured correctly",
             )
         return {"message": "Welcome to FastAPI!"}
-    except Exception as e:
-        print(e)
+    except Exception:
+        logger.exception("Health check failed")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error connecting to the database",
         )
+
+
+@router.get("/live")
+async def live():
+    """Liveness probe.
+
+    Answers without touching any dependency: it only shows that the worker
+    is serving requests.
+    """
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+async def ready():
+    """Readiness probe.
+
+    Checks the database pools, Redis, the SMTP server and the upload backend
+    concurrently, with a timeout each. The report is cached for a few
+    seconds. Returns HTTP 503 when a critical dependency is down; other
+    failures are reported as ``degraded`` with HTTP 200.
+    """
+    report = await health.health_checker.report()
+    return ORJSONResponse(
+        report,
+        status_code=(
+            status.HTTP_503_SERVICE_UNAVAILABLE
+            if report["status"] == "unavailable"
+            else status.HTTP_200_OK
+        ),
+    )
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Expose the Redis circuit breaker state in Prometheus text format."""
+    return PlainTextResponse(
+        redis_client.breaker.metrics("redis_circuit"),
+        media_type="text/plain; version=0.0.4",
+    )
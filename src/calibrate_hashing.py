@@ -0,0 +1,153 @@
+"""Recommend password hashing parameters for this machine.
+
+Times password verification for a range of bcrypt rounds and, when
+``argon2-cffi`` is installed, argon2 time and memory costs, then prints the
+strongest parameters whose median verify time stays within the target. Run
+it on the production hardware and copy the printed settings into ``.env``;
+existing hashes are upgraded at the users' next login.
+
+Usage::
+
+    python -m src.calibrate_hashing --target-ms 250
+    python -m src.calibrate_hashing --target-ms 100 --schemes argon2 bcrypt
+"""
+
+import argparse
+import statistics
+import time
+
+from src.conf.config import settings
+
+BCRYPT_ROUNDS = range(8, 17)
+ARGON2_TIME_COSTS = (1, 2, 3, 4)
+ARGON2_MEMORY_COSTS = tuple(2**n * 1024 for n in range(4, 10))
+"""Argon2 memory costs tried, in KiB: 16 MiB up to 512 MiB."""
+ARGON2_MIN_MEMORY_COST = 19 * 1024
+"""Smallest memory cost recommended, in KiB (OWASP minimum for argon2id)."""
+
+
+def time_verify(context, repeat: int) -> float:
+    """Return the median seconds ``context`` takes to verify a password."""
+    hashed = context.hash("calibration-password")
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        context.verify("calibration-password", hashed)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def calibrate_bcrypt(target: float, repeat: int) -> tuple[dict, list]:
+    """Time bcrypt rounds until the target is exceeded.
+
+    :return: The recommended settings and the ``(rounds, seconds)`` timings.
+    """
+    from passlib.context import CryptContext
+
+    from src.services.auth import password_context_options
+
+    best, timings = None, []
+    for rounds in BCRYPT_ROUNDS:
+        options = password_context_options(["bcrypt"], bcrypt_rounds=rounds)
+        seconds = time_verify(CryptContext(**options), repeat)
+        timings.append((rounds, seconds))
+        if seconds > target:
+            break
+        best = rounds
+    return {"PASSWORD_BCRYPT_ROUNDS": best or BCRYPT_ROUNDS[0]}, timings
+
+
+def calibrate_argon2(target: float, repeat: int, parallelism: int) -> tuple:
+    """Time argon2 cost combinations and keep the strongest within target.
+
+    Strength is the product of time and memory cost.
+
+    :return: The recommended settings and the ``(time, memory, seconds)``
+        timings.
+    """
+    from passlib.context import CryptContext
+
+    from src.services.auth import password_context_options
+
+    best, timings = None, []
+    for memory_cost in ARGON2_MEMORY_COSTS:
+        for time_cost in ARGON2_TIME_COSTS:
+            options = password_context_options(
+                ["argon2"],
+                argon2_time_cost=time_cost,
+                argon2_memory_cost=memory_cost,
+                argon2_parallelism=parallelism,
+            )
+            seconds = time_verify(CryptContext(**options), repeat)
+            timings.append((time_cost, memory_cost, seconds))
+            if seconds > target:
+                break
+            if memory_cost >= ARGON2_MIN_MEMORY_COST and (
+                best is None or time_cost * memory_cost > best[0] * best[1]
+            ):
+                best = (time_cost, memory_cost)
+    if best is None:
+        best = (ARGON2_TIME_COSTS[0], ARGON2_MIN_MEMORY_COST)
+    return {
+        "PASSWORD_ARGON2_TIME_COST": best[0],
+        "PASSWORD_ARGON2_MEMORY_COST": best[1],
+        "PASSWORD_ARGON2_PARALLELISM": parallelism,
+    }, timings
+
+
+def argon2_available() -> bool:
+    from passlib.hash import argon2
+
+    return argon2.has_backend()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--target-ms",
+        type=float,
+        default=250.0,
+        help="Maximum median verify time per password",
+    )
+    parser.add_argument(
+        "--schemes", nargs="+", choices=["bcrypt", "argon2"], default=["bcrypt"]
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--parallelism", type=int, default=settings.PASSWORD_ARGON2_PARALLELISM
+    )
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    target = args.target_ms / 1000
+    recommended = {}
+    for scheme in args.schemes:
+        if scheme == "bcrypt":
+            values, timings = calibrate_bcrypt(target, args.repeat)
+            for rounds, seconds in timings:
+                print(f"bcrypt rounds={rounds:<2} {seconds * 1000:>9.1f} ms")
+        elif argon2_available():
+            values, timings = calibrate_argon2(target, args.repeat, args.parallelism)
+            for time_cost, memory_cost, seconds in timings:
+                print(
+                    f"argon2 t={time_cost} m={memory_cost // 1024:>3} MiB "
+                    f"{seconds * 1000:>9.1f} ms"
+                )
+        else:
+            print("argon2 skipped: install argon2-cffi to use it")
+            continue
+        recommended.update(values)
+
+    if not recommended:
+        return
+    schemes = [s for s in args.schemes if s != "argon2" or argon2_available()]
+    print(f"\nRecommended settings for a {args.target_ms:g} ms verify target:")
+    print(f"PASSWORD_SCHEMES={schemes}".replace("'", '"'))
+    for name, value in recommended.items():
+        print(f"{name}={value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,11 +11,29 @@ class Settings(BaseSettings):
     """
 
     DB_URL: str = "sqlite+aiosqlite:///./test.db"
+    DB_REPLICA_URLS: list[str] = []
+    DB_REPLICA_STRATEGY: str = "round_robin"
+    DB_READ_YOUR_WRITES_SECONDS: float = 5.0
+    DB_REPLICA_RETRY_SECONDS: float = 30.0
+    DB_QUERY_CACHE_SIZE: int = 500
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 500
+    DB_PGBOUNCER: bool = False
+
+    SHARD_URLS: dict[str, str] = {}
+    SHARD_MAP: dict[int, str] = {}
+    SHARD_VNODES: int = 64
+    SHARD_MOVE_GRACE_SECONDS: float = 5.0
     JWT_SECRET: str = "testsecret"
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRATION_SECONDS: int = 3600
     JWT_REFRESH_EXPIRATION_SECONDS: int = 604800
 
+    PASSWORD_SCHEMES: list[str] = ["bcrypt"]
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    PASSWORD_ARGON2_TIME_COST: int = 3
+    PASSWORD_ARGON2_MEMORY_COST: int = 64 * 1024
+    PASSWORD_ARGON2_PARALLELISM: int = 2
+
     MAIL_USERNAME: EmailStr = "example@meta.ua"
     MAIL_PASSWORD: str = "password"
     MAIL_FROM: EmailStr = "example@meta.ua"
@@ -34,6 +52,64 @@ class Settings(BaseSettings):
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
+    REDIS_SOCKET_TIMEOUT_SECONDS: float = 0.1
+    REDIS_BREAKER_FAILURE_THRESHOLD: int = 3
+    REDIS_BREAKER_RESET_SECONDS: float = 5.0
+    REDIS_FALLBACK_CACHE_SIZE: int = 10000
+    REDIS_FALLBACK_CACHE_TTL_SECONDS: float = 60.0
+    CACHE_TTL_JITTER: float = 0.1
+    CACHE_EARLY_REFRESH_BETA: float = 1.0
+    CACHE_LOCK_MS: int = 2000
+    CACHE_LOCK_WAIT_SECONDS: float = 0.2
+
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 0
+    SERVER_BACKLOG: int = 2048
+    SERVER_KEEP_ALIVE_SECONDS: int = 65
+    SERVER_GRACEFUL_SHUTDOWN_SECONDS: int = 30
+    SERVER_FORWARDED_ALLOW_IPS: str = "127.0.0.1"
+
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"
+    LOG_SQL: bool = False
+    LOG_ACCESS_SAMPLE_RATE: float = 1.0
+    LOG_SLOW_REQUEST_MS: float = 500.0
+
+    TRACING_ENABLED: bool = False
+    TRACING_EXPORTER: str = "log"
+    TRACING_SAMPLE_RATIO: float = 0.1
+
+    PROFILER_TOKEN: str = ""
+    PROFILER_INTERVAL_MS: float = 5.0
+    PROFILER_REQUEST_INTERVAL_MS: float = 1.0
+    PROFILER_MAX_SECONDS: int = 300
+
+    HEALTH_CHECK_TIMEOUT_SECONDS: float = 1.0
+    HEALTH_CACHE_TTL_SECONDS: float = 5.0
+    HEALTH_CRITICAL_CHECKS: list[str] = ["database"]
+    HEALTH_UPLOAD_URL: str = "https://api.cloudinary.com"
+
+    WARMUP_ENABLED: bool = True
+    WARMUP_DB_CONNECTIONS: int = 2
+
+    AVATAR_PROVIDER: str = "gravatar"
+    AVATAR_LOOKUP_TIMEOUT_SECONDS: float = 2.0
+    AVATAR_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    AVATAR_NEGATIVE_TTL_SECONDS: int = 24 * 3600
+
+    CONTACT_BATCH_MAX_SIZE: int = 500
+    CONTACT_CHANGES_PAGE_SIZE: int = 1000
+
+    CONTACT_EVENTS_BACKEND: str = "memory"
+    CONTACT_EVENTS_QUEUE_SIZE: int = 100
+    CONTACT_EVENTS_KEEPALIVE_SECONDS: float = 15.0
+
+    MAIL_POOL_MAX_MESSAGES: int = 100
+
+    REMINDER_BATCH_SIZE: int = 500
+    REMINDER_DAYS_AHEAD: int = 7
+    REMINDER_SEND_RATE: float = 5.0
 
     model_config = ConfigDict(
         extra="ignore", env_file=".env", env_file_encoding="utf-8", case_sensitive=True
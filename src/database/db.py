@@ -3,9 +3,21 @@
 Values are loaded from the .env file and environment variables.
 """
 
+import asyncio
 import contextlib
+import itertools
+import time
+import uuid
 
-from sqlalchemy.exc import SQLAlchemyError
+from fastapi import Request
+from jose import JWTError, jwt
+from sqlalchemy import event, make_url, text
+from sqlalchemy.exc import (
+    DBAPIError,
+    InterfaceError,
+    OperationalError,
+    SQLAlchemyError,
+)
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     async_sessionmaker,
@@ -13,29 +25,199 @@ from sqlalchemy.ext.asyncio import (
 )
 
 from src.conf.config import settings
+from src.services.redis import redis_client
+from src.services.tracing import instrument_engine
 
 
-class DatabaseSessionManager:
-    """Manage the asynchronous SQLAlchemy engine and session factory.
+def engine_options(url: str) -> dict:
+    """Return the ``create_async_engine`` options for ``url``.
+
+    ``DB_QUERY_CACHE_SIZE`` sizes SQLAlchemy's compiled statement cache. On
+    asyncpg, ``DB_PREPARED_STATEMENT_CACHE_SIZE`` sizes the per-connection
+    cache of server-side prepared statements, so a repeated query is parsed
+    and planned by PostgreSQL once per connection.
+
+    With ``DB_PGBOUNCER`` (transaction pooling) consecutive transactions may
+    run on different server connections, so prepared statements are not
+    cached and each gets a unique name instead of asyncpg's per-connection
+    counter.
+    """
+    options = {"query_cache_size": settings.DB_QUERY_CACHE_SIZE}
+    if make_url(url).get_driver_name() != "asyncpg":
+        return options
+    if settings.DB_PGBOUNCER:
+        options["connect_args"] = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": _unique_statement_name,
+        }
+    else:
+        options["connect_args"] = {
+            "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE
+        }
+    return options
+
+
+def _unique_statement_name() -> str:
+    return f"__asyncpg_{uuid.uuid4()}__"
+
+
+class LazyEngine:
+    """Create an engine and its session factory on first use.
+
+    Creating an engine imports the database driver, so it is deferred until
+    the first session is opened or the application warms up.
 
     :param url: Database connection URL.
     """
 
     def __init__(self, url: str):
-        self._engine: AsyncEngine | None = create_async_engine(url)
-        self._session_maker: async_sessionmaker = async_sessionmaker(
-            autoflush=False, autocommit=False, bind=self._engine
+        self.url = url
+        self._engine: AsyncEngine | None = None
+        self._session_maker: async_sessionmaker | None = None
+
+    @property
+    def engine(self) -> AsyncEngine:
+        """Engine, created on first access."""
+        if self._engine is None:
+            self._engine = create_async_engine(self.url, **engine_options(self.url))
+            instrument_engine(self._engine)
+        return self._engine
+
+    @property
+    def session_maker(self) -> async_sessionmaker:
+        """Session factory bound to :attr:`engine`, created on first access."""
+        if self._session_maker is None:
+            self._session_maker = async_sessionmaker(
+                autoflush=False, autocommit=False, bind=self.engine
+            )
+        return self._session_maker
+
+    async def warm_up(self, connections: int = 1) -> None:
+        """Open ``connections`` pooled connections ahead of the first request."""
+        async with contextlib.AsyncExitStack() as stack:
+            for _ in range(connections):
+                conn = await stack.enter_async_context(self.engine.connect())
+                await conn.execute(text("SELECT 1"))
+
+    async def dispose(self) -> None:
+        """Dispose the engine if it has been created."""
+        if self._engine is not None:
+            await self._engine.dispose()
+
+
+class Replica(LazyEngine):
+    """Read replica engine together with its health and load state.
+
+    :param url: Database connection URL of the replica.
+    """
+
+    def __init__(self, url: str):
+        super().__init__(url)
+        self.active = 0
+        self.healthy = True
+        self.retry_at = 0.0
+
+    def available(self, now: float) -> bool:
+        """Return True if the replica is healthy or due for a retry."""
+        return self.healthy or now >= self.retry_at
+
+    def mark_down(self, retry_seconds: float) -> None:
+        """Take the replica out of rotation for ``retry_seconds``."""
+        self.healthy = False
+        self.retry_at = time.monotonic() + retry_seconds
+
+    def mark_up(self) -> None:
+        """Put the replica back into rotation."""
+        self.healthy = True
+        self.retry_at = 0.0
+
+
+class DatabaseSessionManager(LazyEngine):
+    """Manage the asynchronous SQLAlchemy engine and session factory.
+
+    Engines are created lazily, on the first session or warm-up.
+
+    Writes always go to the primary database. Reads requested through
+    :meth:`read_session` are routed to a healthy replica, unless the caller
+    committed a write recently (read-your-writes window) or no replica is
+    available, in which case the primary is used.
+
+    The read-your-writes window is a ``rw:<key>`` key in Redis that expires
+    with the window, so all workers see it and it never needs pruning. It is
+    only written when replicas are configured.
+
+    :param url: Database connection URL of the primary.
+    :param replica_urls: Connection URLs of read replicas.
+    :param strategy: Replica selection strategy, ``round_robin`` or
+        ``least_connections``.
+    :param read_your_writes_seconds: How long reads of a caller stay on the
+        primary after the caller committed a write.
+    :param retry_seconds: How long a failed replica is skipped before it is
+        tried again.
+    :param redis: Client storing the read-your-writes windows.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        replica_urls: list[str] | None = None,
+        strategy: str = "round_robin",
+        read_your_writes_seconds: float = 5.0,
+        retry_seconds: float = 30.0,
+        redis=redis_client,
+    ):
+        if strategy not in ("round_robin", "least_connections"):
+            raise ValueError(f"Unknown replica strategy: {strategy}")
+
+        super().__init__(url)
+        self.replicas = [Replica(replica_url) for replica_url in replica_urls or []]
+        self.strategy = strategy
+        self.read_your_writes_seconds = read_your_writes_seconds
+        self.retry_seconds = retry_seconds
+        self._round_robin = itertools.count()
+        self.redis = redis
+
+    def record_write(self, key: str) -> None:
+        """Open the read-your-writes window of ``key`` (usually a username)."""
+        if self.replicas:
+            self.redis.set(
+                f"rw:{key}", "1", px=int(self.read_your_writes_seconds * 1000)
+            )
+
+    def wrote_recently(self, key: str | None) -> bool:
+        """Return True if ``key`` is inside its read-your-writes window."""
+        return (
+            key is not None
+            and bool(self.replicas)
+            and self.redis.get(f"rw:{key}") is not None
         )
 
+    def pick_replica(self, key: str | None = None) -> Replica | None:
+        """Choose the replica for a read or None to read from the primary."""
+        if not self.replicas or self.wrote_recently(key):
+            return None
+        now = time.monotonic()
+
+        candidates = [replica for replica in self.replicas if replica.available(now)]
+        if not candidates:
+            return None
+        if self.strategy == "least_connections":
+            return min(candidates, key=lambda replica: replica.active)
+        return candidates[next(self._round_robin) % len(candidates)]
+
     @contextlib.asynccontextmanager
-    async def session(self):
+    async def session(self, key: str | None = None):
         """Provide an asynchronous database session context manager.
 
         Rolls back the transaction on SQLAlchemy errors and always closes the session.
+        Commits made through the session open a read-your-writes window for ``key``.
         """
-        if self._session_maker is None:
-            raise Exception("Database session is not initialized")
-        session = self._session_maker()
+        session = self.session_maker()
+        if key is not None:
+            event.listen(
+                session.sync_session, "after_commit", lambda _: self.record_write(key)
+            )
         try:
             yield session
         except SQLAlchemyError as e:
@@ -44,11 +226,152 @@ class DatabaseSessionManager:
         finally:
             await session.close()
 
+    @contextlib.asynccontextmanager
+    async def read_session(self, key: str | None = None):
+        """Provide a session for read-only work, served by a replica if possible."""
+        in_window = self.wrote_recently(key)
+        replica = None if in_window else self.pick_replica()
+        if replica is None:
+            async with self.session(key) as session:
+                if in_window:
+                    session.info["read_your_writes"] = True
+                yield session
+        else:
+            async with self.replica_session(replica) as session:
+                yield session
+
+    @contextlib.asynccontextmanager
+    async def replica_session(self, replica: Replica):
+        """Provide a session on ``replica``.
+
+        A replica that fails with a connection error is taken out of rotation
+        for ``retry_seconds``.
+        """
+        replica.active += 1
+        session = replica.session_maker()
+        try:
+            yield session
+            replica.mark_up()
+        except DBAPIError as e:
+            await session.rollback()
+            if e.connection_invalidated or isinstance(
+                e, (OperationalError, InterfaceError)
+            ):
+                replica.mark_down(self.retry_seconds)
+            raise
+        except SQLAlchemyError:
+            await session.rollback()
+            raise
+        finally:
+            replica.active -= 1
+            await session.close()
+
+    async def check_replicas(self, timeout: float = 2.0) -> dict[str, bool]:
+        """Run ``SELECT 1`` on every replica and update its health state.
+
+        :return: Mapping of replica URL to health.
+        """
+
+        async def ping(replica: Replica) -> bool:
+            try:
+                async with replica.engine.connect() as conn:
+                    await asyncio.wait_for(conn.execute(text("SELECT 1")), timeout)
+            except Exception:
+                replica.mark_down(self.retry_seconds)
+                return False
+            replica.mark_up()
+            return True
+
+        results = await asyncio.gather(*(ping(replica) for replica in self.replicas))
+        return {replica.url: ok for replica, ok in zip(self.replicas, results)}
+
+    async def warm_up(self, connections: int = 1) -> None:
+        """Fill the pools of the primary and all replicas."""
+        await super().warm_up(connections)
+        for replica in self.replicas:
+            await replica.warm_up(connections)
+
+    async def close(self) -> None:
+        """Dispose the primary and all replica engines."""
+        await self.dispose()
+        for replica in self.replicas:
+            await replica.dispose()
 
-sessionmanager = DatabaseSessionManager(settings.DB_URL)
 
+sessionmanager = DatabaseSessionManager(
+    settings.DB_URL,
+    settings.DB_REPLICA_URLS,
+    strategy=settings.DB_REPLICA_STRATEGY,
+    read_your_writes_seconds=settings.DB_READ_YOUR_WRITES_SECONDS,
+    retry_seconds=settings.DB_REPLICA_RETRY_SECONDS,
+)
+
+
+def request_key(request: Request) -> str | None:
+    """Return the bearer token subject used as the read-your-writes key.
+
+    The token is not verified here; it only steers reads between primary and
+    replicas; authentication is still done by ``get_current_user``.
+    """
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return jwt.get_unverified_claims(token).get("sub")
+    except JWTError:
+        return None
 
-async def get_db():
+
+@contextlib.asynccontextmanager
+async def request_session(
+    request: Request,
+    manager: DatabaseSessionManager | None = None,
+    read_only: bool = False,
+):
+    """Provide a session for a request, shared by all of its dependencies.
+
+    A session on ``manager``'s primary is opened once per request, so a
+    route and ``get_current_user`` use one connection. With ``read_only`` the
+    read goes to a replica when one applies; replica sessions are not shared.
+    A read kept on the primary by the read-your-writes window marks the
+    session with ``info["read_your_writes"]``.
+
+    :param manager: Session manager, ``sessionmanager`` by default.
+    """
+    manager = manager or sessionmanager
+    key = request_key(request)
+    in_window = read_only and manager.wrote_recently(key)
+    replica = manager.pick_replica() if read_only and not in_window else None
+    if replica is not None:
+        async with manager.replica_session(replica) as session:
+            yield session
+        return
+
+    shared = getattr(request.state, "db_sessions", None)
+    if shared is None:
+        shared = request.state.db_sessions = {}
+    if manager in shared:
+        if in_window:
+            shared[manager].info["read_your_writes"] = True
+        yield shared[manager]
+        return
+    async with manager.session(key) as session:
+        if in_window:
+            session.info["read_your_writes"] = True
+        shared[manager] = session
+        try:
+            yield session
+        finally:
+            del shared[manager]
+
+
+async def get_db(request: Request):
     """FastAPI dependency that yields an async database session."""
-    async with sessionmanager.session() as session:
+    async with request_session(request) as session:
+        yield session
+
+
+async def get_read_db(request: Request):
+    """FastAPI dependency that yields a session for reads, routed to a replica."""
+    async with request_session(request, read_only=True) as session:
         yield session
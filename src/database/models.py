@@ -3,11 +3,14 @@
 from sqlalchemy import (
     Column,
     Integer,
+    BigInteger,
     String,
     Date,
     Text,
     func,
+    false as sa_false,
     Boolean,
+    Index,
     Enum as SqlEnum,
 )
 from sqlalchemy.orm import DeclarativeBase, relationship
@@ -18,6 +21,26 @@ from sqlalchemy.sql.sqltypes import DateTime
 from sqlalchemy.sql.schema import ForeignKey
 
 from enum import Enum
+import re
+
+_PHONE_SEPARATORS = re.compile(r"[\s\-()]")
+
+
+def normalize_email(email: str | None) -> str | None:
+    """Return the email trimmed and lowercased, used to match duplicates."""
+    return email.strip().lower() if email else None
+
+
+def normalize_phone(phone: str | None) -> str | None:
+    """Return the phone without the spaces, dashes and parentheses it may contain."""
+    return _PHONE_SEPARATORS.sub("", phone) if phone else None
+
+
+def _normalized_default(column: str, normalize):
+    def default(context):
+        return normalize(context.get_current_parameters().get(column))
+
+    return default
 
 
 class UserRole(str, Enum):
@@ -34,7 +57,12 @@ class Base(DeclarativeBase):
 
 
 class Contact(Base):
-    """Contact entity stored in the database."""
+    """Contact entity stored in the database.
+
+    Deleted contacts are kept as tombstones with ``deleted_at`` set. Every
+    write stores the owner's next ``version``, which clients use as a sync
+    token.
+    """
 
     __tablename__ = "contacts"
 
@@ -48,11 +76,30 @@ class Contact(Base):
     user_id = Column(
         "user_id", ForeignKey("users.id", ondelete="CASCADE"), default=None
     )
+    email_normalized = Column(
+        String(100), default=_normalized_default("email", normalize_email)
+    )
+    phone_normalized = Column(
+        String(30), default=_normalized_default("phone", normalize_phone)
+    )
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    deleted_at = Column(DateTime, nullable=True)
+    version = Column(BigInteger, nullable=False, server_default="1")
     user = relationship("User", backref="notes")
 
+    __table_args__ = (
+        Index("ix_contacts_user_id_version", "user_id", "version"),
+        Index("ix_contacts_user_id_email_normalized", "user_id", "email_normalized"),
+        Index("ix_contacts_user_id_phone_normalized", "user_id", "phone_normalized"),
+    )
+
 
 class User(Base):
-    """User entity stored in the database."""
+    """User entity stored in the database.
+
+    ``shard`` pins the user's contacts to a shard once they have been moved
+    there; ``shard_moving`` blocks contact writes while a move is running.
+    """
 
     __tablename__ = "users"
     id = Column(Integer, primary_key=True)
@@ -68,3 +115,25 @@ class User(Base):
         default="user",
         nullable=False,
     )
+    shard = Column(String(50), nullable=True)
+    shard_moving = Column(
+        Boolean, default=False, server_default=sa_false(), nullable=False
+    )
+
+
+class UserSession(Base):
+    """Refresh-token session, inserted once per login and never updated.
+
+    The refresh token carries the session's ``jti``; a token is accepted
+    while its session row exists and has not expired.
+    """
+
+    __tablename__ = "user_sessions"
+
+    id = Column(Integer, primary_key=True)
+    jti = Column(String(32), unique=True, nullable=False)
+    user_id = Column(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    created_at = Column(DateTime, default=func.now())
+    expires_at = Column(DateTime, nullable=False)
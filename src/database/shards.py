@@ -0,0 +1,428 @@
+"""Horizontal sharding of contacts by ``user_id``.
+
+Every contact query filters by its owner, so each user's contacts live on a
+single shard. A shard is a :class:`DatabaseSessionManager` (and can have its
+own replicas). Users are placed on shards with a consistent hash ring; the
+``SHARD_MAP`` setting pins individual users to a shard, and a user moved by
+the ``move`` command is pinned by ``users.shard`` on the primary database,
+which takes precedence over both.
+
+The users table stays on the primary database. Shard databases hold only
+the contacts table, without its foreign key to ``users``, and are migrated
+separately (:func:`migrate_shards`, or ``alembic -n shards upgrade head``).
+Each shard allocates contact IDs from its own range of
+:data:`CONTACT_ID_BLOCK` IDs, so contacts keep their IDs when moved. Since
+the database no longer cascades user deletes to shards, the ``prune``
+command deletes the contacts of users that no longer exist.
+
+Rebalance users after changing the shard configuration with::
+
+    python -m src.database.shards plan
+    python -m src.database.shards apply
+    python -m src.database.shards prune   # contacts of deleted users
+"""
+
+import argparse
+import asyncio
+import bisect
+import hashlib
+import logging
+from pathlib import Path
+from typing import Callable
+
+from sqlalchemy import delete, distinct, func, insert, select, update
+
+from src.conf.config import settings
+from src.database.db import DatabaseSessionManager, sessionmanager
+from src.database.models import Contact, User
+
+logger = logging.getLogger(__name__)
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+
+CONTACT_ID_BLOCK = 2**40
+"""Number of contact IDs reserved for each shard; the primary uses the first."""
+
+_ID_CHUNK = 1000
+
+
+def contact_id_start(position: int) -> int:
+    """Return the first contact ID of the shard at ``position`` in ``SHARD_URLS``.
+
+    Positions are fixed when a shard is created, so new shards must be
+    appended to ``SHARD_URLS``.
+    """
+    return (position + 1) * CONTACT_ID_BLOCK + 1
+
+
+def shard_migration_targets(
+    urls: dict[str, str] | None = None,
+) -> list[tuple[str, str, int]]:
+    """Return ``(name, url, contact_id_start)`` of the shards to migrate.
+
+    A shard sharing ``DB_URL`` already has the primary schema and is skipped.
+    """
+    urls = settings.SHARD_URLS if urls is None else urls
+    return [
+        (name, url, contact_id_start(position))
+        for position, (name, url) in enumerate(urls.items())
+        if url != settings.DB_URL
+    ]
+
+
+def migrate_shards(urls: dict[str, str] | None = None, revision: str = "head"):
+    """Upgrade every shard database to ``revision``; blocking."""
+    from alembic import command
+    from alembic.config import Config
+
+    for name, url, id_start in shard_migration_targets(urls):
+        config = Config(str(ROOT / "alembic.ini"), ini_section="shards")
+        config.attributes.update(
+            shard=name,
+            url=url,
+            contact_id_start=id_start,
+            configure_logger=False,
+        )
+        logger.info("Migrating shard %s", name)
+        command.upgrade(config, revision)
+
+
+async def _lock_user(session, user_id: int) -> None:
+    """Wait for, then block, contact writes of the user in this transaction.
+
+    Uses the advisory lock taken by every contact write on PostgreSQL.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        await session.execute(select(func.pg_advisory_xact_lock(user_id)))
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent hash ring with virtual nodes.
+
+    Adding or removing a shard only moves the users whose ring segment
+    changes owner, roughly ``1 / len(names)`` of them.
+
+    :param names: Shard names placed on the ring.
+    :param vnodes: Number of points each shard occupies on the ring.
+    """
+
+    def __init__(self, names: list[str], vnodes: int = 64):
+        if not names:
+            raise ValueError("Hash ring needs at least one shard")
+        points = sorted(
+            (_hash(f"{name}#{i}"), name) for name in names for i in range(vnodes)
+        )
+        self._keys = [key for key, _ in points]
+        self._names = [name for _, name in points]
+
+    def get(self, key: str) -> str:
+        """Return the shard owning ``key``."""
+        index = bisect.bisect(self._keys, _hash(key)) % len(self._keys)
+        return self._names[index]
+
+
+class ShardRouter:
+    """Map users to shards and hand out sessions on the right shard.
+
+    Methods taking ``pinned`` accept the user's ``users.shard`` value, which
+    overrides the shard map and the ring.
+
+    :param shards: Shard name to session manager mapping.
+    :param shard_map: User ID to shard name overrides.
+    :param vnodes: Number of virtual nodes per shard on the hash ring.
+    :param primary: Database holding the users table, where moves persist
+        the new placement.
+    """
+
+    def __init__(
+        self,
+        shards: dict[str, DatabaseSessionManager],
+        shard_map: dict[int, str] | None = None,
+        vnodes: int = 64,
+        primary: DatabaseSessionManager = sessionmanager,
+    ):
+        self.shards = shards
+        self.shard_map = dict(shard_map or {})
+        unknown = set(self.shard_map.values()) - set(shards)
+        if unknown:
+            raise ValueError(f"Unknown shards in shard map: {sorted(unknown)}")
+        self.ring = HashRing(sorted(shards), vnodes)
+        self.primary = primary
+
+    def shard_for(self, user_id: int, pinned: str | None = None) -> str:
+        """Return the name of the shard storing contacts of ``user_id``."""
+        if pinned in self.shards:
+            return pinned
+        return self.shard_map.get(user_id) or self.ring.get(str(user_id))
+
+    def manager_for(
+        self, user_id: int, pinned: str | None = None
+    ) -> DatabaseSessionManager:
+        """Return the session manager of the shard storing ``user_id``."""
+        return self.shards[self.shard_for(user_id, pinned)]
+
+    def session(self, user_id: int, key: str | None = None, pinned: str | None = None):
+        """Open a read-write session on the shard of ``user_id``."""
+        return self.manager_for(user_id, pinned).session(key)
+
+    def read_session(
+        self, user_id: int, key: str | None = None, pinned: str | None = None
+    ):
+        """Open a read session on the shard of ``user_id``."""
+        return self.manager_for(user_id, pinned).read_session(key)
+
+    def group_by_shard(
+        self, user_ids: list[int], pinned: dict[int, str] | None = None
+    ) -> dict[str, list[int]]:
+        """Split ``user_ids`` into per-shard lists.
+
+        :param pinned: ``users.shard`` values by user ID.
+        """
+        pinned = pinned or {}
+        groups: dict[str, list[int]] = {}
+        for user_id in user_ids:
+            shard = self.shard_for(user_id, pinned.get(user_id))
+            groups.setdefault(shard, []).append(user_id)
+        return groups
+
+    def assign(self, user_id: int, shard: str) -> None:
+        """Pin ``user_id`` to ``shard`` in the in-memory shard map."""
+        if shard not in self.shards:
+            raise ValueError(f"Unknown shard: {shard}")
+        self.shard_map[user_id] = shard
+
+    async def load_pinned(self) -> dict[int, str]:
+        """Return the persisted ``users.shard`` placements by user ID."""
+        async with self.primary.session() as session:
+            result = await session.execute(
+                select(User.id, User.shard).where(User.shard.is_not(None))
+            )
+            return dict(result.tuples().all())
+
+    async def _set_placement(self, user_id: int, **values) -> str | None:
+        """Update the user's placement columns; return the username."""
+        async with self.primary.session() as session:
+            username = await session.scalar(
+                update(User)
+                .where(User.id == user_id)
+                .values(**values)
+                .returning(User.username)
+            )
+            await session.commit()
+            return username
+
+    async def misplaced_users(self) -> list[tuple[int, str, str]]:
+        """Find users whose contacts are not on the shard they route to.
+
+        :return: ``(user_id, current_shard, target_shard)`` tuples.
+        """
+        pinned = await self.load_pinned()
+        moves = []
+        for name, manager in self.shards.items():
+            async with manager.session() as session:
+                result = await session.execute(select(distinct(Contact.user_id)))
+                for user_id in result.scalars():
+                    target = self.shard_for(user_id, pinned.get(user_id))
+                    if target != name:
+                        moves.append((user_id, name, target))
+        return sorted(moves)
+
+    async def move_user(
+        self,
+        user_id: int,
+        source: str,
+        target: str,
+        grace: float = settings.SHARD_MOVE_GRACE_SECONDS,
+        on_change: Callable[[str], None] | None = None,
+    ) -> int:
+        """Move a user's contacts from ``source`` to ``target``, keeping their IDs.
+
+        1. ``users.shard_moving`` is set, so the API rejects the user's
+           contact writes; after ``grace`` seconds for requests already past
+           that check, the source's per-user write lock is taken.
+        2. The contacts are copied to the target, replacing any left there
+           by an interrupted move.
+        3. ``users.shard`` is set to the target and writes are unblocked.
+        4. The contacts are deleted from the source.
+
+        If ``users.shard`` already names the target, only step 4 runs, so
+        an interrupted move can simply be repeated.
+
+        :param on_change: Called with the username after each change of the
+            user's row, to drop cached copies of it; ``forget_cached_user``
+            by default.
+        :return: Number of contacts copied.
+        :raises RuntimeError: If a contact ID is taken on the target.
+        """
+        if source == target:
+            return 0
+        if on_change is None:
+            # Imported here: the auth service imports this module.
+            from src.services.auth import forget_cached_user
+
+            on_change = forget_cached_user
+        async with self.primary.session() as session:
+            pinned = await session.scalar(select(User.shard).where(User.id == user_id))
+
+        async def set_placement(**values):
+            username = await self._set_placement(user_id, **values)
+            if username is not None:
+                on_change(username)
+
+        if pinned != target:
+            await set_placement(shard_moving=True)
+            try:
+                await asyncio.sleep(grace)
+                async with self.shards[source].session() as source_session:
+                    await _lock_user(source_session, user_id)
+                    result = await source_session.execute(
+                        select(Contact.__table__).where(Contact.user_id == user_id)
+                    )
+                    rows = [dict(row) for row in result.mappings()]
+                    await self._copy(user_id, target, rows)
+                    await set_placement(shard=target, shard_moving=False)
+                    await source_session.execute(
+                        delete(Contact).where(Contact.user_id == user_id)
+                    )
+                    await source_session.commit()
+                return len(rows)
+            except BaseException:
+                await set_placement(shard_moving=False)
+                raise
+
+        async with self.shards[source].session() as source_session:
+            await source_session.execute(
+                delete(Contact).where(Contact.user_id == user_id)
+            )
+            await source_session.commit()
+        return 0
+
+    async def _copy(self, user_id: int, target: str, rows: list[dict]) -> None:
+        async with self.shards[target].session() as session:
+            await _lock_user(session, user_id)
+            await session.execute(delete(Contact).where(Contact.user_id == user_id))
+            ids = [row["id"] for row in rows]
+            for i in range(0, len(ids), _ID_CHUNK):
+                taken = await session.scalars(
+                    select(Contact.id).where(Contact.id.in_(ids[i : i + _ID_CHUNK]))
+                )
+                taken = taken.all()
+                if taken:
+                    raise RuntimeError(
+                        f"Contact IDs {taken[:10]} already exist on shard {target}"
+                    )
+            if rows:
+                await session.execute(insert(Contact.__table__), rows)
+            await session.commit()
+
+    async def rebalance(
+        self,
+        grace: float = settings.SHARD_MOVE_GRACE_SECONDS,
+        on_change: Callable[[str], None] | None = None,
+    ) -> list[tuple[int, str, str]]:
+        """Move every misplaced user to the shard it routes to.
+
+        :param on_change: See :meth:`move_user`.
+        """
+        moves = await self.misplaced_users()
+        for user_id, source, target in moves:
+            await self.move_user(user_id, source, target, grace, on_change)
+        return moves
+
+    async def delete_user_contacts(self, user_id: int) -> int:
+        """Delete the contacts of a deleted user from every shard.
+
+        :return: Number of contacts deleted.
+        """
+        deleted = 0
+        for manager in self.shards.values():
+            async with manager.session() as session:
+                result = await session.execute(
+                    delete(Contact).where(Contact.user_id == user_id)
+                )
+                await session.commit()
+                deleted += result.rowcount
+        return deleted
+
+    async def orphaned_users(self) -> list[int]:
+        """Return IDs of users that no longer exist but still own contacts."""
+        owners = set()
+        for manager in self.shards.values():
+            async with manager.session() as session:
+                result = await session.execute(select(distinct(Contact.user_id)))
+                owners.update(result.scalars())
+        async with self.primary.session() as session:
+            existing = set(await session.scalars(select(User.id)))
+        return sorted(owners - existing - {None})
+
+    async def warm_up(self, connections: int = 1) -> None:
+        """Fill the connection pools of all shards."""
+        for manager in self.shards.values():
+            await manager.warm_up(connections)
+
+    async def close(self) -> None:
+        """Dispose the engines of all shards."""
+        for manager in self.shards.values():
+            await manager.close()
+
+
+def _build_router() -> ShardRouter:
+    if not settings.SHARD_URLS:
+        return ShardRouter({"default": sessionmanager})
+    return ShardRouter(
+        {
+            name: DatabaseSessionManager(url)
+            for name, url in settings.SHARD_URLS.items()
+        },
+        settings.SHARD_MAP,
+        settings.SHARD_VNODES,
+    )
+
+
+shard_router = _build_router()
+"""Global shard router used by the contacts API."""
+
+
+async def main(argv: list[str] | None = None) -> None:
+    """Command line entry point for planning and applying rebalances."""
+    parser = argparse.ArgumentParser(description="Rebalance contacts between shards")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("plan", help="List users that would be moved")
+    commands.add_parser("apply", help="Move all misplaced users")
+    commands.add_parser("prune", help="Delete contacts of deleted users")
+    move = commands.add_parser("move", help="Move one user to a shard")
+    move.add_argument("user_id", type=int)
+    move.add_argument("shard")
+    args = parser.parse_args(argv)
+
+    if args.command == "plan":
+        moves = await shard_router.misplaced_users()
+    elif args.command == "apply":
+        moves = await shard_router.rebalance()
+    elif args.command == "prune":
+        moves = []
+        for user_id in await shard_router.orphaned_users():
+            deleted = await shard_router.delete_user_contacts(user_id)
+            print(f"user {user_id}: deleted {deleted} contacts")
+    else:
+        if args.shard not in shard_router.shards:
+            parser.error(f"unknown shard: {args.shard}")
+        pinned = await shard_router.load_pinned()
+        source = shard_router.shard_for(args.user_id, pinned.get(args.user_id))
+        for user_id, current, _ in await shard_router.misplaced_users():
+            if user_id == args.user_id:
+                source = current
+        await shard_router.move_user(args.user_id, source, args.shard)
+        moves = [(args.user_id, source, args.shard)]
+
+    for user_id, source, target in moves:
+        print(f"user {user_id}: {source} -> {target}")
+    await shard_router.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,19 +1,175 @@
 """Repository layer for working with Contact entities."""
 
+from dataclasses import dataclass
+from datetime import date, timedelta
+from itertools import starmap
 from typing import List
 
-from sqlalchemy import select
+from sqlalchemy import (
+    Select,
+    and_,
+    select,
+    insert,
+    update,
+    extract,
+    func,
+    or_,
+    lambda_stmt,
+)
+from sqlalchemy.sql.lambdas import StatementLambdaElement
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.models import Contact, User
+from src.database.models import Contact, User, normalize_email, normalize_phone
 from src.schemas import ContactCreate, ContactUpdate
+from src.services.events import EventBroker, event_broker
+from src.services.tracing import trace_methods
 
+_contacts = Contact.__table__
 
+CONTACT_COLUMNS = (
+    _contacts.c.id,
+    _contacts.c.first_name,
+    _contacts.c.last_name,
+    _contacts.c.email,
+    _contacts.c.phone,
+    _contacts.c.birthday,
+    _contacts.c.extra_info,
+)
+"""Columns returned to API clients (the fields of ``ContactGet``)."""
+
+
+DUPLICATE_KEYS = {
+    "email": _contacts.c.email_normalized,
+    "phone": _contacts.c.phone_normalized,
+}
+"""Blocking keys used to find duplicate contacts, by name."""
+
+
+def with_normalized(values: dict) -> dict:
+    """Add the normalized email and phone columns for the values being written."""
+    if "email" in values:
+        values["email_normalized"] = normalize_email(values["email"])
+    if "phone" in values:
+        values["phone_normalized"] = normalize_phone(values["phone"])
+    return values
+
+
+def _owned(user: User) -> tuple:
+    """Conditions selecting the live (not soft-deleted) contacts of a user."""
+    return Contact.user_id == user.id, Contact.deleted_at.is_(None)
+
+
+@dataclass(slots=True, frozen=True)
+class ContactRecord:
+    """Immutable contact row returned by a read-only repository.
+
+    Unlike an ORM ``Contact`` it carries no instance state and is not tracked
+    by the session identity map. orjson serializes it natively.
+    """
+
+    id: int
+    first_name: str
+    last_name: str
+    email: str
+    phone: str
+    birthday: date | None
+    extra_info: str | None
+
+
+@trace_methods
 class ContactRepository:
-    """Provide CRUD operations for contacts using an async database session."""
+    """Provide CRUD operations for contacts using an async database session.
 
-    def __init__(self, session: AsyncSession):
+    :param session: Async database session.
+    :param read_only: Serve reads with Core queries returning
+        :class:`ContactRecord` instead of ORM ``Contact`` objects. Write
+        methods are not available in this mode.
+    :param events: Broker notified of committed mutations.
+    """
+
+    writes = 0
+    """Contact writes committed by this process, used as a write generation."""
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        read_only: bool = False,
+        events: EventBroker | None = None,
+    ):
         self.db = session
+        self.read_only = read_only
+        self.events = events or event_broker
+
+    def _select(self) -> Select:
+        if self.read_only:
+            return select(*CONTACT_COLUMNS)
+        return select(Contact)
+
+    async def _fetch_all(self, stmt: Select | StatementLambdaElement) -> list:
+        result = await self.db.execute(stmt)
+        if self.read_only:
+            return list(starmap(ContactRecord, result.tuples()))
+        return result.scalars().all()
+
+    def _ensure_writable(self) -> None:
+        if self.read_only:
+            raise RuntimeError("ContactRepository is in read-only mode")
+
+    async def _commit(self) -> None:
+        await self.db.commit()
+        ContactRepository.writes += 1
+
+    async def _publish(self, user: User, kind: str, contacts, version: int) -> None:
+        """Publish a ``created``, ``updated`` or ``deleted`` event per contact."""
+        for contact in contacts:
+            data = {
+                column.key: getattr(contact, column.key) for column in CONTACT_COLUMNS
+            }
+            await self.events.publish(
+                user.id,
+                {
+                    "type": kind,
+                    "id": data["id"],
+                    "version": version,
+                    "data": data,
+                },
+            )
+
+    def _contacts_stmt(
+        self,
+        user: User,
+        skip: int,
+        limit: int,
+        first_name: str | None,
+        last_name: str | None,
+        email: str | None,
+    ) -> StatementLambdaElement:
+        """Build the contact list query as a cached lambda statement.
+
+        Each lambda is analyzed once; later calls only extract the closure
+        values as bound parameters and reuse the compiled SQL, instead of
+        rebuilding and hashing the whole ``select()`` chain.
+        """
+        user_id = user.id
+        if self.read_only:
+            stmt = lambda_stmt(lambda: select(*CONTACT_COLUMNS))
+        else:
+            stmt = lambda_stmt(lambda: select(Contact))
+        stmt += lambda s: s.where(
+            Contact.user_id == user_id, Contact.deleted_at.is_(None)
+        )
+
+        if first_name:
+            first_name = f"%{first_name}%"
+            stmt += lambda s: s.where(Contact.first_name.ilike(first_name))
+        if last_name:
+            last_name = f"%{last_name}%"
+            stmt += lambda s: s.where(Contact.last_name.ilike(last_name))
+        if email:
+            email = f"%{email}%"
+            stmt += lambda s: s.where(Contact.email.ilike(email))
+        stmt += lambda s: s.offset(skip).limit(limit)
+        return stmt
 
     async def get_contacts(
         self,
@@ -23,70 +179,345 @@ class ContactRepository:
         first_name: str | None = None,
         last_name: str | None = None,
         email: str | None = None,
-    ) -> List[Contact]:
+    ) -> List[Contact] | List[ContactRecord]:
         """Get a list of contacts for a given user with optional filters."""
-        stmt = (
-            select(Contact).where(Contact.user_id == user.id).offset(skip).limit(limit)
-        )
+        stmt = self._contacts_stmt(user, skip, limit, first_name, last_name, email)
+        return await self._fetch_all(stmt)
 
-        if first_name:
-            stmt = stmt.where(Contact.first_name.ilike(f"%{first_name}%"))
-        if last_name:
-            stmt = stmt.where(Contact.last_name.ilike(f"%{last_name}%"))
-        if email:
-            stmt = stmt.where(Contact.email.ilike(f"%{email}%"))
+    async def get_contact_by_id(
+        self, user: User, contact_id: int
+    ) -> Contact | ContactRecord | None:
+        """Get a single contact by its ID for the given user."""
+        stmt = self._select().where(*_owned(user), Contact.id == contact_id)
+        contacts = await self._fetch_all(stmt)
+        return contacts[0] if contacts else None
 
-        result = await self.db.execute(stmt)
-        return result.scalars().all()
+    async def _next_version(self, user: User) -> int:
+        """Return the version for the user's next write in this transaction.
 
-    async def get_contact_by_id(self, user: User, contact_id: int) -> Contact | None:
-        """Get a single contact by its ID for the given user."""
-        stmt = select(Contact).where(
-            Contact.user_id == user.id, Contact.id == contact_id
+        On PostgreSQL writers of the same user are serialized with a
+        transaction-level advisory lock, so versions grow in commit order.
+        """
+        if self.db.get_bind().dialect.name == "postgresql":
+            await self.db.execute(select(func.pg_advisory_xact_lock(user.id)))
+        return await self.db.scalar(
+            select(func.coalesce(func.max(Contact.version), 0) + 1).where(
+                Contact.user_id == user.id
+            )
         )
-        result = await self.db.execute(stmt)
-        return result.scalar_one_or_none()
 
     async def create_contact(self, user: User, body: ContactCreate) -> Contact:
         """Create a new contact for the given user."""
+        self._ensure_writable()
         contact_data = body.model_dump(exclude_unset=True)
 
         contact = Contact(
             **contact_data,
             user_id=user.id,
+            version=await self._next_version(user),
         )
         self.db.add(contact)
-        await self.db.commit()
+        await self._commit()
         await self.db.refresh(contact)
-        return await self.get_contact_by_id(user, contact.id)
+        contact = await self.get_contact_by_id(user, contact.id)
+        await self._publish(user, "created", [contact], contact.version)
+        return contact
 
     async def remove_contact(self, user: User, contact_id: int) -> Contact | None:
-        """Delete a contact by ID for the given user.
+        """Soft-delete a contact by ID for the given user.
+
+        The row is kept as a tombstone so that syncing clients see the delete.
 
         :return: Deleted contact or None if not found.
         """
+        self._ensure_writable()
         contact = await self.get_contact_by_id(user, contact_id)
         if contact:
-            await self.db.delete(contact)
-            await self.db.commit()
+            contact.deleted_at = func.now()
+            contact.version = await self._next_version(user)
+            await self._commit()
+            await self.db.refresh(contact)
+            await self._publish(user, "deleted", [contact], contact.version)
         return contact
 
     async def update_contact(
         self, user: User, contact_id: int, body: ContactUpdate
     ) -> Contact | None:
         """Update fields of an existing contact for the given user."""
+        self._ensure_writable()
         contact = await self.get_contact_by_id(user, contact_id)
         if contact:
-            for key, value in body.model_dump(exclude_unset=True).items():
+            values = with_normalized(body.model_dump(exclude_unset=True))
+            for key, value in values.items():
                 setattr(contact, key, value)
+            contact.version = await self._next_version(user)
 
-            await self.db.commit()
+            await self._commit()
             await self.db.refresh(contact)
+            await self._publish(user, "updated", [contact], contact.version)
 
         return contact
 
-    async def get_all_contacts(self, user: User) -> List[Contact]:
+    async def apply_batch(
+        self,
+        user: User,
+        creates: List[ContactCreate],
+        updates: List[tuple[int, ContactUpdate]],
+        deletes: List[int],
+    ) -> tuple[List[ContactRecord], dict[int, ContactRecord], dict[int, ContactRecord]]:
+        """Apply creates, updates and deletes for a user in one transaction.
+
+        Operations run in that order with set-based statements: one
+        multi-row ``INSERT``, one ``UPDATE ... WHERE id IN (...)`` per distinct
+        set of new values and one soft-deleting ``UPDATE`` for the deletes.
+        All written rows share one version.
+
+        :return: Created records in input order, and updated and deleted
+            records keyed by contact ID. IDs not owned by the user are missing.
+        """
+        self._ensure_writable()
+        created: List[ContactRecord] = []
+        updated: dict[int, ContactRecord] = {}
+        deleted: dict[int, ContactRecord] = {}
+        version = await self._next_version(user)
+
+        if creates:
+            rows = [
+                {
+                    **body.model_dump(exclude_unset=True),
+                    "user_id": user.id,
+                    "version": version,
+                }
+                for body in creates
+            ]
+            result = await self.db.execute(
+                insert(Contact).returning(
+                    *CONTACT_COLUMNS, sort_by_parameter_order=True
+                ),
+                rows,
+            )
+            created = list(starmap(ContactRecord, result.tuples()))
+
+        if updates:
+            groups: dict[tuple, List[int]] = {}
+            for contact_id, body in updates:
+                values = with_normalized(body.model_dump(exclude_unset=True))
+                values = tuple(sorted(values.items()))
+                groups.setdefault(values, []).append(contact_id)
+            for values, ids in groups.items():
+                if values:
+                    await self.db.execute(
+                        update(Contact)
+                        .where(*_owned(user), Contact.id.in_(ids))
+                        .values(**dict(values), version=version)
+                    )
+            result = await self.db.execute(
+                select(*CONTACT_COLUMNS).where(
+                    *_owned(user),
+                    Contact.id.in_([contact_id for contact_id, _ in updates]),
+                )
+            )
+            for record in starmap(ContactRecord, result.tuples()):
+                updated[record.id] = record
+
+        if deletes:
+            result = await self.db.execute(
+                update(Contact)
+                .where(*_owned(user), Contact.id.in_(deletes))
+                .values(deleted_at=func.now(), version=version)
+                .returning(*CONTACT_COLUMNS)
+            )
+            for record in starmap(ContactRecord, result.tuples()):
+                deleted[record.id] = record
+
+        await self._commit()
+        await self._publish(user, "created", created, version)
+        await self._publish(user, "updated", updated.values(), version)
+        await self._publish(user, "deleted", deleted.values(), version)
+        return created, updated, deleted
+
+    async def find_duplicates(self, user: User) -> list[tuple[str, str, int]]:
+        """Find contacts of a user that share a blocking key with another one.
+
+        Each key is matched with a ``GROUP BY ... HAVING count(*) > 1`` on its
+        indexed normalized column, so no pairwise comparison is made.
+
+        :return: ``(key name, key value, contact ID)`` rows ordered by key.
+        """
+        rows = []
+        for name, column in DUPLICATE_KEYS.items():
+            repeated = (
+                select(column)
+                .where(*_owned(user), column.is_not(None))
+                .group_by(column)
+                .having(func.count() > 1)
+            )
+            result = await self.db.execute(
+                select(column, Contact.id)
+                .where(*_owned(user), column.in_(repeated))
+                .order_by(column, Contact.id)
+            )
+            rows += [(name, value, contact_id) for value, contact_id in result]
+        return rows
+
+    async def get_contacts_by_ids(
+        self, user: User, contact_ids: List[int]
+    ) -> List[Contact] | List[ContactRecord]:
+        """Get the user's contacts with the given IDs, ordered by ID."""
+        stmt = (
+            self._select()
+            .where(*_owned(user), Contact.id.in_(contact_ids))
+            .order_by(Contact.id)
+        )
+        return await self._fetch_all(stmt)
+
+    async def merge_contacts(
+        self, user: User, primary_id: int, duplicate_ids: List[int]
+    ) -> Contact | None:
+        """Merge duplicates into a primary contact and soft-delete them.
+
+        Empty fields of the primary contact are filled from the duplicates in
+        the given order.
+
+        :return: Merged contact or None if any of the contacts is not found.
+        """
+        self._ensure_writable()
+        ids = [primary_id, *duplicate_ids]
+        found = {c.id: c for c in await self.get_contacts_by_ids(user, ids)}
+        if len(found) != len(set(ids)):
+            return None
+
+        primary = found[primary_id]
+        duplicates = [found[duplicate_id] for duplicate_id in duplicate_ids]
+        values = {}
+        for column in CONTACT_COLUMNS[1:]:
+            if getattr(primary, column.key) is None:
+                values[column.key] = next(
+                    (
+                        value
+                        for duplicate in duplicates
+                        if (value := getattr(duplicate, column.key)) is not None
+                    ),
+                    None,
+                )
+        for key, value in with_normalized(values).items():
+            setattr(primary, key, value)
+        version = await self._next_version(user)
+        primary.version = version
+        merged = [
+            ContactRecord(*(getattr(d, column.key) for column in CONTACT_COLUMNS))
+            for d in duplicates
+        ]
+
+        await self.db.execute(
+            update(Contact)
+            .where(*_owned(user), Contact.id.in_(duplicate_ids))
+            .values(deleted_at=func.now(), version=version)
+        )
+        await self._commit()
+        await self.db.refresh(primary)
+        await self._publish(user, "updated", [primary], version)
+        await self._publish(user, "deleted", merged, version)
+        return primary
+
+    async def get_changes(
+        self,
+        user: User,
+        since: int,
+        limit: int | None = None,
+        after: tuple[int, int] | None = None,
+    ) -> tuple[List[ContactRecord], List[int], int, tuple[int, int] | None]:
+        """Get the user's contacts written after the ``since`` sync token.
+
+        Rows are ordered by ``(version, id)``; several rows can share a version
+        (batch writes, bulk loads), so a page ends at a row, not at a version.
+
+        :param limit: Maximum number of changed and deleted rows to return.
+        :param after: ``(version, id)`` of the last row of the previous page.
+        :return: Changed live contacts, IDs of deleted contacts, the sync
+            token to pass on the next call and the ``(version, id)`` to pass
+            as ``after`` for the next page, or None on the last page.
+        """
+        token = await self.db.scalar(
+            select(func.max(Contact.version)).where(Contact.user_id == user.id)
+        )
+        token = max(token or 0, since)
+        stmt = (
+            select(*CONTACT_COLUMNS, Contact.deleted_at, Contact.version)
+            .where(
+                Contact.user_id == user.id,
+                Contact.version > since,
+                Contact.version <= token,
+            )
+            .order_by(Contact.version, Contact.id)
+        )
+        if after is not None:
+            version, contact_id = after
+            stmt = stmt.where(
+                or_(
+                    Contact.version > version,
+                    and_(Contact.version == version, Contact.id > contact_id),
+                )
+            )
+        if limit is not None:
+            stmt = stmt.limit(limit + 1)
+        rows = (await self.db.execute(stmt)).tuples().all()
+
+        following = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            following = (rows[-1][-1], rows[-1][0])
+        changed, deleted = [], []
+        for *values, deleted_at, _ in rows:
+            if deleted_at is None:
+                changed.append(ContactRecord(*values))
+            else:
+                deleted.append(values[0])
+        return changed, deleted, token, following
+
+    async def get_all_contacts(self, user: User) -> List[Contact] | List[ContactRecord]:
         """Get all contacts belonging to the given user."""
-        stmt = select(Contact).where(Contact.user_id == user.id)
-        result = await self.db.execute(stmt)
-        return result.scalars().all()
+        stmt = self._select().where(*_owned(user))
+        return await self._fetch_all(stmt)
+
+    async def get_upcoming_birthdays(
+        self, user_ids: List[int], start: date, days: int = 7
+    ) -> List[Contact] | List[ContactRecord]:
+        """Get contacts of several users whose birthdays fall in a date window.
+
+        The window is evaluated in SQL on the ``month * 100 + day`` key of the
+        birthday, so a whole batch of users is served by a single query.
+
+        :param user_ids: IDs of the users whose contacts are scanned.
+        :param start: First day of the window.
+        :param days: Number of days after ``start`` included in the window.
+        :return: Matching contacts ordered by owner and ID.
+        """
+        if not user_ids:
+            return []
+
+        stmt = (
+            self._select()
+            .where(
+                Contact.user_id.in_(user_ids),
+                Contact.deleted_at.is_(None),
+                Contact.birthday.is_not(None),
+            )
+            .order_by(Contact.user_id, Contact.id)
+        )
+
+        if days < 365:
+            end = start + timedelta(days=days)
+            start_key = start.month * 100 + start.day
+            end_key = end.month * 100 + end.day
+            birthday_key = extract("month", Contact.birthday) * 100 + extract(
+                "day", Contact.birthday
+            )
+            if end.year == start.year:
+                stmt = stmt.where(birthday_key.between(start_key, end_key))
+            else:
+                stmt = stmt.where(
+                    or_(birthday_key >= start_key, birthday_key <= end_key)
+                )
+
+        return await self._fetch_all(stmt)
@@ -0,0 +1,56 @@
+"""Repository layer for refresh-token sessions."""
+
+from datetime import datetime, UTC
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import UserSession
+from src.services.tracing import trace_methods
+
+
+def _utcnow() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+@trace_methods
+class SessionRepository:
+    """Store and check refresh-token sessions.
+
+    :param session: Async database session.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.db = session
+
+    async def add(self, user_id: int, jti: str, expires_at: datetime) -> None:
+        """Append a session row for a new refresh token.
+
+        Expired rows are left to ``delete_expired``, so a login is a single
+        insert.
+        """
+        await self.db.execute(
+            insert(UserSession).values(
+                user_id=user_id,
+                jti=jti,
+                expires_at=expires_at.astimezone(UTC).replace(tzinfo=None),
+            )
+        )
+        await self.db.commit()
+
+    async def is_active(self, user_id: int, jti: str) -> bool:
+        """Return True if the session exists and has not expired."""
+        stmt = select(UserSession.id).where(
+            UserSession.jti == jti,
+            UserSession.user_id == user_id,
+            UserSession.expires_at > _utcnow(),
+        )
+        return await self.db.scalar(stmt) is not None
+
+    async def delete_expired(self) -> int:
+        """Delete expired sessions and return how many were removed."""
+        result = await self.db.execute(
+            delete(UserSession).where(UserSession.expires_at <= _utcnow())
+        )
+        await self.db.commit()
+        return result.rowcount
@@ -1,12 +1,31 @@
 """Repository layer for working with User entities."""
 
-from sqlalchemy import select
+from typing import List
+
+from sqlalchemy import delete, insert, lambda_stmt, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.models import User
+from src.database.models import User, UserSession
 from src.schemas import UserCreate
+from src.services.tracing import trace_methods
+
+_UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+class UserAlreadyExists(Exception):
+    """Raised when a new user clashes with an existing email or username.
+
+    :param field: ``email`` or ``username``.
+    """
+
+    def __init__(self, field: str):
+        super().__init__(f"User with this {field} already exists")
+        self.field = field
 
 
+@trace_methods
 class UserRepository:
     """Provide CRUD operations for users using an async database session."""
 
@@ -21,8 +40,12 @@ class UserRepository:
         return user.scalar_one_or_none()
 
     async def get_user_by_username(self, username: str) -> User | None:
-        """Get a user by username."""
-        stmt = select(User).filter_by(username=username)
+        """Get a user by username.
+
+        Runs on every cache miss of the current user, so the statement is a
+        cached lambda statement.
+        """
+        stmt = lambda_stmt(lambda: select(User).where(User.username == username))
         user = await self.db.execute(stmt)
         return user.scalar_one_or_none()
 
@@ -32,18 +55,63 @@ class UserRepository:
         user = await self.db.execute(stmt)
         return user.scalar_one_or_none()
 
+    async def get_users_batch(self, after_id: int = 0, limit: int = 500) -> List[User]:
+        """Get the next batch of confirmed users ordered by ID.
+
+        Uses keyset pagination (``id > after_id``) so that the cost of a batch
+        does not grow with the number of users already processed.
+        """
+        stmt = (
+            select(User)
+            .where(User.id > after_id, User.confirmed.is_(True))
+            .order_by(User.id)
+            .limit(limit)
+        )
+        result = await self.db.execute(stmt)
+        return result.scalars().all()
+
     async def create_user(self, body: UserCreate, avatar: str = None) -> User:
-        """Create a new user with optional avatar URL."""
-        user = User(
+        """Create a new user with optional avatar URL.
+
+        Uniqueness of email and username is enforced by the database in the
+        same statement (``INSERT ... ON CONFLICT DO NOTHING RETURNING``), so
+        there is no window between a check and the insert.
+
+        :raises UserAlreadyExists: if the email or username is taken.
+        """
+        values = {
             **body.model_dump(exclude_unset=True, exclude={"password"}),
-            hashed_password=body.password,
-            avatar=avatar
-        )
-        self.db.add(user)
+            "hashed_password": body.password,
+            "avatar": avatar,
+        }
+        upsert_insert = _UPSERT_INSERTS.get(self.db.get_bind().dialect.name)
+        try:
+            if upsert_insert is not None:
+                stmt = upsert_insert(User).values(values).on_conflict_do_nothing()
+            else:
+                stmt = insert(User).values(values)
+            user = await self.db.scalar(stmt.returning(User))
+        except IntegrityError:
+            user = None
+
+        if user is None:
+            await self.db.rollback()
+            raise UserAlreadyExists(
+                await self.conflicting_field(body.email, body.username) or "username"
+            )
         await self.db.commit()
-        await self.db.refresh(user)
         return user
 
+    async def conflicting_field(self, email: str, username: str) -> str | None:
+        """Return ``email`` or ``username`` if a user already has it, else None."""
+        stmt = select(User.email).where(
+            or_(User.email == email, User.username == username)
+        )
+        emails = (await self.db.scalars(stmt)).all()
+        if not emails:
+            return None
+        return "email" if email in emails else "username"
+
     async def update_avatar_url(self, email: str, url: str) -> User:
         """Update avatar URL for a user by email."""
         user = await self.get_user_by_email(email)
@@ -52,6 +120,29 @@ class UserRepository:
         await self.db.refresh(user)
         return user
 
+    async def set_avatar(self, user_id: int, url: str) -> None:
+        """Set the avatar URL of a user by ID without loading the user."""
+        await self.db.execute(update(User).where(User.id == user_id).values(avatar=url))
+        await self.db.commit()
+
+    async def replace_password_hash(
+        self, user_id: int, old_hash: str, new_hash: str
+    ) -> bool:
+        """Swap a password hash for an upgraded hash of the same password.
+
+        Sessions are kept. Nothing is changed if the hash was replaced in the
+        meantime, e.g. by a password reset.
+
+        :return: True if the hash was replaced.
+        """
+        result = await self.db.execute(
+            update(User)
+            .where(User.id == user_id, User.hashed_password == old_hash)
+            .values(hashed_password=new_hash)
+        )
+        await self.db.commit()
+        return result.rowcount == 1
+
     async def confirmed_email(self, email: str) -> None:
         """Mark user email as confirmed."""
         user = await self.get_user_by_email(email)
@@ -59,7 +150,7 @@ class UserRepository:
         await self.db.commit()
 
     async def update_password(self, email: str, hashed_password: str) -> User | None:
-        """Update user password and clear refresh token."""
+        """Update user password and revoke all refresh-token sessions."""
         user = await self.get_user_by_email(email)
         if not user:
             return None
@@ -67,6 +158,7 @@ class UserRepository:
         user.hashed_password = hashed_password
 
         user.refresh_token = None
+        await self.db.execute(delete(UserSession).where(UserSession.user_id == user.id))
 
         await self.db.commit()
         await self.db.refresh(user)
@@ -1,6 +1,6 @@
 from datetime import date
-from pydantic import BaseModel, EmailStr, Field, ConfigDict
-from typing import List
+from pydantic import BaseModel, EmailStr, Field, ConfigDict, model_validator
+from typing import Annotated, List, Literal, Union
 
 
 class ContactBase(BaseModel):
@@ -62,6 +62,92 @@ class ContactsGet(BaseModel):
     data: List[ContactGet]
 
 
+class ContactChangesGet(BaseModel):
+    """Schema for returning contact changes since a sync token."""
+
+    data: List[ContactGet]
+    deleted: List[int]
+    sync_token: int
+    next_cursor: str | None = None
+
+
+class ContactDuplicateGroup(BaseModel):
+    """Cluster of contacts that look like duplicates of each other."""
+
+    keys: List[str]
+    contacts: List[ContactGet]
+
+
+class ContactDuplicatesGet(BaseModel):
+    """Schema for returning duplicate contact clusters."""
+
+    data: List[ContactDuplicateGroup]
+
+
+class ContactMerge(BaseModel):
+    """Schema for merging duplicate contacts into a primary one."""
+
+    primary_id: int
+    duplicate_ids: List[int] = Field(min_length=1)
+
+    @model_validator(mode="after")
+    def check_primary_not_duplicate(self):
+        if self.primary_id in self.duplicate_ids:
+            raise ValueError("primary_id must not be listed in duplicate_ids")
+        return self
+
+
+class ContactBatchCreate(BaseModel):
+    """Batch operation that creates a contact."""
+
+    op: Literal["create"]
+    data: ContactCreate
+
+
+class ContactBatchUpdate(BaseModel):
+    """Batch operation that partially updates a contact."""
+
+    op: Literal["update"]
+    id: int
+    data: ContactUpdate
+
+
+class ContactBatchDelete(BaseModel):
+    """Batch operation that deletes a contact."""
+
+    op: Literal["delete"]
+    id: int
+
+
+ContactBatchOperation = Annotated[
+    Union[ContactBatchCreate, ContactBatchUpdate, ContactBatchDelete],
+    Field(discriminator="op"),
+]
+
+
+class ContactBatchRequest(BaseModel):
+    """Payload with a list of create, update and delete operations."""
+
+    operations: List[ContactBatchOperation] = Field(min_length=1)
+
+
+class ContactBatchResult(BaseModel):
+    """Outcome of a single batch operation."""
+
+    index: int
+    op: str
+    status: int
+    id: int | None = None
+    data: ContactGet | None = None
+    detail: str | None = None
+
+
+class ContactBatchResponse(BaseModel):
+    """Schema for returning per-operation results of a batch."""
+
+    results: List[ContactBatchResult]
+
+
 class User(BaseModel):
     """Schema for returning user data."""
 
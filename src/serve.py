@@ -0,0 +1,193 @@
+"""Production server entry point.
+
+Runs the application under uvicorn with uvloop and httptools, one worker per
+available CPU, and keep-alive, backlog and graceful-shutdown timeouts taken
+from the settings. State that lives in a worker's memory (in-process contact
+events, request profiles) is not shared, so with it the default is a single
+worker (see :func:`worker_count`).
+
+Migrations are not run here; run them once per deployment with the
+``migrate`` command (a one-off job or a compose service), not in every
+container.
+
+Usage::
+
+    python -m src.serve                 # start the server
+    python -m src.serve --workers 4 --port 8080
+    python -m src.serve migrate         # upgrade the database and shards, once
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import logging
+import math
+import os
+from pathlib import Path
+
+from src.conf.config import settings
+
+logger = logging.getLogger(__name__)
+
+ROOT = Path(__file__).resolve().parent.parent
+
+MIGRATION_LOCK_ID = 0x6E6F7465
+"""PostgreSQL advisory lock key held while migrations run."""
+
+
+def cpu_count() -> int:
+    """Return the number of CPUs this process may use.
+
+    Honors the CPU affinity mask and a cgroup v2 CPU quota, so a container
+    limited to two CPUs on a 32-core host gets two workers.
+    """
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:
+        count = os.cpu_count() or 1
+    try:
+        quota, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()
+        if quota != "max":
+            count = min(count, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return max(count, 1)
+
+
+def per_process_state() -> list[str]:
+    """Describe the enabled features that keep their state in one worker."""
+    state = []
+    if settings.CONTACT_EVENTS_BACKEND != "redis":
+        state.append(
+            "contact events (CONTACT_EVENTS_BACKEND=memory) only reach streams "
+            "on the worker that made the change"
+        )
+    if settings.PROFILER_TOKEN:
+        state.append(
+            "request profiles (PROFILER_TOKEN) are only stored on the worker "
+            "that served the request"
+        )
+    return state
+
+
+def worker_count(requested: int) -> int:
+    """Return the number of workers to start for ``--workers``.
+
+    ``0`` means one worker per CPU, or a single worker while
+    :func:`per_process_state` is not empty.
+
+    :raises SystemExit: if several workers are requested while contact
+        events are delivered in process.
+    """
+    state = per_process_state()
+    if not requested:
+        if not state:
+            return cpu_count()
+        logger.warning("Starting 1 worker: %s", "; ".join(state))
+        return 1
+    if requested > 1 and state:
+        if settings.CONTACT_EVENTS_BACKEND != "redis":
+            raise SystemExit(
+                f"Refusing to start {requested} workers: {state[0]}. "
+                "Set CONTACT_EVENTS_BACKEND=redis or use one worker."
+            )
+        logger.warning("Starting %d workers, but %s", requested, "; ".join(state))
+    return requested
+
+
+def server_options(args: argparse.Namespace) -> dict:
+    """Build the ``uvicorn.run`` keyword arguments for the parsed options."""
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "auto"
+    http = "httptools" if importlib.util.find_spec("httptools") else "auto"
+    return {
+        "host": args.host,
+        "port": args.port,
+        "workers": worker_count(args.workers),
+        "loop": loop,
+        "http": http,
+        "backlog": args.backlog,
+        "timeout_keep_alive": args.keep_alive,
+        "timeout_graceful_shutdown": args.graceful_timeout,
+        "proxy_headers": True,
+        "forwarded_allow_ips": settings.SERVER_FORWARDED_ALLOW_IPS,
+        "access_log": args.access_log,
+    }
+
+
+async def migrate(revision: str = "head") -> None:
+    """Upgrade the database and every contact shard to ``revision``.
+
+    On PostgreSQL an advisory lock makes concurrent callers wait for the
+    first one instead of racing it, so it is safe to start several at once.
+    """
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from src.database.shards import migrate_shards
+
+    def upgrade() -> None:
+        command.upgrade(Config(str(ROOT / "alembic.ini")), revision)
+        migrate_shards(revision=revision)
+
+    engine = create_async_engine(settings.DB_URL)
+    try:
+        if engine.dialect.name != "postgresql":
+            await asyncio.to_thread(upgrade)
+            return
+        async with engine.connect() as conn:
+            await conn.execute(text(f"SELECT pg_advisory_lock({MIGRATION_LOCK_ID})"))
+            try:
+                await asyncio.to_thread(upgrade)
+            finally:
+                await conn.execute(
+                    text(f"SELECT pg_advisory_unlock({MIGRATION_LOCK_ID})")
+                )
+    finally:
+        await engine.dispose()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", nargs="?", choices=["run", "migrate"], default="run")
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.SERVER_WORKERS,
+        help="0 means one worker per available CPU (1 with per-process state)",
+    )
+    parser.add_argument("--backlog", type=int, default=settings.SERVER_BACKLOG)
+    parser.add_argument(
+        "--keep-alive", type=int, default=settings.SERVER_KEEP_ALIVE_SECONDS
+    )
+    parser.add_argument(
+        "--graceful-timeout",
+        type=int,
+        default=settings.SERVER_GRACEFUL_SHUTDOWN_SECONDS,
+    )
+    parser.add_argument(
+        "--access-log",
+        action="store_true",
+        help="Also write uvicorn's plain-text access log",
+    )
+    parser.add_argument("--migrate", action="store_true", help="Migrate first")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    if args.command == "migrate" or args.migrate:
+        asyncio.run(migrate())
+        if args.command == "migrate":
+            return
+
+    import uvicorn
+
+    uvicorn.run("main:app", **server_options(args))
+
+
+if __name__ == "__main__":
+    main()
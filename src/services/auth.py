@@ -4,11 +4,12 @@ Contains helpers for password hashing, JWT token creation and retrieving
 current user from access token.
 """
 
+import functools
+import uuid
 from datetime import datetime, timedelta, UTC
 from typing import Optional, Literal
 
 from fastapi import Depends, HTTPException, status
-from passlib.context import CryptContext
 from fastapi.security import (
     OAuth2PasswordBearer,
     HTTPBearer,
@@ -17,24 +18,78 @@ from fastapi.security import (
 from sqlalchemy.orm import Session
 from jose import JWTError, jwt
 
-from src.database.db import get_db
+from src.database.db import get_db, get_read_db
 from src.conf.config import settings
 from src.services.users import UserService
 from src.database.models import User
 
+from src.services.cache import CoalescingCache
 from src.services.redis import redis_client, CachedObject
+from src.services.tracing import span, traced
+
+
+def password_context_options(
+    schemes: list[str] | None = None,
+    bcrypt_rounds: int | None = None,
+    argon2_time_cost: int | None = None,
+    argon2_memory_cost: int | None = None,
+    argon2_parallelism: int | None = None,
+) -> dict:
+    """Build ``CryptContext`` options from the ``PASSWORD_*`` settings.
+
+    The first scheme hashes new passwords; the others are only verified and
+    marked as needing an update. Costs are pinned, so hashes made with other
+    rounds or memory cost, lower or higher, are upgraded as well. Arguments
+    override the corresponding settings.
+    """
+    rounds = bcrypt_rounds or settings.PASSWORD_BCRYPT_ROUNDS
+    time_cost = argon2_time_cost or settings.PASSWORD_ARGON2_TIME_COST
+    return {
+        "schemes": schemes or settings.PASSWORD_SCHEMES,
+        "deprecated": "auto",
+        "bcrypt__default_rounds": rounds,
+        "bcrypt__min_rounds": rounds,
+        "bcrypt__max_rounds": rounds,
+        "argon2__default_rounds": time_cost,
+        "argon2__min_rounds": time_cost,
+        "argon2__max_rounds": time_cost,
+        "argon2__memory_cost": argon2_memory_cost
+        or settings.PASSWORD_ARGON2_MEMORY_COST,
+        "argon2__parallelism": argon2_parallelism
+        or settings.PASSWORD_ARGON2_PARALLELISM,
+    }
+
 
-import json
+@functools.cache
+def get_pwd_context():
+    """Return the shared passlib context, created on first use.
+
+    ``argon2`` in ``PASSWORD_SCHEMES`` requires the ``argon2-cffi`` package.
+    """
+    from passlib.context import CryptContext
+
+    return CryptContext(**password_context_options())
+
+
+def prime_password_hashing() -> None:
+    """Load the hashing backend so the first login does not pay for it."""
+    get_pwd_context().handler().get_backend()
 
 
 class Hash:
-    """Utility class for hashing and verifying passwords using bcrypt."""
+    """Utility class for hashing and verifying passwords."""
 
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    @property
+    def pwd_context(self):
+        return get_pwd_context()
 
     def verify_password(self, plain_password, hashed_password):
         return self.pwd_context.verify(plain_password, hashed_password)
 
+    def needs_update(self, hashed_password) -> bool:
+        """Return True if the hash's scheme or cost is outdated."""
+        return self.pwd_context.needs_update(hashed_password)
+
     def get_password_hash(self, password: str):
         return self.pwd_context.hash(password)
 
@@ -42,6 +97,18 @@ class Hash:
 # oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 oauth2_scheme = HTTPBearer()
 
+user_cache = CoalescingCache(settings.JWT_EXPIRATION_SECONDS)
+"""Cache of the users looked up by :func:`get_current_user`."""
+
+
+def _user_cache_key(username: str) -> str:
+    return f"user:{username}"
+
+
+def forget_cached_user(username: str) -> None:
+    """Drop a user from the cache, so the next request reloads the row."""
+    redis_client.delete(_user_cache_key(username))
+
 
 def create_token(
     data: dict, expires_delta: timedelta, token_type: Literal["access", "refresh"]
@@ -80,14 +147,30 @@ async def create_refresh_token(data: dict, expires_delta: Optional[float] = None
     return refresh_token
 
 
+async def create_session_refresh_token(username: str) -> tuple[str, str, datetime]:
+    """Create a refresh token bound to a new session.
+
+    :return: The token, its session id (``jti``) and its expiry time.
+    """
+    jti = uuid.uuid4().hex
+    expires_delta = timedelta(seconds=settings.JWT_REFRESH_EXPIRATION_SECONDS)
+    refresh_token = create_token(
+        {"sub": username, "jti": jti}, expires_delta, "refresh"
+    )
+    return refresh_token, jti, datetime.now(UTC) + expires_delta
+
+
+@traced("auth.get_current_user")
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """Retrieve the current user from the Authorization header.
 
     The user is first loaded from Redis cache if available, otherwise from
-    the database. Raises HTTP 401 if the token is invalid.
+    the database; concurrent misses share one query (see
+    :class:`~src.services.cache.CoalescingCache`). Raises HTTP 401 if the
+    token is invalid.
     """
     token = credentials.credentials
     credentials_exception = HTTPException(
@@ -98,9 +181,10 @@ async def get_current_user(
 
     try:
         # Decode JWT
-        payload = jwt.decode(
-            token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM]
-        )
+        with span("auth.decode_jwt"):
+            payload = jwt.decode(
+                token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM]
+            )
         username: str = payload.get("sub")
         token_type: str = payload.get("token_type")
         if username is None or token_type != "access":
@@ -108,37 +192,30 @@ async def get_current_user(
     except JWTError as e:
         raise credentials_exception
 
-    # try redis
-    cache_key = f"user:{username}"
-    cached_user = redis_client.get(cache_key)
-
-    if cached_user is not None:
-
-        user_data = json.loads(cached_user)
-        return CachedObject(**user_data)
-
-    # not in redis
-
-    user_service = UserService(db)
-    user = await user_service.get_user_by_username(username)
-    if user is None:
+    async def load_user():
+        loaded = await UserService(db).get_user_by_username(username)
+        if loaded is None:
+            return None
+        return {
+            "id": loaded.id,
+            "username": loaded.username,
+            "email": loaded.email,
+            "avatar": loaded.avatar,
+            "confirmed": loaded.confirmed,
+            "role": loaded.role,
+            "refresh_token": loaded.refresh_token,
+            "shard": loaded.shard,
+            "shard_moving": loaded.shard_moving,
+        }
+
+    user_data = await user_cache.get_or_load(
+        redis_client, _user_cache_key(username), load_user
+    )
+    if user_data is None:
         raise credentials_exception
-
-    user_dict = {
-        "id": user.id,
-        "username": user.username,
-        "email": user.email,
-        "avatar": user.avatar,
-        "confirmed": user.confirmed,
-        "role": user.role,
-        "refresh_token": user.refresh_token,
-    }
-
-    redis_client.set(cache_key, json.dumps(user_dict))
-
-    redis_client.expire(cache_key, settings.JWT_EXPIRATION_SECONDS)
-
-    return user
+    # Not the ORM row: the session is shared with the route, and its commits
+    # would expire the row's attributes.
+    return CachedObject(**user_data)
 
 
 def create_email_token(data: dict):
@@ -188,8 +265,12 @@ async def verify_refresh_token(refresh_token: str, db: Session = Depends(get_db)
         if not user:
             return None
 
-        if user.refresh_token != refresh_token:
-
+        jti = payload.get("jti")
+        if jti is not None:
+            if not await user_service.has_session(user.id, jti):
+                return None
+        elif user.refresh_token != refresh_token:
+            # Tokens issued before sessions were introduced.
             return None
         return user
     except JWTError:
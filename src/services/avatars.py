@@ -0,0 +1,123 @@
+"""Avatar lookup for new users.
+
+Registration no longer waits for Gravatar: the avatar is resolved in a
+background task after the user row is committed. Lookups are cached in
+Redis, including negative results, so an address without a Gravatar is
+asked about once per ``AVATAR_NEGATIVE_TTL_SECONDS``.
+"""
+
+import hashlib
+import logging
+
+import httpx
+
+from src.conf.config import settings
+
+logger = logging.getLogger(__name__)
+
+GRAVATAR_URL = "https://www.gravatar.com/avatar/"
+
+_MISSING = "-"
+"""Cached value marking an address without a Gravatar."""
+
+
+def email_hash(email: str) -> str:
+    """Return the Gravatar hash of an email address."""
+    return hashlib.md5(email.strip().lower().encode()).hexdigest()
+
+
+def fallback_avatar(email: str) -> str:
+    """Return a deterministic generated avatar URL, computed without network."""
+    return f"{GRAVATAR_URL}{email_hash(email)}?d=identicon"
+
+
+class OfflineAvatarResolver:
+    """Resolver that never touches the network; used in tests and offline."""
+
+    async def resolve(self, email: str) -> str:
+        """Return the generated fallback avatar."""
+        return fallback_avatar(email)
+
+
+class GravatarResolver:
+    """Resolve Gravatar images asynchronously with a Redis-backed cache.
+
+    :param cache: Redis client used for positive and negative results.
+    :param timeout: Timeout in seconds of the Gravatar request.
+    :param ttl: How long a found avatar is cached.
+    :param negative_ttl: How long a missing avatar is cached.
+    """
+
+    def __init__(
+        self,
+        cache,
+        timeout: float = settings.AVATAR_LOOKUP_TIMEOUT_SECONDS,
+        ttl: int = settings.AVATAR_CACHE_TTL_SECONDS,
+        negative_ttl: int = settings.AVATAR_NEGATIVE_TTL_SECONDS,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.cache = cache
+        self.timeout = timeout
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.transport = transport
+
+    def _cache_get(self, key: str) -> str | None:
+        try:
+            return self.cache.get(key)
+        except Exception:
+            logger.warning("Avatar cache is unavailable", exc_info=True)
+            return None
+
+    def _cache_set(self, key: str, value: str, ttl: int) -> None:
+        try:
+            self.cache.set(key, value, ex=ttl)
+        except Exception:
+            logger.warning("Avatar cache is unavailable", exc_info=True)
+
+    async def _lookup(self, digest: str) -> bool | None:
+        """Ask Gravatar whether an image exists; None if it could not tell."""
+        try:
+            async with httpx.AsyncClient(
+                timeout=self.timeout, transport=self.transport
+            ) as client:
+                response = await client.head(f"{GRAVATAR_URL}{digest}?d=404")
+        except httpx.HTTPError:
+            logger.warning("Gravatar lookup failed", exc_info=True)
+            return None
+        if response.status_code == 404:
+            return False
+        return response.is_success or None
+
+    async def resolve(self, email: str) -> str:
+        """Return the user's Gravatar URL or the generated fallback."""
+        digest = email_hash(email)
+        key = f"avatar:{digest}"
+        cached = self._cache_get(key)
+        if cached == _MISSING:
+            return fallback_avatar(email)
+        if cached is not None:
+            return cached
+
+        found = await self._lookup(digest)
+        if found is None:
+            return fallback_avatar(email)
+        if not found:
+            self._cache_set(key, _MISSING, self.negative_ttl)
+            return fallback_avatar(email)
+
+        url = f"{GRAVATAR_URL}{digest}"
+        self._cache_set(key, url, self.ttl)
+        return url
+
+
+def _create_resolver():
+    if settings.AVATAR_PROVIDER == "offline":
+        return OfflineAvatarResolver()
+    from src.services.redis import redis_client
+
+    return GravatarResolver(redis_client)
+
+
+avatar_resolver = _create_resolver()
+"""Global resolver selected by ``AVATAR_PROVIDER``."""
@@ -0,0 +1,145 @@
+"""Read-through cache with stampede protection.
+
+When a popular key expires, every request that misses would load it from
+the database and write it back at the same time. :class:`CoalescingCache`
+prevents that on three levels:
+
+* Within a worker, concurrent misses of a key share one load
+  (:class:`~src.services.singleflight.SingleFlight`).
+* Across workers, the loader takes a short Redis lock (``SET NX PX`` with
+  a random token, released only while it still holds that token); the
+  others wait briefly for the value to appear instead of loading it.
+* Entries are refreshed a little before they expire, with a probability
+  growing as expiry approaches and with the cost of the load (the XFetch
+  algorithm), and TTLs are jittered so keys written together do not expire
+  together.
+
+Entries are stored as JSON ``{"value", "delta", "expires"}``, where
+``delta`` is how long the load took.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import random
+import time
+import uuid
+from typing import Any, Awaitable, Callable
+
+import redis
+
+from src.conf.config import settings
+from src.services.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+def jittered_ttl(ttl: float, jitter: float = settings.CACHE_TTL_JITTER) -> int:
+    """Return ``ttl`` shortened by a random share of up to ``jitter``."""
+    return max(1, int(ttl * (1 - random.random() * jitter)))
+
+
+def should_refresh_early(
+    delta: float, expires: float, beta: float = settings.CACHE_EARLY_REFRESH_BETA
+) -> bool:
+    """Decide whether to refresh an entry before it expires (XFetch).
+
+    :param delta: Seconds the last load took.
+    :param expires: Unix time at which the entry expires.
+    :param beta: Values above 1 favor earlier refreshes.
+    """
+    return time.time() - delta * beta * math.log(1.0 - random.random()) >= expires
+
+
+class CoalescingCache:
+    """Cache values loaded from the database with stampede protection.
+
+    :param ttl: Lifetime of an entry before jitter.
+    :param lock_ms: Lifetime of the cross-worker load lock.
+    :param lock_wait: Seconds to wait for another worker's load before
+        loading anyway.
+    """
+
+    POLL_SECONDS = 0.02
+
+    def __init__(
+        self,
+        ttl: float,
+        lock_ms: int = settings.CACHE_LOCK_MS,
+        lock_wait: float = settings.CACHE_LOCK_WAIT_SECONDS,
+    ):
+        self.ttl = ttl
+        self.lock_ms = lock_ms
+        self.lock_wait = lock_wait
+        self.flight = SingleFlight()
+
+    @staticmethod
+    def _read(client, key: str) -> dict | None:
+        try:
+            raw = client.get(key)
+        except redis.RedisError:
+            logger.warning("Cache read failed", exc_info=True)
+            return None
+        if raw is None:
+            return None
+        entry = json.loads(raw)
+        if "expires" not in entry:
+            # Written before entries had metadata.
+            return {"value": entry, "delta": 0.0, "expires": math.inf}
+        return entry
+
+    async def get_or_load(
+        self, client, key: str, loader: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Return the cached value of ``key``, loading it on a miss.
+
+        :param client: Redis-compatible client.
+        :param loader: Coroutine function returning a JSON-serializable
+            value, or None for a value that must not be cached.
+        """
+        entry = self._read(client, key)
+        if entry is not None and not should_refresh_early(
+            entry["delta"], entry["expires"]
+        ):
+            return entry["value"]
+        stale = entry["value"] if entry is not None else None
+        return await self.flight.do(key, lambda: self._load(client, key, loader, stale))
+
+    async def _load(self, client, key: str, loader, stale) -> Any:
+        lock_key = f"lock:{key}"
+        token = uuid.uuid4().hex
+        try:
+            locked = client.set(lock_key, token, nx=True, px=self.lock_ms)
+        except redis.RedisError:
+            locked = True
+        if not locked:
+            if stale is not None:
+                return stale
+            deadline = time.monotonic() + self.lock_wait
+            while time.monotonic() < deadline:
+                await asyncio.sleep(self.POLL_SECONDS)
+                entry = self._read(client, key)
+                if entry is not None:
+                    return entry["value"]
+            return await loader()
+
+        try:
+            started = time.perf_counter()
+            value = await loader()
+            if value is not None:
+                ttl = jittered_ttl(self.ttl)
+                entry = {
+                    "value": value,
+                    "delta": time.perf_counter() - started,
+                    "expires": time.time() + ttl,
+                }
+                client.set(key, json.dumps(entry), ex=ttl)
+            return value
+        finally:
+            # A load slower than lock_ms may find the lock taken by another
+            # worker; that lock is not ours to release.
+            try:
+                client.delete_if_equal(lock_key, token)
+            except redis.RedisError:
+                pass
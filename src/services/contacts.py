@@ -3,17 +3,48 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.repository.contacts import ContactRepository
-from src.schemas import ContactCreate, ContactUpdate
+from src.services.singleflight import SingleFlight
+from src.services.tracing import trace_methods
+from src.schemas import (
+    ContactBatchCreate,
+    ContactBatchOperation,
+    ContactBatchResult,
+    ContactBatchUpdate,
+    ContactCreate,
+    ContactUpdate,
+)
 
 from datetime import date
 from src.database.models import User
 
+_reads = SingleFlight()
+"""In-flight read-only queries of this worker, shared by identical reads."""
 
-class ContactService:
-    """High-level service for working with contacts via ContactRepository."""
 
-    def __init__(self, db: AsyncSession):
-        self.contact_repository = ContactRepository(db)
+@trace_methods
+class ContactService:
+    """High-level service for working with contacts via ContactRepository.
+
+    :param db: Async database session.
+    :param read_only: Use the repository's read-only mode, which returns
+        lightweight records instead of ORM objects. Identical concurrent
+        reads (same user and parameters) then run one query and share its
+        result, so callers must not modify the returned lists. Reads only
+        join a query on the same database (primary or replica) that started
+        after this worker's last contact write, and never while the caller
+        is inside its read-your-writes window.
+    """
+
+    def __init__(self, db: AsyncSession, read_only: bool = False):
+        self.read_only = read_only
+        self.contact_repository = ContactRepository(db, read_only=read_only)
+
+    async def _read(self, key: tuple, fn):
+        db = self.contact_repository.db
+        # ORM objects belong to one session and cannot be shared.
+        if not self.read_only or db.info.get("read_your_writes"):
+            return await fn()
+        return await _reads.do((db.get_bind(), ContactRepository.writes, *key), fn)
 
     async def create_contact(self, user: User, body: ContactCreate):
         """Create a new contact for a user."""
@@ -29,18 +60,24 @@ class ContactService:
         email: str | None = None,
     ):
         """Get contacts with filters and pagination."""
-        return await self.contact_repository.get_contacts(
-            user=user,
-            skip=skip,
-            limit=limit,
-            first_name=first_name,
-            last_name=last_name,
-            email=email,
+        return await self._read(
+            ("contacts", user.id, skip, limit, first_name, last_name, email),
+            lambda: self.contact_repository.get_contacts(
+                user=user,
+                skip=skip,
+                limit=limit,
+                first_name=first_name,
+                last_name=last_name,
+                email=email,
+            ),
         )
 
     async def get_contact(self, user: User, contact_id: int):
         """Get single contact by ID."""
-        return await self.contact_repository.get_contact_by_id(user, contact_id)
+        return await self._read(
+            ("contact", user.id, contact_id),
+            lambda: self.contact_repository.get_contact_by_id(user, contact_id),
+        )
 
     async def update_contact(self, user: User, contact_id: int, body: ContactUpdate):
         """Update contact by ID."""
@@ -50,32 +87,91 @@ class ContactService:
         """Delete contact by ID."""
         return await self.contact_repository.remove_contact(user, contact_id)
 
-    async def get_upcoming_birthdays(self, user: User, days: int = 7):
-        """Return contacts with birthdays in the next N days."""
+    async def apply_batch(
+        self, user: User, operations: list[ContactBatchOperation]
+    ) -> list[ContactBatchResult]:
+        """Apply a batch of operations in one transaction.
+
+        Several updates of the same contact are merged in request order.
+
+        :return: One result per operation, in request order.
+        """
+        creates, updates, deletes = [], {}, []
+        for operation in operations:
+            if isinstance(operation, ContactBatchCreate):
+                creates.append(operation.data)
+            elif isinstance(operation, ContactBatchUpdate):
+                updates.setdefault(operation.id, {}).update(
+                    operation.data.model_dump(exclude_unset=True)
+                )
+            else:
+                deletes.append(operation.id)
+
+        created, updated, deleted = await self.contact_repository.apply_batch(
+            user,
+            creates,
+            [(id_, ContactUpdate(**values)) for id_, values in updates.items()],
+            deletes,
+        )
 
-        today = date.today()
-        contacts = await self.contact_repository.get_all_contacts(user)
-
-        upcoming = []
-        for contact in contacts:
-            if contact.birthday is None:
-                continue
-
-            bday_this_year = date(
-                year=today.year,
-                month=contact.birthday.month,
-                day=contact.birthday.day,
-            )
-
-            if bday_this_year < today:
-                bday_this_year = date(
-                    year=today.year + 1,
-                    month=contact.birthday.month,
-                    day=contact.birthday.day,
+        results = []
+        created_records = iter(created)
+        for index, operation in enumerate(operations):
+            if isinstance(operation, ContactBatchCreate):
+                record, status = next(created_records), 201
+            else:
+                found = updated if operation.op == "update" else deleted
+                record, status = found.get(operation.id), 200
+            if record is None:
+                results.append(
+                    ContactBatchResult(
+                        index=index,
+                        op=operation.op,
+                        status=404,
+                        id=operation.id,
+                        detail="Contact not found",
+                    )
                 )
+            else:
+                results.append(
+                    ContactBatchResult(
+                        index=index,
+                        op=operation.op,
+                        status=status,
+                        id=record.id,
+                        data=record,
+                    )
+                )
+        return results
 
-            delta = (bday_this_year - today).days
-            if 0 <= delta <= days:
-                upcoming.append(contact)
+    async def get_changes(
+        self,
+        user: User,
+        since: int = 0,
+        limit: int | None = None,
+        cursor: str | None = None,
+    ) -> dict:
+        """Get one page of contacts changed and deleted after a sync token.
+
+        :param cursor: ``next_cursor`` of the previous page.
+        """
+        after = tuple(map(int, cursor.split(":"))) if cursor else None
+        changed, deleted, token, following = await self.contact_repository.get_changes(
+            user, since, limit, after
+        )
+        return {
+            "data": changed,
+            "deleted": deleted,
+            "sync_token": token,
+            "next_cursor": "%d:%d" % following if following else None,
+        }
 
-        return upcoming
+    async def get_upcoming_birthdays(self, user: User, days: int = 7):
+        """Return contacts with birthdays in the next N days."""
+        today = date.today()
+        return await self._read(
+            ("birthdays", user.id, today, days),
+            lambda: self.contact_repository.get_upcoming_birthdays(
+                [user.id], today, days
+            ),
+        )
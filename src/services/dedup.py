@@ -0,0 +1,65 @@
+"""Service that finds and merges duplicate contacts.
+
+Contacts are matched on blocking keys (the normalized email and phone
+columns). Each key yields groups of contacts sharing a value; groups that
+share a contact are joined into one cluster with a union-find, so the cost
+grows with the number of candidates rather than with the square of the
+contact count.
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import User
+from src.repository.contacts import ContactRepository
+
+
+class DedupService:
+    """Detect duplicate contacts of a user and merge them.
+
+    :param db: Async database session.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.contact_repository = ContactRepository(db)
+
+    async def find_duplicates(self, user: User) -> list[dict]:
+        """Return clusters of duplicate contacts with the keys they matched on."""
+        rows = await self.contact_repository.find_duplicates(user)
+        parent: dict[int, int] = {}
+
+        def find(contact_id: int) -> int:
+            while parent.setdefault(contact_id, contact_id) != contact_id:
+                parent[contact_id] = parent[parent[contact_id]]
+                contact_id = parent[contact_id]
+            return contact_id
+
+        first_by_key: dict[tuple[str, str], int] = {}
+        for name, value, contact_id in rows:
+            first = first_by_key.setdefault((name, value), contact_id)
+            parent[find(contact_id)] = find(first)
+
+        clusters: dict[int, dict] = {}
+        for name, _, contact_id in rows:
+            cluster = clusters.setdefault(find(contact_id), {"keys": [], "ids": set()})
+            if name not in cluster["keys"]:
+                cluster["keys"].append(name)
+            cluster["ids"].add(contact_id)
+
+        records = ContactRepository(self.contact_repository.db, read_only=True)
+        contacts = {
+            contact.id: contact
+            for contact in await records.get_contacts_by_ids(user, list(parent))
+        }
+        return [
+            {
+                "keys": cluster["keys"],
+                "contacts": [contacts[i] for i in sorted(cluster["ids"])],
+            }
+            for _, cluster in sorted(clusters.items())
+        ]
+
+    async def merge(self, user: User, primary_id: int, duplicate_ids: list[int]):
+        """Merge duplicates into the primary contact and delete them."""
+        return await self.contact_repository.merge_contacts(
+            user, primary_id, duplicate_ids
+        )
@@ -1,27 +1,85 @@
-"""Email service for sending verification and password reset emails."""
+"""Email service for sending verification and password reset emails.
 
+``fastapi_mail`` takes a few hundred milliseconds to import, so it is loaded
+on first use (or during warm-up). Its names, the ``aiosmtplib`` names used by
+:class:`PooledMailer` and the ``conf`` connection config are still available
+as attributes of this module.
+"""
+
+from __future__ import annotations
+
+import importlib
+import logging
+from email.message import EmailMessage
+from email.utils import formataddr
 from pathlib import Path
 
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
-from fastapi_mail.errors import ConnectionErrors
 from pydantic import EmailStr
 
 from src.services.auth import create_email_token
 from src.conf.config import settings
 
-conf = ConnectionConfig(
-    MAIL_USERNAME=settings.MAIL_USERNAME,
-    MAIL_PASSWORD=settings.MAIL_PASSWORD,
-    MAIL_FROM=settings.MAIL_FROM,
-    MAIL_PORT=settings.MAIL_PORT,
-    MAIL_SERVER=settings.MAIL_SERVER,
-    MAIL_FROM_NAME=settings.MAIL_FROM_NAME,
-    MAIL_STARTTLS=settings.MAIL_STARTTLS,
-    MAIL_SSL_TLS=settings.MAIL_SSL_TLS,
-    USE_CREDENTIALS=settings.USE_CREDENTIALS,
-    VALIDATE_CERTS=settings.VALIDATE_CERTS,
-    TEMPLATE_FOLDER=Path(__file__).parent / "templates",
-)
+logger = logging.getLogger(__name__)
+
+_LAZY_IMPORTS = {
+    "FastMail": "fastapi_mail",
+    "MessageSchema": "fastapi_mail",
+    "ConnectionConfig": "fastapi_mail",
+    "MessageType": "fastapi_mail",
+    "ConnectionErrors": "fastapi_mail.errors",
+    "SMTP": "aiosmtplib",
+    "SMTPAuthenticationError": "aiosmtplib",
+    "SMTPDataError": "aiosmtplib",
+    "SMTPException": "aiosmtplib",
+    "SMTPRecipientRefused": "aiosmtplib",
+    "SMTPRecipientsRefused": "aiosmtplib",
+    "SMTPResponseException": "aiosmtplib",
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_IMPORTS:
+        value = getattr(importlib.import_module(_LAZY_IMPORTS[name]), name)
+    elif name == "conf":
+        value = _build_config()
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def _build_config():
+    return __getattr__("ConnectionConfig")(
+        MAIL_USERNAME=settings.MAIL_USERNAME,
+        MAIL_PASSWORD=settings.MAIL_PASSWORD,
+        MAIL_FROM=settings.MAIL_FROM,
+        MAIL_PORT=settings.MAIL_PORT,
+        MAIL_SERVER=settings.MAIL_SERVER,
+        MAIL_FROM_NAME=settings.MAIL_FROM_NAME,
+        MAIL_STARTTLS=settings.MAIL_STARTTLS,
+        MAIL_SSL_TLS=settings.MAIL_SSL_TLS,
+        USE_CREDENTIALS=settings.USE_CREDENTIALS,
+        VALIDATE_CERTS=settings.VALIDATE_CERTS,
+        TEMPLATE_FOLDER=Path(__file__).parent / "templates",
+    )
+
+
+def load_mail() -> None:
+    """Import ``fastapi_mail`` and build ``conf`` unless already done.
+
+    Names replaced in the module (e.g. by tests) are kept.
+    """
+    for name in (*_LAZY_IMPORTS, "conf"):
+        if name not in globals():
+            __getattr__(name)
+
+
+def compile_templates() -> None:
+    """Load and compile all email templates into the Jinja cache."""
+    load_mail()
+    templates = conf.template_engine()
+    for name in templates.list_templates():
+        templates.get_template(name)
 
 
 async def send_email(email: EmailStr, username: str, host: str):
@@ -29,6 +87,7 @@ async def send_email(email: EmailStr, username: str, host: str):
 
     The email contains a verification link with a signed token.
     """
+    load_mail()
     try:
         token_verification = create_email_token({"sub": email})
         message = MessageSchema(
@@ -44,8 +103,8 @@ async def send_email(email: EmailStr, username: str, host: str):
 
         fm = FastMail(conf)
         await fm.send_message(message, template_name="verify_email.html")
-    except ConnectionErrors as err:
-        print(err)
+    except ConnectionErrors:
+        logger.exception("Failed to send verification email")
 
 
 async def send_reset_password_email(email: EmailStr, username: str, host: str):
@@ -54,6 +113,7 @@ async def send_reset_password_email(email: EmailStr, username: str, host: str):
     The email contains a token that can be used to reset the password
     via the /api/auth/reset_password endpoint.
     """
+    load_mail()
     try:
         token_verification = create_email_token({"sub": email})
         message = MessageSchema(
@@ -69,5 +129,173 @@ async def send_reset_password_email(email: EmailStr, username: str, host: str):
 
         fm = FastMail(conf)
         await fm.send_message(message, template_name="reset_password.html")
-    except ConnectionErrors as err:
-        print(err)
+    except ConnectionErrors:
+        logger.exception("Failed to send password reset email")
+
+
+class MessageRejected(Exception):
+    """The SMTP server refused a message, e.g. its recipient or its data.
+
+    The connection is still usable; sending the same message again would
+    fail the same way.
+    """
+
+
+class MailerError(Exception):
+    """Sending failed for a reason unrelated to the message.
+
+    The SMTP server could not be reached, dropped the connection, refused the
+    login or the sender, or kept answering with a temporary error. Later
+    messages would most likely fail the same way.
+    """
+
+
+def _is_transient(err: Exception) -> bool:
+    """Return True if sending again on a new connection may succeed."""
+    if isinstance(err, SMTPRecipientsRefused):
+        return bool(err.recipients) and all(map(_is_transient, err.recipients))
+    if isinstance(err, SMTPAuthenticationError):
+        return True
+    if isinstance(err, SMTPResponseException):
+        return 400 <= err.code < 500
+    # Disconnects, timeouts and refused connections.
+    return isinstance(err, OSError)
+
+
+class PooledMailer:
+    """Send many messages over a single reusable SMTP connection.
+
+    ``FastMail.send_message`` opens and closes an SMTP session for every
+    message. This mailer keeps one ``aiosmtplib`` session open for up to
+    ``max_messages`` messages. After a connection failure, a login error or
+    a temporary (4xx) reply, the connection is reopened and the message is
+    sent once more; a refused message is not retried.
+
+    :param config: Mail connection configuration, ``conf`` by default.
+    :param max_messages: Number of messages sent before the session is recycled.
+    """
+
+    def __init__(
+        self,
+        config: ConnectionConfig | None = None,
+        max_messages: int = settings.MAIL_POOL_MAX_MESSAGES,
+    ):
+        load_mail()
+        config = config or conf
+        self.config = config
+        self.max_messages = max_messages
+        self._smtp: SMTP | None = None
+        self._sent_on_connection = 0
+        self._templates = config.template_engine() if config.TEMPLATE_FOLDER else None
+
+    async def __aenter__(self) -> "PooledMailer":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def _connect(self) -> SMTP:
+        if self._smtp is None:
+            config = self.config
+            smtp = SMTP(
+                hostname=config.MAIL_SERVER,
+                port=config.MAIL_PORT,
+                username=config.MAIL_USERNAME if config.USE_CREDENTIALS else None,
+                password=(
+                    config.MAIL_PASSWORD.get_secret_value()
+                    if config.USE_CREDENTIALS
+                    else None
+                ),
+                local_hostname=config.LOCAL_HOSTNAME,
+                timeout=config.TIMEOUT,
+                use_tls=config.MAIL_SSL_TLS,
+                start_tls=config.MAIL_STARTTLS,
+                validate_certs=config.VALIDATE_CERTS,
+                cert_bundle=config.CERT_BUNDLE,
+            )
+            await smtp.connect()
+            self._smtp = smtp
+            self._sent_on_connection = 0
+        return self._smtp
+
+    async def close(self) -> None:
+        """Close the underlying SMTP session if it is open."""
+        smtp, self._smtp = self._smtp, None
+        if smtp is not None:
+            try:
+                await smtp.quit()
+            except Exception:
+                smtp.close()
+
+    def _build(
+        self, recipient: str, subject: str, template_name: str, body: dict
+    ) -> EmailMessage:
+        message = EmailMessage()
+        message["Subject"] = subject
+        message["From"] = formataddr(
+            (self.config.MAIL_FROM_NAME, self.config.MAIL_FROM)
+        )
+        message["To"] = recipient
+        html = self._templates.get_template(template_name).render(**body)
+        message.set_content(html, subtype="html")
+        return message
+
+    async def send_message(
+        self, recipient: str, subject: str, template_name: str, body: dict
+    ) -> None:
+        """Render an HTML template and send it over the pooled connection.
+
+        :raises MessageRejected: if the server refuses the recipient or the
+            message.
+        :raises MailerError: if sending fails for any other reason.
+        """
+        message = self._build(recipient, subject, template_name, body)
+        if self.config.SUPPRESS_SEND:
+            return
+
+        for attempt in range(2):
+            try:
+                smtp = await self._connect()
+                await smtp.send_message(message)
+                break
+            except (SMTPException, OSError) as err:
+                final = attempt or not _is_transient(err)
+                if final and isinstance(
+                    err, (SMTPRecipientsRefused, SMTPRecipientRefused, SMTPDataError)
+                ):
+                    raise MessageRejected(str(err)) from err
+                # The session state is unknown after an error; start over.
+                await self.close()
+                if final:
+                    raise MailerError(str(err)) from err
+
+        self._sent_on_connection += 1
+        if self._sent_on_connection >= self.max_messages:
+            await self.close()
+
+
+async def send_birthday_digest(
+    mailer: PooledMailer, email: EmailStr, username: str, contacts: list
+):
+    """Send a single digest email listing upcoming birthdays of a user's contacts.
+
+    :param mailer: Mailer used to deliver the message.
+    :param contacts: Contacts whose birthdays are coming up.
+    :raises MessageRejected: if the server refuses the message.
+    :raises MailerError: if sending fails for any other reason.
+    """
+    await mailer.send_message(
+        email,
+        "Upcoming birthdays",
+        "birthday_digest.html",
+        {
+            "username": username,
+            "contacts": [
+                {
+                    "name": f"{contact.first_name} {contact.last_name}",
+                    "birthday": contact.birthday.strftime("%d %B"),
+                }
+                for contact in contacts
+            ],
+        },
+    )
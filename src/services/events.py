@@ -0,0 +1,236 @@
+"""Contact change events delivered to streaming clients.
+
+``ContactRepository`` publishes an event after every committed mutation. A
+broker fans the events out to the subscribers of the owning user:
+
+* :class:`EventBroker` keeps everything in process and is used for a single
+  server and in tests.
+* :class:`RedisEventBroker` publishes to Redis and runs one subscription
+  connection per process, subscribed to the channels of the users with local
+  subscribers, which feeds a local :class:`EventBroker`. All subscribers of a
+  process share that one Redis connection.
+
+A subscriber is just a bounded queue, so an idle stream costs a few hundred
+bytes and no task besides the request that reads it.
+"""
+
+import asyncio
+import logging
+from contextlib import contextmanager
+from typing import Iterator
+
+import orjson
+
+from src.conf.config import settings
+from src.services.redis import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+
+class EventBroker:
+    """In-process publish/subscribe of events per user.
+
+    :param queue_size: Events buffered per subscriber. When a slow subscriber
+        falls that far behind, new events for it are dropped.
+    """
+
+    def __init__(self, queue_size: int = settings.CONTACT_EVENTS_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: dict[int, set[asyncio.Queue]] = {}
+
+    @contextmanager
+    def subscribe(self, user_id: int) -> Iterator[asyncio.Queue]:
+        """Register a queue receiving the user's events until the block exits."""
+        queue = asyncio.Queue(self.queue_size)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            queues = self._subscribers.get(user_id)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[user_id]
+
+    def subscriber_count(self, user_id: int | None = None) -> int:
+        """Return the number of subscribers of a user or of all users."""
+        if user_id is not None:
+            return len(self._subscribers.get(user_id, ()))
+        return sum(map(len, self._subscribers.values()))
+
+    def dispatch(self, user_id: int, event: dict) -> None:
+        """Deliver an event to the local subscribers of a user."""
+        for queue in self._subscribers.get(user_id, ()):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                logger.warning("Dropping contact event for slow subscriber")
+
+    async def publish(self, user_id: int, event: dict) -> None:
+        """Publish an event to all subscribers of a user."""
+        self.dispatch(user_id, event)
+
+    async def close(self) -> None:
+        """Release resources held by the broker."""
+
+
+class RedisEventBroker(EventBroker):
+    """Broker that shares events between processes through Redis pub/sub.
+
+    Publishing never waits for Redis: events go to a bounded outbox that one
+    background task sends in order, each with a timeout and through a
+    :class:`~src.services.redis.CircuitBreaker`. Events that cannot be sent
+    are dropped; streaming clients catch up with ``GET /contacts/changes``.
+
+    The listener subscribes to a user's channel when the first local
+    subscriber of that user arrives and unsubscribes when the last one leaves.
+
+    :param client: ``redis.asyncio`` client.
+    :param prefix: Channel prefix; events of user 42 go to ``<prefix>42``.
+    :param publish_timeout: Seconds to wait for one ``PUBLISH``.
+    :param outbox_size: Events waiting to be published before new ones are
+        dropped.
+    :param breaker: Circuit breaker guarding ``PUBLISH``.
+    """
+
+    RECONNECT_SECONDS = 1.0
+    POLL_SECONDS = 0.1
+
+    def __init__(
+        self,
+        client,
+        prefix: str = "contacts:events:",
+        queue_size: int = settings.CONTACT_EVENTS_QUEUE_SIZE,
+        publish_timeout: float = settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+        outbox_size: int = 1000,
+        breaker: CircuitBreaker | None = None,
+    ):
+        super().__init__(queue_size)
+        self.client = client
+        self.prefix = prefix
+        self.publish_timeout = publish_timeout
+        self.outbox_size = outbox_size
+        self.breaker = breaker or CircuitBreaker()
+        self._outbox: asyncio.Queue | None = None
+        self._sender: asyncio.Task | None = None
+        self._listener: asyncio.Task | None = None
+
+    @contextmanager
+    def subscribe(self, user_id: int) -> Iterator[asyncio.Queue]:
+        """Register a local subscriber, starting the Redis listener if needed."""
+        with super().subscribe(user_id) as queue:
+            if self._listener is None or self._listener.done():
+                self._listener = asyncio.create_task(self._listen())
+            yield queue
+
+    async def publish(self, user_id: int, event: dict) -> None:
+        """Queue an event for the user's Redis channel and return at once.
+
+        The write that produced the event has already been committed, so a
+        full outbox or a Redis failure drops the event instead of failing or
+        delaying the response.
+        """
+        if self._sender is None or self._sender.done():
+            self._outbox = asyncio.Queue(self.outbox_size)
+            self._sender = asyncio.create_task(self._send())
+        try:
+            self._outbox.put_nowait((f"{self.prefix}{user_id}", orjson.dumps(event)))
+        except asyncio.QueueFull:
+            logger.warning("Dropping contact event, Redis publish outbox is full")
+
+    async def _send(self) -> None:
+        while True:
+            channel, data = await self._outbox.get()
+            if not self.breaker.allow():
+                continue
+            try:
+                async with asyncio.timeout(self.publish_timeout):
+                    await self.client.publish(channel, data)
+            except Exception:
+                self.breaker.record_failure()
+                logger.warning("Failed to publish contact event", exc_info=True)
+            else:
+                self.breaker.record_success()
+
+    async def _listen(self) -> None:
+        while self.subscriber_count():
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            subscribed: set[int] = set()
+            try:
+                while self.subscriber_count():
+                    wanted = set(self._subscribers)
+                    if wanted - subscribed:
+                        await pubsub.subscribe(
+                            *(f"{self.prefix}{u}" for u in wanted - subscribed)
+                        )
+                    if subscribed - wanted:
+                        await pubsub.unsubscribe(
+                            *(f"{self.prefix}{u}" for u in subscribed - wanted)
+                        )
+                    subscribed = wanted
+                    # The read timeout bounds how long a new or closed
+                    # subscriber waits for its channel to be (un)subscribed.
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True, timeout=self.POLL_SECONDS
+                    )
+                    if message is not None and message["type"] == "message":
+                        user_id = int(message["channel"][len(self.prefix) :])
+                        self.dispatch(user_id, orjson.loads(message["data"]))
+            except Exception:
+                logger.exception("Contact event listener failed, reconnecting")
+                await asyncio.sleep(self.RECONNECT_SECONDS)
+            finally:
+                await pubsub.aclose()
+
+    async def close(self) -> None:
+        """Stop the Redis listener and the publisher."""
+        for task in (self._listener, self._sender):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        self._listener = self._sender = None
+
+
+def _create_broker() -> EventBroker:
+    if settings.CONTACT_EVENTS_BACKEND == "redis":
+        from redis import asyncio as aioredis
+
+        return RedisEventBroker(
+            aioredis.Redis(
+                host=settings.REDIS_HOST,
+                port=settings.REDIS_PORT,
+                db=settings.REDIS_DB,
+                decode_responses=True,
+                socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+                socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+            )
+        )
+    return EventBroker()
+
+
+event_broker = _create_broker()
+"""Global broker selected by ``CONTACT_EVENTS_BACKEND``."""
+
+
+async def sse_stream(
+    queue: asyncio.Queue,
+    keepalive: float = settings.CONTACT_EVENTS_KEEPALIVE_SECONDS,
+):
+    """Yield events from a subscriber queue as server-sent event frames.
+
+    A comment line is sent when no event arrives for ``keepalive`` seconds so
+    that proxies keep the connection open.
+    """
+    while True:
+        try:
+            event = await asyncio.wait_for(queue.get(), keepalive)
+        except asyncio.TimeoutError:
+            yield b": keepalive\n\n"
+            continue
+        yield (
+            b"id: %d\nevent: %s\ndata: %s\n\n"
+            % (event["version"], event["type"].encode(), orjson.dumps(event))
+        )
@@ -0,0 +1,157 @@
+"""Readiness checks of the application's dependencies.
+
+:class:`HealthChecker` runs all checks concurrently, each with a timeout,
+and caches the report for ``HEALTH_CACHE_TTL_SECONDS``. Probes arriving
+while a run is in progress wait for it instead of starting another one, so
+a probe storm costs at most one round of checks per TTL and worker.
+
+Only the checks in ``HEALTH_CRITICAL_CHECKS`` decide readiness; the others
+(Redis has a fallback, mail and uploads are not needed to serve most
+requests) are reported but only mark the service as degraded.
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable
+from urllib.parse import urlsplit
+
+from sqlalchemy import text
+
+from src.conf.config import settings
+
+Check = Callable[[], Awaitable[dict | None]]
+
+
+async def check_database() -> dict:
+    """Run ``SELECT 1`` on every shard primary and ping the replicas.
+
+    :return: Connection pool usage per shard.
+    """
+    from src.database.shards import shard_router
+
+    async def ping(name, manager):
+        async with manager.engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        replicas = await manager.check_replicas() if manager.replicas else {}
+        pool = manager.engine.pool
+        return name, {
+            "pool_checked_out": getattr(pool, "checkedout", lambda: None)(),
+            "pool_size": getattr(pool, "size", lambda: None)(),
+            "replicas_up": sum(replicas.values()),
+            "replicas": len(replicas),
+        }
+
+    results = await asyncio.gather(
+        *(ping(name, manager) for name, manager in shard_router.shards.items())
+    )
+    return {"shards": dict(results)}
+
+
+async def check_redis() -> dict:
+    """Ping Redis and report the state of its circuit breaker."""
+    from src.services import auth
+
+    await asyncio.to_thread(auth.redis_client.ping)
+    breaker = getattr(auth.redis_client, "breaker", None)
+    return {"circuit": breaker.state if breaker is not None else None}
+
+
+async def _tcp_connect(host: str, port: int) -> None:
+    _, writer = await asyncio.open_connection(host, port)
+    writer.close()
+    await writer.wait_closed()
+
+
+async def check_mail() -> None:
+    """Open a TCP connection to the SMTP server, without logging in."""
+    await _tcp_connect(settings.MAIL_SERVER, settings.MAIL_PORT)
+
+
+async def check_upload() -> None:
+    """Open a TCP connection to the Cloudinary API.
+
+    An authenticated ``ping`` would count against the admin API rate limit
+    on every probe.
+    """
+    url = urlsplit(settings.HEALTH_UPLOAD_URL)
+    await _tcp_connect(url.hostname, url.port or 443)
+
+
+class HealthChecker:
+    """Run dependency checks concurrently and cache the report.
+
+    :param checks: Check name to coroutine function. A check fails by raising;
+        a returned dict is added to its report.
+    :param critical: Names of the checks that decide readiness.
+    :param timeout: Seconds each check may take.
+    :param ttl: Seconds a report is reused.
+    """
+
+    def __init__(
+        self,
+        checks: dict[str, Check],
+        critical: list[str] = settings.HEALTH_CRITICAL_CHECKS,
+        timeout: float = settings.HEALTH_CHECK_TIMEOUT_SECONDS,
+        ttl: float = settings.HEALTH_CACHE_TTL_SECONDS,
+    ):
+        self.checks = checks
+        self.critical = set(critical)
+        self.timeout = timeout
+        self.ttl = ttl
+        self._report: dict | None = None
+        self._expires = 0.0
+        self._running: asyncio.Task | None = None
+
+    async def _run_check(self, check: Check) -> dict:
+        started = time.perf_counter()
+        try:
+            details = await asyncio.wait_for(check(), self.timeout)
+        except asyncio.TimeoutError:
+            result = {"status": "timeout"}
+        except Exception as e:
+            result = {"status": "error", "error": f"{type(e).__name__}: {e}"}
+        else:
+            result = {"status": "ok", **(details or {})}
+        result["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return result
+
+    async def _run(self) -> dict:
+        results = await asyncio.gather(
+            *(self._run_check(check) for check in self.checks.values())
+        )
+        checks = dict(zip(self.checks, results))
+        failed = {name for name, result in checks.items() if result["status"] != "ok"}
+        if failed & self.critical:
+            status = "unavailable"
+        elif failed:
+            status = "degraded"
+        else:
+            status = "ok"
+        return {"status": status, "checked_at": time.time(), "checks": checks}
+
+    async def report(self) -> dict:
+        """Return the cached report, running the checks if it expired."""
+        if self._report is not None and time.monotonic() < self._expires:
+            return self._report
+        if self._running is None:
+            self._running = asyncio.create_task(self._run())
+        running = self._running
+        try:
+            report = await asyncio.shield(running)
+        finally:
+            if self._running is running and running.done():
+                self._running = None
+        self._report = report
+        self._expires = time.monotonic() + self.ttl
+        return report
+
+
+health_checker = HealthChecker(
+    {
+        "database": check_database,
+        "redis": check_redis,
+        "mail": check_mail,
+        "upload": check_upload,
+    }
+)
+"""Global checker used by the readiness endpoint."""
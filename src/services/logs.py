@@ -0,0 +1,212 @@
+"""Structured logging and request IDs.
+
+:func:`setup_logging` routes every record through a ``QueueHandler``; a
+``QueueListener`` thread formats and writes them, so the event loop never
+blocks on stdout. Records are JSON objects carrying the ID of the request
+that produced them, which :class:`RequestContextMiddleware` takes from the
+``X-Request-ID`` header or generates. The ID is kept in a context variable,
+so SQLAlchemy (``LOG_SQL``), Redis and application logs emitted while
+handling a request all carry it.
+
+The middleware also writes one access record per request. Successful fast
+requests are sampled with ``LOG_ACCESS_SAMPLE_RATE``; errors and requests
+slower than ``LOG_SLOW_REQUEST_MS`` are always logged.
+"""
+
+import copy
+import logging
+import queue
+import random
+import re
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, UTC
+from logging.handlers import QueueHandler, QueueListener
+
+import orjson
+
+from src.conf.config import settings
+
+request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
+"""ID of the request being handled in the current context."""
+
+access_logger = logging.getLogger("access")
+
+_VALID_REQUEST_ID = re.compile(rb"[\w.:-]{1,128}", re.ASCII)
+"""Incoming IDs that do not match are replaced by a generated one."""
+
+_RECORD_ATTRS = frozenset(logging.LogRecord("", 0, "", 0, "", None, None).__dict__) | {
+    "message",
+    "asctime",
+    "request_id",
+}
+
+
+class RequestIdFilter(logging.Filter):
+    """Attach the current request ID to every record as ``request_id``."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line.
+
+    Attributes passed with ``extra=`` become top-level keys.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": datetime.fromtimestamp(record.created, UTC).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                data[key] = value
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data["exc_info"] = record.exc_text
+        return orjson.dumps(data, default=str).decode()
+
+
+class _StructuredQueueHandler(QueueHandler):
+    """``QueueHandler`` that keeps ``extra`` fields for the JSON formatter.
+
+    The stock handler formats the whole record into ``msg`` before queueing
+    it; this one only merges the arguments and renders the traceback, which
+    cannot cross threads.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging(
+    level: str = settings.LOG_LEVEL,
+    fmt: str = settings.LOG_FORMAT,
+    stream=None,
+) -> QueueListener:
+    """Install the queue handler on the root logger and start its listener.
+
+    Calling it again replaces the previously installed handler; stop the
+    returned listener on shutdown to flush pending records.
+
+    :param level: Root logger level.
+    :param fmt: ``json`` or ``text``.
+    :param stream: Output stream, stdout by default.
+    """
+    output = logging.StreamHandler(stream or sys.stdout)
+    if fmt == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(
+            logging.Formatter(
+                "%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"
+            )
+        )
+
+    records = queue.SimpleQueue()
+    handler = _StructuredQueueHandler(records)
+    handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    for old in [h for h in root.handlers if isinstance(h, _StructuredQueueHandler)]:
+        root.removeHandler(old)
+    root.addHandler(handler)
+    root.setLevel(level)
+    if settings.LOG_SQL:
+        logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO)
+
+    listener = QueueListener(records, output, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+class RequestContextMiddleware:
+    """ASGI middleware assigning a request ID and writing access records.
+
+    The ID is returned in the ``X-Request-ID`` response header.
+
+    :param sample_rate: Share of successful fast requests that are logged.
+    :param slow_ms: Requests at least this slow are always logged.
+    """
+
+    HEADER = b"x-request-id"
+
+    def __init__(
+        self,
+        app,
+        sample_rate: float = settings.LOG_ACCESS_SAMPLE_RATE,
+        slow_ms: float = settings.LOG_SLOW_REQUEST_MS,
+    ):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+
+    def _request_id(self, scope) -> str:
+        for name, value in scope["headers"]:
+            if name == self.HEADER:
+                if _VALID_REQUEST_ID.fullmatch(value):
+                    return value.decode()
+                break
+        return uuid.uuid4().hex
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = self._request_id(scope)
+        token = request_id_var.set(request_id)
+        started = time.perf_counter()
+        finished = None
+        status = 500
+
+        async def send_with_id(message):
+            nonlocal status, finished
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    (self.HEADER, request_id.encode()),
+                ]
+            elif not message.get("more_body", False):
+                finished = time.perf_counter()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            duration_ms = ((finished or time.perf_counter()) - started) * 1000
+            if (
+                status >= 400
+                or duration_ms >= self.slow_ms
+                or random.random() < self.sample_rate
+            ):
+                access_logger.info(
+                    "%s %s %d",
+                    scope["method"],
+                    scope["path"],
+                    status,
+                    extra={
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "status": status,
+                        "duration_ms": round(duration_ms, 2),
+                        "client": (scope.get("client") or (None,))[0],
+                    },
+                )
+            request_id_var.reset(token)
@@ -0,0 +1,234 @@
+"""Sampling CPU profiler for a live worker.
+
+:class:`SamplingProfiler` runs a thread that periodically reads the stack of
+the event loop thread and counts identical stacks. The result is written in
+the collapsed-stack format (``frame;frame;frame count`` per line) read by
+``flamegraph.pl``, speedscope and similar tools.
+
+Two ways to use it:
+
+* The admin endpoints in :mod:`src.api.admin` profile the whole worker for
+  a number of seconds.
+* :class:`RequestProfilerMiddleware` profiles a single request that carries
+  the ``X-Profile`` header with ``PROFILER_TOKEN``. Only samples taken while
+  that request's task is running are kept; the profile is stored under the
+  ID returned in the ``X-Profile-ID`` response header. The middleware is only
+  installed when ``PROFILER_TOKEN`` is set.
+"""
+
+import asyncio
+import hmac
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from pathlib import Path
+
+from src.conf.config import settings
+from src.services.logs import request_id_var
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+
+_labels: dict = {}
+
+
+def _label(code) -> str:
+    label = _labels.get(code)
+    if label is None:
+        path = Path(code.co_filename)
+        if path.is_relative_to(ROOT):
+            path = path.relative_to(ROOT)
+        elif "site-packages" in path.parts:
+            path = Path(*path.parts[path.parts.index("site-packages") + 1 :])
+        label = f"{code.co_name} ({path}:{code.co_firstlineno})".replace(";", ":")
+        _labels[code] = label
+    return label
+
+
+def collapse(frame) -> str:
+    """Return the stack of ``frame`` as a root-first ``;``-separated string."""
+    labels = []
+    while frame is not None:
+        labels.append(_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class SamplingProfiler:
+    """Sample the stack of one thread at a fixed interval.
+
+    :param interval: Seconds between samples.
+    :param thread_id: Thread to sample, the calling thread by default.
+    :param task: Only keep samples taken while this task is running.
+    """
+
+    def __init__(
+        self,
+        interval: float = settings.PROFILER_INTERVAL_MS / 1000,
+        thread_id: int | None = None,
+        task: asyncio.Task | None = None,
+    ):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.task = task
+        self.loop = task.get_loop() if task is not None else None
+        self.stacks: Counter[str] = Counter()
+        self.started_at: float | None = None
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> "SamplingProfiler":
+        """Start sampling in a daemon thread."""
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self._run, name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        """Stop sampling and wait for the sampling thread to exit."""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        if self.started_at is not None and not self.duration:
+            self.duration = time.perf_counter() - self.started_at
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            if (
+                self.task is not None
+                and asyncio.current_task(self.loop) is not self.task
+            ):
+                continue
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse(frame)] += 1
+                del frame
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def collapsed(self) -> str:
+        """Return the samples in collapsed-stack format, most frequent first."""
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.stacks.most_common()
+        )
+
+
+class ProfileStore:
+    """Keep the most recent profiles by ID.
+
+    :param size: Number of profiles kept; older ones are dropped.
+    """
+
+    def __init__(self, size: int = 32):
+        self.size = size
+        self._profiles: OrderedDict[str, SamplingProfiler] = OrderedDict()
+
+    def add(self, profile_id: str, profiler: SamplingProfiler) -> None:
+        self._profiles[profile_id] = profiler
+        self._profiles.move_to_end(profile_id)
+        while len(self._profiles) > self.size:
+            self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> SamplingProfiler | None:
+        return self._profiles.get(profile_id)
+
+
+request_profiles = ProfileStore()
+"""Profiles of single requests, by ``X-Profile-ID``."""
+
+
+class WorkerProfiler:
+    """The worker-wide profiling session driven by the admin endpoints."""
+
+    def __init__(self):
+        self.current: SamplingProfiler | None = None
+        self._timer: asyncio.TimerHandle | None = None
+
+    @property
+    def running(self) -> bool:
+        return self.current is not None and self.current.running
+
+    def start(self, seconds: float, interval: float) -> SamplingProfiler:
+        """Start sampling the event loop thread; it stops after ``seconds``."""
+        if self.running:
+            raise RuntimeError("Profiler is already running")
+        self.current = SamplingProfiler(interval).start()
+        self._timer = asyncio.get_running_loop().call_later(seconds, self.stop)
+        return self.current
+
+    def stop(self) -> SamplingProfiler | None:
+        """Stop the session; return it, or the last finished one."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self.current is not None:
+            self.current.stop()
+        return self.current
+
+
+worker_profiler = WorkerProfiler()
+"""Profiling session of this worker process."""
+
+
+class RequestProfilerMiddleware:
+    """ASGI middleware profiling requests that carry a valid ``X-Profile``.
+
+    :param token: Secret expected in the ``X-Profile`` header.
+    :param interval: Seconds between samples.
+    """
+
+    HEADER = b"x-profile"
+
+    def __init__(
+        self,
+        app,
+        token: str = settings.PROFILER_TOKEN,
+        interval: float = settings.PROFILER_REQUEST_INTERVAL_MS / 1000,
+    ):
+        self.app = app
+        self.token = token.encode()
+        self.interval = interval
+
+    def _requested(self, scope) -> bool:
+        if not self.token:
+            return False
+        for name, value in scope["headers"]:
+            if name == self.HEADER:
+                return hmac.compare_digest(value, self.token)
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = request_id_var.get() or uuid.uuid4().hex
+        profiler = SamplingProfiler(self.interval, task=asyncio.current_task())
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    (b"x-profile-id", profile_id.encode()),
+                ]
+            elif not message.get("more_body", False):
+                profiler.stop()
+            await send(message)
+
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profiler.stop()
+            request_profiles.add(profile_id, profiler)
@@ -1,14 +1,280 @@
-"""Redis client and helper class for caching objects."""
+"""Redis client and helper class for caching objects.
+
+Redis is a cache here, so an outage must not fail requests. The global
+client is a :class:`ResilientRedis`: commands use short socket timeouts, a
+:class:`CircuitBreaker` stops calling Redis after repeated failures, and
+while Redis is unavailable reads are served from a small in-process cache
+(and otherwise fall through to the database). After
+``REDIS_BREAKER_RESET_SECONDS`` one trial command probes Redis again.
+"""
+
+import logging
+import time
+from collections import OrderedDict
 
 import redis
 from src.conf.config import settings
+from src.services.tracing import instrument_redis
+
+logger = logging.getLogger(__name__)
+
+_DELETE_IF_EQUAL = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+class CircuitBreaker:
+    """Closed, open and half-open circuit breaker.
+
+    :param failure_threshold: Consecutive failures that open the circuit.
+    :param reset_timeout: Seconds the circuit stays open before one trial
+        call is let through (half-open).
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+    STATES = (CLOSED, OPEN, HALF_OPEN)
+
+    def __init__(
+        self,
+        failure_threshold: int = settings.REDIS_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout: float = settings.REDIS_BREAKER_RESET_SECONDS,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.failures_total = 0
+        self.rejected_total = 0
+        self.opened_total = 0
+
+    def _set_state(self, state: str) -> None:
+        if state != self.state:
+            logger.warning("Redis circuit %s -> %s", self.state, state)
+            self.state = state
+
+    def allow(self) -> bool:
+        """Return True if a call may be attempted now."""
+        if self.state == self.CLOSED:
+            return True
+        if (
+            self.state == self.OPEN
+            and time.monotonic() - self.opened_at >= self.reset_timeout
+        ):
+            self._set_state(self.HALF_OPEN)
+            return True
+        self.rejected_total += 1
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._set_state(self.CLOSED)
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.failures_total += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            if self.state != self.OPEN:
+                self.opened_total += 1
+            self._set_state(self.OPEN)
+
+    def metrics(self, name: str) -> str:
+        """Return the breaker state and counters in Prometheus text format."""
+        lines = [
+            f"# TYPE {name}_state gauge",
+            *(
+                f'{name}_state{{state="{state}"}} {int(state == self.state)}'
+                for state in self.STATES
+            ),
+            f"# TYPE {name}_failures_total counter",
+            f"{name}_failures_total {self.failures_total}",
+            f"# TYPE {name}_rejected_total counter",
+            f"{name}_rejected_total {self.rejected_total}",
+            f"# TYPE {name}_opened_total counter",
+            f"{name}_opened_total {self.opened_total}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+class LocalCache:
+    """Bounded in-process cache with per-key expiry.
+
+    :param size: Maximum number of keys; the least recently used go first.
+    :param ttl: Default lifetime of a key in seconds.
+    """
+
+    def __init__(
+        self,
+        size: int = settings.REDIS_FALLBACK_CACHE_SIZE,
+        ttl: float = settings.REDIS_FALLBACK_CACHE_TTL_SECONDS,
+    ):
+        self.size = size
+        self.ttl = ttl
+        self._items: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    def get(self, key: str) -> str | None:
+        item = self._items.get(key)
+        if item is None:
+            return None
+        expires, value = item
+        if time.monotonic() >= expires:
+            del self._items[key]
+            return None
+        self._items.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: str, ttl: float | None = None) -> None:
+        ttl = min(ttl, self.ttl) if ttl else self.ttl
+        self._items[key] = (time.monotonic() + ttl, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.size:
+            self._items.popitem(last=False)
+
+    def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._items.pop(key, None)
+
+    def expire(self, key: str, seconds: float) -> None:
+        item = self._items.get(key)
+        if item is not None:
+            self._items[key] = (time.monotonic() + min(seconds, self.ttl), item[1])
+
+
+class ResilientRedis:
+    """Cache client that degrades to an in-process cache when Redis fails.
+
+    ``get``, ``set``, ``delete``, ``expire`` and ``delete_if_equal`` never
+    raise on Redis errors: a failed or rejected ``get`` returns the local
+    copy or None (a cache miss). Values are also kept locally, for at most
+    the local TTL, so recently seen keys survive an outage. Other attributes
+    are passed to the wrapped client.
+
+    :param client: Redis client with short socket timeouts.
+    :param breaker: Circuit breaker guarding the client.
+    :param local: In-process fallback cache.
+    """
+
+    def __init__(
+        self,
+        client,
+        breaker: CircuitBreaker | None = None,
+        local: LocalCache | None = None,
+    ):
+        self.client = client
+        self.breaker = breaker or CircuitBreaker()
+        self.local = local or LocalCache()
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def _call(self, method: str, *args, **kwargs):
+        """Run a command; raise ``redis.RedisError`` if it failed or was rejected.
+
+        Any exception counts as a failure, so a half-open circuit always
+        learns the outcome of its trial call.
+        """
+        if not self.breaker.allow():
+            raise redis.ConnectionError("Redis circuit is open")
+        succeeded = False
+        try:
+            result = getattr(self.client, method)(*args, **kwargs)
+            succeeded = True
+        except redis.RedisError:
+            logger.warning("Redis %s failed", method, exc_info=True)
+            raise
+        finally:
+            self._record(succeeded)
+        return result
+
+    def _record(self, succeeded: bool) -> None:
+        if succeeded:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    def get(self, key: str) -> str | None:
+        try:
+            return self._call("get", key)
+        except redis.RedisError:
+            return self.local.get(key)
+
+    def set(
+        self,
+        key: str,
+        value: str,
+        ex: float | None = None,
+        px: int | None = None,
+        nx: bool = False,
+    ) -> bool | None:
+        """Set ``key``; with ``nx``, return whether it was set.
+
+        While Redis is unavailable ``nx`` is only honored within this process.
+        """
+        ttl = ex if ex is not None else px / 1000 if px is not None else None
+        try:
+            result = self._call("set", key, value, ex=ex, px=px, nx=nx)
+        except redis.RedisError:
+            if nx and self.local.get(key) is not None:
+                return False
+            result = True
+        if result:
+            self.local.set(key, value, ttl)
+        return result
+
+    def delete(self, *keys: str) -> None:
+        self.local.delete(*keys)
+        try:
+            self._call("delete", *keys)
+        except redis.RedisError:
+            pass
+
+    def expire(self, key: str, seconds: int) -> None:
+        self.local.expire(key, seconds)
+        try:
+            self._call("expire", key, seconds)
+        except redis.RedisError:
+            pass
+
+    def delete_if_equal(self, key: str, value: str) -> bool:
+        """Delete ``key`` only if it holds ``value``; return whether it did.
+
+        The compare and the delete run atomically in a Lua script, so a lock
+        released by its holder after it expired does not delete the lock
+        another holder has taken since.
+        """
+        if self.local.get(key) == value:
+            self.local.delete(key)
+        try:
+            return bool(self._call("eval", _DELETE_IF_EQUAL, 1, key, value))
+        except redis.RedisError:
+            return False
+
+    def ping(self) -> bool:
+        """Ping Redis directly; the result also updates the breaker."""
+        succeeded = False
+        try:
+            result = self.client.ping()
+            succeeded = True
+        finally:
+            self._record(succeeded)
+        return result
 
 
-redis_client = redis.Redis(
-    host=settings.REDIS_HOST,
-    port=settings.REDIS_PORT,
-    db=settings.REDIS_DB,
-    decode_responses=True,
+redis_client = ResilientRedis(
+    instrument_redis(
+        redis.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
+            decode_responses=True,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+        )
+    )
 )
 """Global Redis client used for caching user data."""
 
@@ -0,0 +1,188 @@
+"""Birthday reminder job that emails users a digest of upcoming birthdays.
+
+Users are read in keyset batches, birthdays for a whole batch are fetched with
+one query and every user receives a single digest email. Progress is stored in
+Redis so an interrupted run resumes where it stopped. A digest the mail server
+refuses (bad recipient, rejected data) is logged and skipped; on any other
+mail failure (:class:`~src.services.email.MailerError`, e.g. the server cannot
+be reached) the run stops and the next run resumes with that user.
+
+Run it from a scheduler (cron, Kubernetes CronJob) with::
+
+    python -m src.services.reminders
+"""
+
+import asyncio
+import logging
+import time
+from datetime import date
+from itertools import groupby
+
+from src.conf.config import settings
+from src.database.shards import ShardRouter
+from src.repository.contacts import ContactRepository
+from src.repository.users import UserRepository
+from src.services.email import MessageRejected, PooledMailer, send_birthday_digest
+
+logger = logging.getLogger(__name__)
+
+
+class SendThrottle:
+    """Space out sends so that no more than ``rate`` messages go out per second.
+
+    :param rate: Maximum number of messages per second. ``0`` disables throttling.
+    """
+
+    def __init__(self, rate: float, clock=time.monotonic, sleep=asyncio.sleep):
+        self.interval = 1 / rate if rate > 0 else 0
+        self._clock = clock
+        self._sleep = sleep
+        self._next_at = 0.0
+
+    async def wait(self) -> None:
+        """Sleep until the next send is allowed."""
+        if not self.interval:
+            return
+        now = self._clock()
+        if self._next_at > now:
+            await self._sleep(self._next_at - now)
+            now = self._next_at
+        self._next_at = now + self.interval
+
+
+class ReminderCheckpoint:
+    """Store the last processed user ID of a reminder run in Redis.
+
+    The key is scoped to the run date, so rerunning the job on the same day
+    continues after the last notified user and the next day starts over.
+
+    :param client: Redis client.
+    :param run_date: Date the reminders are computed for.
+    """
+
+    TTL_SECONDS = 2 * 24 * 3600
+
+    def __init__(self, client, run_date: date):
+        self.client = client
+        self.key = f"reminders:birthdays:{run_date.isoformat()}"
+
+    def load(self) -> int:
+        """Return the last processed user ID or 0 for a fresh run."""
+        value = self.client.get(self.key)
+        return int(value) if value is not None else 0
+
+    def save(self, user_id: int) -> None:
+        """Remember that all users up to ``user_id`` have been processed."""
+        self.client.set(self.key, str(user_id))
+        self.client.expire(self.key, self.TTL_SECONDS)
+
+
+class BirthdayReminderJob:
+    """Send birthday digest emails to all confirmed users.
+
+    :param session_factory: Callable returning an async session context manager.
+    :param mailer: Mailer used to deliver digests.
+    :param checkpoint: Checkpoint used to resume an interrupted run.
+    :param batch_size: Number of users loaded per batch.
+    :param days: Size of the birthday window in days.
+    :param send_rate: Maximum number of emails per second.
+    :param router: Shard router; when given, contacts of a batch are read
+        with one query per shard instead of from ``session_factory``.
+    """
+
+    def __init__(
+        self,
+        session_factory,
+        mailer: PooledMailer,
+        checkpoint: ReminderCheckpoint,
+        batch_size: int = settings.REMINDER_BATCH_SIZE,
+        days: int = settings.REMINDER_DAYS_AHEAD,
+        send_rate: float = settings.REMINDER_SEND_RATE,
+        router: ShardRouter | None = None,
+    ):
+        self.session_factory = session_factory
+        self.mailer = mailer
+        self.checkpoint = checkpoint
+        self.batch_size = batch_size
+        self.days = days
+        self.throttle = SendThrottle(send_rate)
+        self.router = router
+
+    async def _upcoming_birthdays(self, session, users: list, today: date):
+        user_ids = [user.id for user in users]
+        if self.router is None:
+            return await ContactRepository(session).get_upcoming_birthdays(
+                user_ids, today, self.days
+            )
+
+        pinned = {user.id: user.shard for user in users if user.shard}
+        contacts = []
+        for shard, shard_user_ids in self.router.group_by_shard(
+            user_ids, pinned
+        ).items():
+            async with self.router.shards[shard].read_session() as shard_session:
+                contacts += await ContactRepository(
+                    shard_session
+                ).get_upcoming_birthdays(shard_user_ids, today, self.days)
+        return sorted(contacts, key=lambda contact: contact.user_id)
+
+    async def run(self, today: date | None = None) -> int:
+        """Process all remaining users and return the number of digests sent."""
+        today = today or date.today()
+        last_id = self.checkpoint.load()
+        sent = 0
+
+        while True:
+            async with self.session_factory() as session:
+                users = await UserRepository(session).get_users_batch(
+                    last_id, self.batch_size
+                )
+                if not users:
+                    break
+                contacts = await self._upcoming_birthdays(session, users, today)
+
+            by_user = {
+                user_id: list(items)
+                for user_id, items in groupby(contacts, key=lambda c: c.user_id)
+            }
+            for user in users:
+                if user.id in by_user:
+                    await self.throttle.wait()
+                    try:
+                        await send_birthday_digest(
+                            self.mailer, user.email, user.username, by_user[user.id]
+                        )
+                    except MessageRejected as err:
+                        logger.warning(
+                            "Skipping birthday digest for user %s: %s", user.id, err
+                        )
+                    else:
+                        sent += 1
+                    self.checkpoint.save(user.id)
+
+            last_id = users[-1].id
+            self.checkpoint.save(last_id)
+
+        return sent
+
+
+async def main() -> int:
+    """Run the reminder job with the application's database and Redis."""
+    from src.database.db import sessionmanager
+    from src.database.shards import shard_router
+    from src.services.redis import redis_client
+
+    async with PooledMailer() as mailer:
+        job = BirthdayReminderJob(
+            sessionmanager.session,
+            mailer,
+            # The checkpoint must not silently fall back to process memory.
+            ReminderCheckpoint(redis_client.client, date.today()),
+            router=shard_router,
+        )
+        return await job.run()
+
+
+if __name__ == "__main__":
+    sent = asyncio.run(main())
+    print(f"Sent {sent} birthday digests")
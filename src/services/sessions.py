@@ -0,0 +1,26 @@
+"""Cleanup job that deletes expired refresh-token sessions.
+
+Logins only insert session rows, so expired ones stay in the table until
+this job deletes them.
+
+Run it from a scheduler (cron, Kubernetes CronJob) with::
+
+    python -m src.services.sessions
+"""
+
+import asyncio
+
+from src.repository.sessions import SessionRepository
+
+
+async def main() -> int:
+    """Delete expired sessions in the application's database."""
+    from src.database.db import sessionmanager
+
+    async with sessionmanager.session() as session:
+        return await SessionRepository(session).delete_expired()
+
+
+if __name__ == "__main__":
+    deleted = asyncio.run(main())
+    print(f"Deleted {deleted} expired sessions")
@@ -0,0 +1,432 @@
+"""Tracing hooks for the API, service, repository, cache and SQL layers.
+
+Spans follow the OpenTelemetry model: a trace ID shared by a request's
+spans, a span ID and parent per span, a kind, attributes and a status.
+``TRACING_EXPORTER`` selects where finished spans go:
+
+* ``log`` writes each span as a structured record of the ``tracing`` logger.
+* ``memory`` keeps them in :attr:`Tracer.exporter` for tests.
+* ``otel`` hands span creation to the ``opentelemetry`` API, which must be
+  installed and configured (SDK, exporter and sampler) by the deployment.
+
+Root spans are sampled with ``TRACING_SAMPLE_RATIO`` by trace ID, child spans
+follow their parent, and an incoming W3C ``traceparent`` header continues the
+caller's trace.
+
+With ``TRACING_ENABLED`` off, :data:`tracer` is None and the decorators and
+``instrument_*`` helpers return their argument unchanged, so nothing is
+added to any call.
+"""
+
+import contextlib
+import functools
+import inspect
+import logging
+import os
+import time
+from contextvars import ContextVar
+
+from fastapi.routing import APIRoute
+
+from src.conf.config import settings
+
+logger = logging.getLogger("tracing")
+
+_current_span: ContextVar["Span | None"] = ContextVar("current_span", default=None)
+
+_STATEMENT_MAX_LENGTH = 2000
+
+
+class Span:
+    """A timed operation within a trace.
+
+    :param name: Operation name, e.g. ``ContactRepository.get_contacts``.
+    :param trace_id: 128-bit trace ID.
+    :param parent_id: Span ID of the parent, None for a root span.
+    :param sampled: Unsampled spans propagate the trace but are not exported.
+    """
+
+    __slots__ = (
+        "name",
+        "kind",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "sampled",
+        "attributes",
+        "status",
+        "start_ns",
+        "end_ns",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: int,
+        parent_id: int | None = None,
+        sampled: bool = True,
+        kind: str = "internal",
+        attributes: dict | None = None,
+    ):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = int.from_bytes(os.urandom(8), "big")
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.attributes = dict(attributes or {})
+        self.status = "unset"
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+
+    def is_recording(self) -> bool:
+        return self.sampled and self.end_ns is None
+
+    def set_attribute(self, key: str, value) -> None:
+        if self.sampled:
+            self.attributes[key] = value
+
+    def set_status(self, status: str) -> None:
+        self.status = status
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.status = "error"
+        self.set_attribute("exception.type", type(exc).__name__)
+        self.set_attribute("exception.message", str(exc))
+
+    @property
+    def duration_ms(self) -> float | None:
+        if self.end_ns is None:
+            return None
+        return (self.end_ns - self.start_ns) / 1e6
+
+    @property
+    def traceparent(self) -> str:
+        """The span context as a W3C ``traceparent`` header value."""
+        flags = "01" if self.sampled else "00"
+        return f"00-{self.trace_id:032x}-{self.span_id:016x}-{flags}"
+
+
+def parse_traceparent(value: str | None) -> Span | None:
+    """Return a placeholder parent span for a W3C ``traceparent`` value."""
+    if not value:
+        return None
+    try:
+        version, trace_id, span_id, flags = value.strip().split("-")
+        parent = Span("remote", int(trace_id, 16), sampled=int(flags, 16) & 1 == 1)
+        parent.span_id = int(span_id, 16)
+    except ValueError:
+        return None
+    if version == "ff" or not parent.trace_id or not parent.span_id:
+        return None
+    return parent
+
+
+class InMemorySpanExporter:
+    """Keep finished spans in a list; used in tests."""
+
+    def __init__(self):
+        self.spans: list[Span] = []
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+    def names(self) -> list[str]:
+        return [span.name for span in self.spans]
+
+
+class LogSpanExporter:
+    """Write finished spans as structured ``tracing`` log records."""
+
+    def export(self, span: Span) -> None:
+        logger.info(
+            "span %s %.2f ms",
+            span.name,
+            span.duration_ms,
+            extra={
+                "trace_id": f"{span.trace_id:032x}",
+                "span_id": f"{span.span_id:016x}",
+                "parent_id": span.parent_id and f"{span.parent_id:016x}",
+                "span_kind": span.kind,
+                "span_status": span.status,
+                "duration_ms": round(span.duration_ms, 3),
+                "attributes": span.attributes,
+            },
+        )
+
+
+class Tracer:
+    """Create spans and export the sampled ones.
+
+    :param exporter: Object with an ``export(span)`` method.
+    :param sample_ratio: Share of root spans (traces) that are recorded.
+    """
+
+    def __init__(self, exporter, sample_ratio: float = 1.0):
+        self.exporter = exporter
+        self.sample_ratio = sample_ratio
+        self._bound = int(sample_ratio * 2**64)
+
+    def _sampled(self, trace_id: int) -> bool:
+        # Same decision as OpenTelemetry's TraceIdRatioBased sampler.
+        return (trace_id & (2**64 - 1)) < self._bound
+
+    @contextlib.contextmanager
+    def start_as_current_span(
+        self,
+        name: str,
+        kind: str = "internal",
+        attributes: dict | None = None,
+        parent: Span | None = None,
+    ):
+        """Run the block in a new span that is the current span meanwhile."""
+        parent = parent or _current_span.get()
+        if parent is None:
+            trace_id = int.from_bytes(os.urandom(16), "big")
+            span = Span(name, trace_id, None, self._sampled(trace_id), kind)
+        else:
+            span = Span(name, parent.trace_id, parent.span_id, parent.sampled, kind)
+        if span.sampled and attributes:
+            span.attributes.update(attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.record_exception(exc)
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end(span)
+
+    def end(self, span: Span) -> None:
+        span.end_ns = time.time_ns()
+        if span.sampled:
+            self.exporter.export(span)
+
+
+class _OpenTelemetryTracer:
+    """Adapter giving an ``opentelemetry`` tracer the :class:`Tracer` API."""
+
+    def __init__(self):
+        from opentelemetry import trace
+
+        self._trace = trace
+        self._tracer = trace.get_tracer("notebook-api")
+        self.exporter = None
+
+    def start_as_current_span(
+        self, name: str, kind: str = "internal", attributes=None, parent=None
+    ):
+        context = None
+        if parent is not None:
+            from opentelemetry.propagate import extract
+
+            context = extract({"traceparent": parent.traceparent})
+        return self._tracer.start_as_current_span(
+            name,
+            context=context,
+            kind=self._trace.SpanKind[kind.upper()],
+            attributes=attributes,
+        )
+
+
+def create_tracer(
+    enabled: bool = settings.TRACING_ENABLED,
+    exporter: str = settings.TRACING_EXPORTER,
+    sample_ratio: float = settings.TRACING_SAMPLE_RATIO,
+):
+    """Return the tracer selected by the settings, None when disabled."""
+    if not enabled:
+        return None
+    if exporter == "otel":
+        return _OpenTelemetryTracer()
+    if exporter == "memory":
+        return Tracer(InMemorySpanExporter(), sample_ratio)
+    return Tracer(LogSpanExporter(), sample_ratio)
+
+
+tracer = create_tracer()
+"""Global tracer, None when tracing is disabled."""
+
+
+def span(name: str, **attributes):
+    """Context manager running the block in a span; a no-op when disabled."""
+    if tracer is None:
+        return contextlib.nullcontext()
+    return tracer.start_as_current_span(name, attributes=attributes)
+
+
+def traced(name: str | None = None):
+    """Decorate a function or coroutine function to run in a span.
+
+    The function is returned unchanged when tracing is disabled.
+
+    :param name: Span name, the function's qualified name by default.
+    """
+
+    def decorator(func):
+        if tracer is None:
+            return func
+        span_name = name or func.__qualname__
+
+        if not inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with tracer.start_as_current_span(span_name):
+                    return func(*args, **kwargs)
+
+        else:
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with tracer.start_as_current_span(span_name):
+                    return await func(*args, **kwargs)
+
+        wrapper._traced = True
+        return wrapper
+
+    return decorator
+
+
+def trace_methods(cls):
+    """Class decorator tracing the public coroutine methods defined on ``cls``.
+
+    Spans are named ``<Class>.<method>``. A no-op when tracing is disabled.
+    """
+    if tracer is None:
+        return cls
+    for attr, value in list(vars(cls).items()):
+        if not attr.startswith("_") and inspect.iscoroutinefunction(value):
+            setattr(cls, attr, traced(f"{cls.__name__}.{attr}")(value))
+    return cls
+
+
+class _TracedRedis:
+    """Proxy running each Redis command of a client in a span."""
+
+    def __init__(self, client):
+        self._client = client
+
+    def __getattr__(self, attr):
+        value = getattr(self._client, attr)
+        if not callable(value) or attr.startswith("_"):
+            return value
+
+        @functools.wraps(value)
+        def command(*args, **kwargs):
+            with tracer.start_as_current_span(
+                f"redis.{attr}",
+                kind="client",
+                attributes={"db.system": "redis", "db.operation": attr.upper()},
+            ):
+                return value(*args, **kwargs)
+
+        return command
+
+
+def instrument_redis(client):
+    """Wrap a synchronous Redis client so its commands are traced."""
+    if tracer is None:
+        return client
+    return _TracedRedis(client)
+
+
+def instrument_engine(engine) -> None:
+    """Trace every statement executed by a SQLAlchemy (async) engine."""
+    if tracer is None:
+        return
+    from sqlalchemy import event
+
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, params, context, many):
+        manager = tracer.start_as_current_span(
+            "db.query",
+            kind="client",
+            attributes={
+                "db.system": sync_engine.dialect.name,
+                "db.statement": statement[:_STATEMENT_MAX_LENGTH],
+            },
+        )
+        manager.__enter__()
+        context._trace_span = manager
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, params, context, many):
+        manager = context.__dict__.pop("_trace_span", None)
+        if manager is not None:
+            manager.__exit__(None, None, None)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(exception_context):
+        context = exception_context.execution_context
+        manager = context and context.__dict__.pop("_trace_span", None)
+        if manager is not None:
+            exc = exception_context.original_exception
+            manager.__exit__(type(exc), exc, exc.__traceback__)
+
+
+class TracedRoute(APIRoute):
+    """Route class running each endpoint in a ``route.<name>`` span.
+
+    The gap between the server span and the endpoint span is dependency
+    resolution and response serialization.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        # include_router() builds new routes from already wrapped endpoints.
+        if not getattr(endpoint, "_traced", False):
+            endpoint = traced(f"route.{endpoint.__name__}")(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+class TracingMiddleware:
+    """ASGI middleware opening the server span of each HTTP request.
+
+    The span is named after the matched route template and records the
+    method, route and status code. The trace context is returned in the
+    ``traceparent`` response header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or tracer is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        parent = parse_traceparent(headers.get(b"traceparent", b"").decode())
+        with tracer.start_as_current_span(
+            f"HTTP {scope['method']}", kind="server", parent=parent
+        ) as server_span:
+
+            async def send_with_context(message):
+                if message["type"] == "http.response.start":
+                    server_span.set_attribute("http.status_code", message["status"])
+                    if isinstance(server_span, Span):
+                        if message["status"] >= 500:
+                            server_span.set_status("error")
+                        message["headers"] = [
+                            *message.get("headers", ()),
+                            (b"traceparent", server_span.traceparent.encode()),
+                        ]
+                await send(message)
+
+            server_span.set_attribute("http.method", scope["method"])
+            try:
+                await self.app(scope, receive, send_with_context)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route is not None:
+                    server_span.set_attribute("http.route", route)
+                    if isinstance(server_span, Span):
+                        server_span.name = f"HTTP {scope['method']} {route}"
+                    else:
+                        server_span.update_name(f"HTTP {scope['method']} {route}")
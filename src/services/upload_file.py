@@ -1,7 +1,7 @@
-"""Service for uploading user files (avatars) to Cloudinary."""
+"""Service for uploading user files (avatars) to Cloudinary.
 
-import cloudinary
-import cloudinary.uploader
+The Cloudinary SDK is imported on first use to keep application start fast.
+"""
 
 
 class UploadFileService:
@@ -16,6 +16,8 @@ class UploadFileService:
         self.cloud_name = cloud_name
         self.api_key = api_key
         self.api_secret = api_secret
+        import cloudinary
+
         cloudinary.config(
             cloud_name=self.cloud_name,
             api_key=self.api_key,
@@ -31,6 +33,9 @@ class UploadFileService:
         :param username: Username used to build a stable public ID.
         :return: Public URL of the uploaded image.
         """
+        import cloudinary
+        import cloudinary.uploader
+
         public_id = f"RestApp/{username}"
         r = cloudinary.uploader.upload(file.file, public_id=public_id, overwrite=True)
         src_url = cloudinary.CloudinaryImage(public_id).build_url(
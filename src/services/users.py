@@ -1,28 +1,70 @@
 """Service layer for business logic related to users."""
 
+import logging
+
 from sqlalchemy.ext.asyncio import AsyncSession
-from libgravatar import Gravatar
 
+from src.repository.sessions import SessionRepository
 from src.repository.users import UserRepository
 from src.schemas import UserCreate
+from src.services import avatars
+from src.services.tracing import trace_methods
+
+logger = logging.getLogger(__name__)
 
 
+@trace_methods
 class UserService:
-    """High-level service for working with users via UserRepository."""
+    """High-level service for working with users via UserRepository.
+
+    :param db: Async database session.
+    :param avatar_resolver: Resolver for avatars of new users, the global
+        ``avatars.avatar_resolver`` by default.
+    """
 
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, avatar_resolver=None):
         self.repository = UserRepository(db)
+        self.sessions = SessionRepository(db)
+        self.avatar_resolver = avatar_resolver or avatars.avatar_resolver
 
     async def create_user(self, body: UserCreate):
-        """Create user and try to generate a Gravatar avatar."""
-        avatar = None
+        """Create a user without an avatar; see :meth:`resolve_avatar`."""
+        return await self.repository.create_user(body)
+
+    async def conflicting_field(self, email: str, username: str) -> str | None:
+        """Return the field that clashes with an existing user, if any."""
+        return await self.repository.conflicting_field(email, username)
+
+    async def resolve_avatar(self, user_id: int, email: str) -> str:
+        """Look up the avatar of a new user and store it.
+
+        Meant to run as a background task after registration.
+        """
+        # Finish the registration transaction so no pooled connection is
+        # held while the avatar is looked up.
+        await self.repository.db.commit()
+        avatar = await self.avatar_resolver.resolve(email)
+        await self.repository.set_avatar(user_id, avatar)
+        return avatar
+
+    async def record_session(self, user_id: int, jti: str, expires_at) -> None:
+        """Persist the session of a refresh token issued at login.
+
+        Meant to run as a background task after the login response is sent,
+        so a refresh sent before the row is committed gets 401. Failures are
+        logged: the refresh token stays unusable and the user has to log in
+        again.
+        """
         try:
-            g = Gravatar(body.email)
-            avatar = g.get_image()
-        except Exception as e:
-            print(e)
+            await self.sessions.add(user_id, jti, expires_at)
+        except Exception:
+            logger.exception("Failed to record session %s of user %s", jti, user_id)
+            # Leave the session usable for the following background tasks.
+            await self.sessions.db.rollback()
 
-        return await self.repository.create_user(body, avatar)
+    async def has_session(self, user_id: int, jti: str) -> bool:
+        """Return True if the refresh-token session is active."""
+        return await self.sessions.is_active(user_id, jti)
 
     async def get_user_by_id(self, user_id: int):
         """Simple getter."""
@@ -44,6 +86,10 @@ class UserService:
         """Mark email as confirmed."""
         return await self.repository.confirmed_email(email)
 
+    async def rehash_password(self, user_id: int, old_hash: str, new_hash: str):
+        """Store a password hash upgraded at login; run in the background."""
+        return await self.repository.replace_password_hash(user_id, old_hash, new_hash)
+
     async def update_password(self, email: str, hashed_password: str):
-        """Update password and clear refresh token."""
+        """Update password and revoke refresh-token sessions."""
         return await self.repository.update_password(email, hashed_password)
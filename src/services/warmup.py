@@ -0,0 +1,68 @@
+"""Application start-up warm-up.
+
+Heavy resources are created lazily, so the first requests would pay for
+opening database connections, loading the bcrypt backend and compiling email
+templates. :func:`warm_up` does that work at start-up instead, in a fixed
+order, and reports how long each step took.
+"""
+
+import asyncio
+import logging
+import time
+
+from src.conf.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+async def _database(connections: int) -> None:
+    from src.database.shards import shard_router
+
+    await shard_router.warm_up(connections)
+
+
+async def _redis() -> None:
+    from src.services import auth
+
+    ping = getattr(auth.redis_client, "ping", None)
+    if ping is not None:
+        await asyncio.to_thread(ping)
+
+
+async def _password_hashing() -> None:
+    from src.services.auth import prime_password_hashing
+
+    prime_password_hashing()
+
+
+async def _email_templates() -> None:
+    from src.services.email import compile_templates
+
+    compile_templates()
+
+
+async def warm_up(
+    db_connections: int = settings.WARMUP_DB_CONNECTIONS,
+) -> dict[str, float]:
+    """Run all warm-up steps and return their durations in seconds.
+
+    A failing step is logged and skipped; it must not keep the application
+    from starting, the readiness checks report broken dependencies.
+
+    :param db_connections: Connections opened per database pool.
+    """
+    steps = {
+        "database": lambda: _database(db_connections),
+        "redis": _redis,
+        "password_hashing": _password_hashing,
+        "email_templates": _email_templates,
+    }
+    timings = {}
+    for name, step in steps.items():
+        started = time.perf_counter()
+        try:
+            await step()
+        except Exception:
+            logger.exception("Warm-up step %s failed", name)
+        timings[name] = time.perf_counter() - started
+    return timings
@@ -13,8 +13,11 @@ sys.path.insert(0, str(BASE_DIR))
 
 from main import app
 from src.database.models import Base
-from src.database.db import get_db
+from src.database.db import get_db, get_read_db
 from src.services import auth as auth_service
+from src.services import avatars
+from src.api.contacts import get_contact_db, get_contact_read_db
+from tests.fakes import DummyRedis
 
 
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
@@ -33,21 +36,9 @@ async def override_get_db():
 
 
 app.dependency_overrides[get_db] = override_get_db
-
-
-class DummyRedis:
-    def __init__(self):
-        self.store = {}
-
-    def get(self, key: str):
-        return self.store.get(key)
-
-    def set(self, key: str, value: str):
-        self.store[key] = value
-
-    def expire(self, key: str, seconds: int):
-
-        pass
+app.dependency_overrides[get_read_db] = override_get_db
+app.dependency_overrides[get_contact_db] = override_get_db
+app.dependency_overrides[get_contact_read_db] = override_get_db
 
 
 @pytest_asyncio.fixture(scope="session", autouse=True)
@@ -57,6 +48,7 @@ async def prepare_database():
         await conn.run_sync(Base.metadata.create_all)
 
     auth_service.redis_client = DummyRedis()
+    avatars.avatar_resolver = avatars.OfflineAvatarResolver()
 
     yield
 
@@ -70,6 +62,12 @@ async def db_session():
         yield session
 
 
+@pytest.fixture
+def session_factory():
+
+    return AsyncSessionLocal
+
+
 @pytest_asyncio.fixture
 async def client():
 
@@ -0,0 +1,63 @@
+"""In-memory stand-ins shared by the tests and the load test."""
+
+import time
+
+
+class DummyRedis:
+    """Dict-backed replacement for the synchronous Redis client.
+
+    Supports the commands the application uses, including ``SET`` with
+    ``EX``/``PX``/``NX`` and key expiry. Values live in :attr:`store` and
+    expiry times (``time.monotonic``) in :attr:`expires`, so tests can
+    inspect or seed them directly.
+    """
+
+    def __init__(self):
+        self.store = {}
+        self.expires = {}
+
+    def _alive(self, key: str) -> bool:
+        expires = self.expires.get(key)
+        if expires is not None and time.monotonic() >= expires:
+            self.store.pop(key, None)
+            del self.expires[key]
+        return key in self.store
+
+    def get(self, key: str):
+        return self.store.get(key) if self._alive(key) else None
+
+    def set(self, key: str, value: str, ex=None, px=None, nx=False):
+        if nx and self._alive(key):
+            return False
+        self.store[key] = value
+        self.expires.pop(key, None)
+        if ex is not None:
+            self.expire(key, ex)
+        elif px is not None:
+            self.expire(key, px / 1000)
+        return True
+
+    def delete(self, *keys: str) -> int:
+        deleted = 0
+        for key in keys:
+            deleted += self._alive(key)
+            self.store.pop(key, None)
+            self.expires.pop(key, None)
+        return deleted
+
+    def delete_if_equal(self, key: str, value: str) -> bool:
+        if self.get(key) != value:
+            return False
+        return bool(self.delete(key))
+
+    def expire(self, key: str, seconds: float) -> bool:
+        if not self._alive(key):
+            return False
+        self.expires[key] = time.monotonic() + seconds
+        return True
+
+    def ttl(self, key: str) -> float | None:
+        """Return the seconds left before ``key`` expires, None if it never does."""
+        if not self._alive(key) or key not in self.expires:
+            return None
+        return self.expires[key] - time.monotonic()
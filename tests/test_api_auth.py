@@ -1,6 +1,7 @@
 import pytest
 
 from src.repository.users import UserRepository
+from src.services.users import UserService
 from src.schemas import UserCreate
 from src.services.auth import create_access_token
 
@@ -10,6 +11,7 @@ from src.services.auth import create_email_token, Hash
 import src.services.email as email_module
 
 import src.api.auth as auth_module
+from src.services.avatars import fallback_avatar
 
 
 @pytest.mark.asyncio
@@ -33,6 +35,7 @@ async def test_register_and_login(client, db_session, monkeypatch):
 
     repo = UserRepository(db_session)
     user = await repo.get_user_by_email("test2@example.com")
+    assert user.avatar == fallback_avatar("test2@example.com")
     user.confirmed = True
     await db_session.commit()
     await db_session.refresh(user)
@@ -85,6 +88,125 @@ async def test_password_reset_flow(client, db_session):
     assert data["message"] == "Password has been successfully reset"
 
 
+@pytest.mark.asyncio
+async def test_login_does_not_write_user_and_reset_revokes(client, db_session):
+    repo = UserRepository(db_session)
+    user = await repo.create_user(
+        UserCreate(
+            username="session_user",
+            email="session@example.com",
+            password=Hash().get_password_hash("secret"),
+            role="user",
+        )
+    )
+    user.confirmed = True
+    await db_session.commit()
+
+    resp = await client.post(
+        "/api/auth/login",
+        data={"username": "session_user", "password": "secret"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    assert resp.status_code == 200
+    refresh_token = resp.json()["refresh_token"]
+    await db_session.refresh(user)
+    assert user.refresh_token is None
+
+    resp = await client.post(
+        "/api/auth/refresh-token", json={"refresh_token": refresh_token}
+    )
+    assert resp.status_code == 200
+
+    token = create_email_token({"sub": user.email})
+    resp = await client.post(
+        f"/api/auth/reset_password?token={token}", json={"password": "newpass"}
+    )
+    assert resp.status_code == 200
+
+    resp = await client.post(
+        "/api/auth/refresh-token", json={"refresh_token": refresh_token}
+    )
+    assert resp.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_refresh_before_session_is_recorded(
+    client, db_session, monkeypatch, caplog
+):
+    repo = UserRepository(db_session)
+    user = await repo.create_user(
+        UserCreate(
+            username="early_refresh",
+            email="early_refresh@example.com",
+            password=Hash().get_password_hash("secret"),
+            role="user",
+        )
+    )
+    user.confirmed = True
+    await db_session.commit()
+
+    pending = []
+
+    async def deferred_record_session(self, user_id, jti, expires_at):
+        pending.append((self, user_id, jti, expires_at))
+
+    monkeypatch.setattr(UserService, "record_session", deferred_record_session)
+    resp = await client.post(
+        "/api/auth/login",
+        data={"username": "early_refresh", "password": "secret"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    refresh_token = resp.json()["refresh_token"]
+    monkeypatch.undo()
+
+    # The background insert has not run yet: the refresh is rejected.
+    resp = await client.post(
+        "/api/auth/refresh-token", json={"refresh_token": refresh_token}
+    )
+    assert resp.status_code == 401
+
+    _, *args = pending[0]
+    await UserService.record_session(UserService(db_session), *args)
+    resp = await client.post(
+        "/api/auth/refresh-token", json={"refresh_token": refresh_token}
+    )
+    assert resp.status_code == 200
+
+    # A failed insert is logged instead of lost in the server's task runner.
+    with caplog.at_level("ERROR", logger="src.services.users"):
+        await UserService(db_session).record_session(*args)
+    assert "Failed to record session" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_login_upgrades_outdated_hash(client, db_session):
+    from passlib.hash import bcrypt
+
+    repo = UserRepository(db_session)
+    old_hash = bcrypt.using(rounds=4).hash("secret")
+    user = await repo.create_user(
+        UserCreate(
+            username="rehash_user",
+            email="rehash@example.com",
+            password=old_hash,
+            role="user",
+        )
+    )
+    user.confirmed = True
+    await db_session.commit()
+
+    resp = await client.post(
+        "/api/auth/login",
+        data={"username": "rehash_user", "password": "secret"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    assert resp.status_code == 200
+    await db_session.refresh(user)
+    assert user.hashed_password != old_hash
+    assert not Hash().pwd_context.needs_update(user.hashed_password)
+    assert Hash().verify_password("secret", user.hashed_password)
+
+
 @pytest.mark.asyncio
 async def test_request_email_wrong_mail(client, db_session, monkeypatch):
     async def fake_send_email(email, username, host):
@@ -149,3 +271,39 @@ async def test_refresh_token_invalid(client):
     assert resp.status_code == 401
     data = resp.json()
     assert "Invalid or expired refresh token" in data["detail"]
+
+
+@pytest.mark.asyncio
+async def test_register_conflicts(client, monkeypatch):
+    async def fake_send_email(email, username, host):
+        pass
+
+    monkeypatch.setattr(auth_module, "send_email", fake_send_email)
+
+    payload = {
+        "username": "conflict_user",
+        "email": "conflict@example.com",
+        "password": "password123",
+        "role": "user",
+    }
+    response = await client.post("/api/auth/register", json=payload)
+    assert response.status_code == 201
+
+    response = await client.post(
+        "/api/auth/register", json={**payload, "username": "other_name"}
+    )
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Email is used"
+
+    response = await client.post(
+        "/api/auth/register", json={**payload, "email": "other@example.com"}
+    )
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Name is used"
+
+    # Duplicates are rejected before the password is hashed.
+    hashed = []
+    monkeypatch.setattr(Hash, "get_password_hash", lambda self, p: hashed.append(p))
+    response = await client.post("/api/auth/register", json=payload)
+    assert response.status_code == 409
+    assert hashed == []
@@ -1,8 +1,15 @@
+import contextlib
+
 import pytest
+from fastapi import HTTPException
+
+from src.api import contacts as contacts_api
+from src.api.contacts import get_contact_db, get_contact_read_db
 
 from src.repository.users import UserRepository
-from src.schemas import UserCreate
+from src.schemas import ContactGet, UserCreate
 from src.services.auth import create_access_token
+from src.services.redis import CachedObject
 
 from datetime import date, timedelta
 
@@ -112,3 +119,323 @@ async def test_upcoming_birthdays(client, db_session):
 
     assert len(data["data"]) == 1
     assert data["data"][0]["email"] == "near@example.com"
+
+
+@pytest.mark.asyncio
+async def test_read_contacts_rows_match_schema(client, db_session):
+    user_repo = UserRepository(db_session)
+    user = await user_repo.create_user(
+        UserCreate(
+            username="rows_owner",
+            email="rows_owner@example.com",
+            password="pass",
+            role="user",
+        )
+    )
+    user.confirmed = True
+    await db_session.commit()
+
+    token = await create_access_token({"sub": user.username})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    payload = {
+        "first_name": "Row",
+        "last_name": "Owner",
+        "email": "row@example.com",
+        "phone": "+380123456789",
+        "birthday": "1990-02-03",
+        "extra_info": None,
+    }
+    created = await client.post("/api/contacts/", json=payload, headers=headers)
+
+    response = await client.get("/api/contacts/", headers=headers)
+    assert response.status_code == 200
+    rows = response.json()["data"]
+    assert rows == [created.json()]
+    assert set(rows[0]) == set(ContactGet.model_fields)
+
+
+@pytest.mark.asyncio
+async def test_batch_contacts(client, db_session, monkeypatch):
+    user_repo = UserRepository(db_session)
+    user = await user_repo.create_user(
+        UserCreate(
+            username="batch_owner",
+            email="batch_owner@example.com",
+            password="pass",
+            role="user",
+        )
+    )
+    user.confirmed = True
+    await db_session.commit()
+
+    token = await create_access_token({"sub": user.username})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def contact(name):
+        return {
+            "first_name": name,
+            "last_name": "Batch",
+            "email": f"{name.lower()}@example.com",
+            "phone": "+380123456789",
+            "birthday": "1990-01-01",
+        }
+
+    existing = await client.post("/api/contacts/", json=contact("Old"), headers=headers)
+    existing_id = existing.json()["id"]
+
+    response = await client.post(
+        "/api/contacts/batch",
+        json={
+            "operations": [
+                {"op": "create", "data": contact("Ann")},
+                {"op": "update", "id": existing_id, "data": {"first_name": "New"}},
+                {"op": "create", "data": contact("Bob")},
+                {"op": "delete", "id": 999999},
+            ]
+        },
+        headers=headers,
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["status"] for r in results] == [201, 200, 201, 404]
+    assert results[0]["data"]["first_name"] == "Ann"
+    assert results[1]["data"]["first_name"] == "New"
+    assert results[2]["data"]["first_name"] == "Bob"
+
+    response = await client.post(
+        "/api/contacts/batch",
+        json={"operations": [{"op": "delete", "id": results[0]["id"]}]},
+        headers=headers,
+    )
+    assert response.json()["results"][0]["status"] == 200
+
+    rows = (await client.get("/api/contacts/", headers=headers)).json()["data"]
+    assert sorted(row["first_name"] for row in rows) == ["Bob", "New"]
+
+    monkeypatch.setattr("src.api.contacts.settings.CONTACT_BATCH_MAX_SIZE", 1)
+    response = await client.post(
+        "/api/contacts/batch",
+        json={"operations": [{"op": "delete", "id": 1}, {"op": "delete", "id": 2}]},
+        headers=headers,
+    )
+    assert response.status_code == 413
+
+
+@pytest.mark.asyncio
+async def test_duplicates_and_merge(client, db_session):
+    user_repo = UserRepository(db_session)
+    user = await user_repo.create_user(
+        UserCreate(
+            username="dedup_owner",
+            email="dedup_owner@example.com",
+            password="pass",
+            role="user",
+        )
+    )
+    user.confirmed = True
+    await db_session.commit()
+
+    token = await create_access_token({"sub": user.username})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    payloads = [
+        ("Ann", "ann@example.com", "+380 12 345 67 89", None),
+        ("Ann", "ANN@example.com", "(012) 000-00-00", "friend"),
+        ("Annie", "annie@example.com", "+380123456789", None),
+        ("Bob", "bob@example.com", "+1-555-000-1111", None),
+    ]
+    ids = []
+    for first_name, email, phone, extra_info in payloads:
+        response = await client.post(
+            "/api/contacts/",
+            json={
+                "first_name": first_name,
+                "last_name": "Dup",
+                "email": email,
+                "phone": phone,
+                "birthday": "1990-01-01",
+                "extra_info": extra_info,
+            },
+            headers=headers,
+        )
+        ids.append(response.json()["id"])
+
+    response = await client.get("/api/contacts/duplicates", headers=headers)
+    assert response.status_code == 200
+    clusters = response.json()["data"]
+    assert len(clusters) == 1
+    assert clusters[0]["keys"] == ["email", "phone"]
+    assert [c["id"] for c in clusters[0]["contacts"]] == ids[:3]
+
+    response = await client.post(
+        "/api/contacts/duplicates/merge",
+        json={"primary_id": ids[0], "duplicate_ids": ids[1:3]},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    assert response.json()["extra_info"] == "friend"
+
+    response = await client.get("/api/contacts/duplicates", headers=headers)
+    assert response.json()["data"] == []
+
+    response = await client.post(
+        "/api/contacts/duplicates/merge",
+        json={"primary_id": ids[0], "duplicate_ids": [ids[1]]},
+        headers=headers,
+    )
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_changes_since_sync_token(client, db_session):
+    user_repo = UserRepository(db_session)
+    user = await user_repo.create_user(
+        UserCreate(
+            username="sync_owner",
+            email="sync_owner@example.com",
+            password="pass",
+            role="user",
+        )
+    )
+    user.confirmed = True
+    await db_session.commit()
+
+    token = await create_access_token({"sub": user.username})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    ids = []
+    for name in ("Ann", "Bob", "Cid"):
+        response = await client.post(
+            "/api/contacts/",
+            json={
+                "first_name": name,
+                "last_name": "Sync",
+                "email": f"{name.lower()}@example.com",
+                "phone": "+380123456789",
+                "birthday": "1990-01-01",
+            },
+            headers=headers,
+        )
+        ids.append(response.json()["id"])
+
+    response = await client.get("/api/contacts/changes", headers=headers)
+    assert response.status_code == 200
+    full = response.json()
+    assert [row["id"] for row in full["data"]] == ids
+    assert full["deleted"] == []
+
+    await client.patch(
+        f"/api/contacts/{ids[0]}", json={"first_name": "Anna"}, headers=headers
+    )
+    await client.delete(f"/api/contacts/{ids[1]}", headers=headers)
+
+    response = await client.get(
+        "/api/contacts/changes",
+        params={"since": full["sync_token"]},
+        headers=headers,
+    )
+    delta = response.json()
+    assert [row["first_name"] for row in delta["data"]] == ["Anna"]
+    assert delta["deleted"] == [ids[1]]
+    assert delta["sync_token"] > full["sync_token"]
+
+    response = await client.get(
+        "/api/contacts/changes",
+        params={"since": delta["sync_token"]},
+        headers=headers,
+    )
+    assert response.json() == {
+        "data": [],
+        "deleted": [],
+        "sync_token": delta["sync_token"],
+        "next_cursor": None,
+    }
+
+    response = await client.get(f"/api/contacts/{ids[1]}", headers=headers)
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_changes_are_paged_within_a_version(client, db_session):
+    user_repo = UserRepository(db_session)
+    user = await user_repo.create_user(
+        UserCreate(
+            username="paging_owner",
+            email="paging_owner@example.com",
+            password="pass",
+            role="user",
+        )
+    )
+    user.confirmed = True
+    await db_session.commit()
+
+    token = await create_access_token({"sub": user.username})
+    headers = {"Authorization": f"Bearer {token}"}
+    # All contacts of one batch share a version.
+    response = await client.post(
+        "/api/contacts/batch",
+        json={
+            "operations": [
+                {
+                    "op": "create",
+                    "data": {
+                        "first_name": f"Page{i}",
+                        "last_name": "Sync",
+                        "email": f"page{i}@example.com",
+                        "phone": "+380123456789",
+                        "birthday": "1990-01-01",
+                    },
+                }
+                for i in range(5)
+            ]
+        },
+        headers=headers,
+    )
+    assert response.status_code == 200
+
+    names, params, pages = [], {"since": 0, "limit": 2}, []
+    while True:
+        page = (
+            await client.get("/api/contacts/changes", params=params, headers=headers)
+        ).json()
+        pages.append(page)
+        names += [row["first_name"] for row in page["data"]]
+        if page["next_cursor"] is None:
+            break
+        params["cursor"] = page["next_cursor"]
+
+    assert names == [f"Page{i}" for i in range(5)]
+    assert len(pages) == 3
+    assert pages[-1]["sync_token"] == pages[0]["sync_token"]
+
+    response = await client.get(
+        "/api/contacts/changes", params={"cursor": "x"}, headers=headers
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_contact_writes_are_rejected_while_moving_shards():
+    user = CachedObject(id=1, shard="a", shard_moving=True)
+    with pytest.raises(HTTPException) as exc:
+        await anext(get_contact_db(request=None, user=user))
+    assert exc.value.status_code == 503
+    assert exc.value.headers["Retry-After"] == "5"
+
+
+@pytest.mark.asyncio
+async def test_contact_reads_use_the_primary_while_moving_shards(monkeypatch):
+    modes = []
+
+    @contextlib.asynccontextmanager
+    async def fake_request_session(request, manager=None, read_only=False):
+        modes.append(read_only)
+        yield None
+
+    monkeypatch.setattr(contacts_api, "request_session", fake_request_session)
+    for moving in (False, True):
+        user = CachedObject(id=1, shard=None, shard_moving=moving)
+        await anext(get_contact_read_db(request=None, user=user))
+
+    assert modes == [True, False]
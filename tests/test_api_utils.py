@@ -1,5 +1,9 @@
+import asyncio
+
 import pytest
 
+from src.services import health
+
 
 @pytest.mark.asyncio
 async def test_healthchecker_ok(client):
@@ -7,3 +11,59 @@ async def test_healthchecker_ok(client):
     assert response.status_code == 200
     data = response.json()
     assert data["message"] == "Welcome to FastAPI!"
+
+
+@pytest.mark.asyncio
+async def test_live(client):
+    response = await client.get("/api/live")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
+
+
+@pytest.mark.asyncio
+async def test_ready_reports_checks_and_caches(client, monkeypatch):
+    calls = []
+
+    async def database():
+        calls.append("database")
+        return {"pool_checked_out": 0}
+
+    async def redis():
+        calls.append("redis")
+        raise ConnectionError("refused")
+
+    async def mail():
+        await asyncio.sleep(1)
+
+    checker = health.HealthChecker(
+        {"database": database, "redis": redis, "mail": mail},
+        critical=["database"],
+        timeout=0.05,
+        ttl=60,
+    )
+    monkeypatch.setattr(health, "health_checker", checker)
+
+    responses = await asyncio.gather(*(client.get("/api/ready") for _ in range(5)))
+    assert {r.status_code for r in responses} == {200}
+    assert calls == ["database", "redis"]
+
+    report = responses[0].json()
+    assert report["status"] == "degraded"
+    assert report["checks"]["database"]["status"] == "ok"
+    assert report["checks"]["database"]["pool_checked_out"] == 0
+    assert report["checks"]["redis"]["error"] == "ConnectionError: refused"
+    assert report["checks"]["mail"]["status"] == "timeout"
+    assert report["checks"]["mail"]["latency_ms"] >= 50
+
+
+@pytest.mark.asyncio
+async def test_ready_fails_on_critical_dependency(client, monkeypatch):
+    async def database():
+        raise OSError("down")
+
+    checker = health.HealthChecker({"database": database}, critical=["database"])
+    monkeypatch.setattr(health, "health_checker", checker)
+
+    response = await client.get("/api/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "unavailable"
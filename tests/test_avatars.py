@@ -0,0 +1,70 @@
+import httpx
+import pytest
+
+from src.services.avatars import (
+    GRAVATAR_URL,
+    GravatarResolver,
+    email_hash,
+    fallback_avatar,
+)
+
+
+class MemoryCache:
+    def __init__(self):
+        self.store = {}
+        self.ttls = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def set(self, key, value, ex=None):
+        self.store[key] = value
+        self.ttls[key] = ex
+
+
+def resolver_for(status_codes: dict, cache=None):
+    requests = []
+
+    def handler(request):
+        requests.append(request.url.path)
+        digest = request.url.path.rsplit("/", 1)[-1]
+        return httpx.Response(status_codes.get(digest, 404))
+
+    resolver = GravatarResolver(
+        cache or MemoryCache(), transport=httpx.MockTransport(handler)
+    )
+    return resolver, requests
+
+
+@pytest.mark.asyncio
+async def test_found_avatar_is_cached():
+    digest = email_hash("Found@Example.com ")
+    resolver, requests = resolver_for({digest: 200})
+
+    assert await resolver.resolve("found@example.com") == f"{GRAVATAR_URL}{digest}"
+    assert await resolver.resolve("found@example.com") == f"{GRAVATAR_URL}{digest}"
+    assert len(requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_missing_avatar_is_negatively_cached():
+    cache = MemoryCache()
+    resolver, requests = resolver_for({}, cache)
+
+    for _ in range(2):
+        avatar = await resolver.resolve("nobody@example.com")
+        assert avatar == fallback_avatar("nobody@example.com")
+    assert len(requests) == 1
+    assert list(cache.ttls.values()) == [resolver.negative_ttl]
+
+
+@pytest.mark.asyncio
+async def test_lookup_errors_fall_back_without_caching():
+    def handler(request):
+        raise httpx.ConnectError("offline")
+
+    cache = MemoryCache()
+    resolver = GravatarResolver(cache, transport=httpx.MockTransport(handler))
+
+    assert await resolver.resolve("a@example.com") == fallback_avatar("a@example.com")
+    assert cache.store == {}
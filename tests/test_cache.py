@@ -0,0 +1,260 @@
+import asyncio
+import json
+import time
+
+import pytest
+from fastapi.security import HTTPAuthorizationCredentials
+
+from src.repository.contacts import ContactRepository
+from src.repository.users import UserRepository
+from src.schemas import ContactCreate, UserCreate
+from src.services import auth as auth_service
+from src.services import cache as cache_module
+from src.services.auth import create_access_token, get_current_user
+from src.services.cache import CoalescingCache, jittered_ttl, should_refresh_early
+from src.services.contacts import ContactService
+from src.services.singleflight import SingleFlight
+from tests.fakes import DummyRedis
+
+
+def counting_loader(value="loaded", delay=0.05):
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return value
+
+    return loader, calls
+
+
+def test_jittered_ttl_and_early_refresh():
+    ttls = {jittered_ttl(1000, 0.2) for _ in range(200)}
+    assert min(ttls) >= 800 and max(ttls) <= 1000
+    assert len(ttls) > 1
+
+    assert should_refresh_early(0.01, time.time() - 1)
+    assert not should_refresh_early(0.01, time.time() + 3600)
+    # A slow load refreshes earlier than a fast one.
+    expires = time.time() + 1
+    slow = sum(should_refresh_early(1.0, expires) for _ in range(1000))
+    fast = sum(should_refresh_early(0.01, expires) for _ in range(1000))
+    assert slow > fast
+
+
+@pytest.mark.asyncio
+async def test_singleflight_shares_result_and_errors():
+    flight = SingleFlight()
+    loader, calls = counting_loader()
+
+    results = await asyncio.gather(*(flight.do("k", loader) for _ in range(10)))
+    assert results == ["loaded"] * 10
+    assert len(calls) == 1
+    assert not flight.in_flight("k")
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(
+        *(flight.do("k", fail) for _ in range(3)), return_exceptions=True
+    )
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_singleflight_follower_retries_after_leader_cancelled():
+    flight = SingleFlight()
+    loader, calls = counting_loader()
+
+    leader = asyncio.create_task(flight.do("k", loader))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.do("k", loader))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await follower == "loaded"
+    assert leader.cancelled()
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_workers_share_one_load_through_redis_lock():
+    client = DummyRedis()
+    workers = [CoalescingCache(ttl=60, lock_wait=1.0) for _ in range(3)]
+    loader, calls = counting_loader({"id": 1})
+
+    results = await asyncio.gather(
+        *(
+            worker.get_or_load(client, "user:a", loader)
+            for worker in workers
+            for _ in range(10)
+        )
+    )
+
+    assert results == [{"id": 1}] * 30
+    assert len(calls) == 1
+    entry = json.loads(client.store["user:a"])
+    assert entry["value"] == {"id": 1}
+    assert entry["expires"] > time.time()
+    assert 0 < client.ttl("user:a") <= 60
+    assert "lock:user:a" not in client.store
+
+
+@pytest.mark.asyncio
+async def test_slow_load_does_not_release_a_lock_taken_after_it_expired():
+    client = DummyRedis()
+    cache = CoalescingCache(ttl=60, lock_ms=10)
+
+    async def slow_loader():
+        await asyncio.sleep(0.05)
+        # Our lock has expired and another worker has taken it.
+        assert client.set("lock:user:a", "other", nx=True, px=1000)
+        return "loaded"
+
+    assert await cache.get_or_load(client, "user:a", slow_loader) == "loaded"
+    assert client.get("lock:user:a") == "other"
+
+
+@pytest.mark.asyncio
+async def test_early_refresh_serves_stale_value_while_locked(monkeypatch):
+    client = DummyRedis()
+    client.store["user:a"] = json.dumps(
+        {"value": "stale", "delta": 0.1, "expires": time.time() + 1}
+    )
+    cache = CoalescingCache(ttl=60)
+    loader, calls = counting_loader("fresh")
+
+    monkeypatch.setattr(cache_module, "should_refresh_early", lambda *a: True)
+    client.store["lock:user:a"] = "1"
+    assert await cache.get_or_load(client, "user:a", loader) == "stale"
+    assert calls == []
+
+    client.delete("lock:user:a")
+    assert await cache.get_or_load(client, "user:a", loader) == "fresh"
+    assert json.loads(client.store["user:a"])["value"] == "fresh"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_user_lookups_hit_database_once(db_session, monkeypatch):
+    user = await UserRepository(db_session).create_user(
+        UserCreate(
+            username="stampede", email="stampede@example.com", password="x", role="user"
+        )
+    )
+    await db_session.commit()
+
+    monkeypatch.setattr(auth_service, "redis_client", DummyRedis())
+    queries = []
+    lookup = UserRepository.get_user_by_username
+
+    async def counting_lookup(self, username):
+        queries.append(username)
+        await asyncio.sleep(0.05)
+        return await lookup(self, username)
+
+    monkeypatch.setattr(UserRepository, "get_user_by_username", counting_lookup)
+    token = await create_access_token({"sub": user.username})
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    users = await asyncio.gather(
+        *(get_current_user(credentials, db_session) for _ in range(20))
+    )
+
+    assert queries == ["stampede"]
+    assert {u.id for u in users} == {user.id}
+    await get_current_user(credentials, db_session)
+    assert queries == ["stampede"]
+
+
+@pytest.mark.asyncio
+async def test_identical_contact_reads_share_one_query(db_session, monkeypatch):
+    user = await UserRepository(db_session).create_user(
+        UserCreate(
+            username="dashboard", email="dash@example.com", password="x", role="user"
+        )
+    )
+    await ContactRepository(db_session).create_contact(
+        user,
+        ContactCreate(
+            first_name="Ann",
+            last_name="Lee",
+            email="ann@example.com",
+            phone="+123456789",
+            birthday="1990-01-01",
+        ),
+    )
+
+    queries = []
+    get_contacts = ContactRepository.get_contacts
+
+    async def counting_get_contacts(self, **kwargs):
+        queries.append(kwargs["first_name"])
+        await asyncio.sleep(0.05)
+        return await get_contacts(self, **kwargs)
+
+    monkeypatch.setattr(ContactRepository, "get_contacts", counting_get_contacts)
+    service = ContactService(db_session, read_only=True)
+
+    results = await asyncio.gather(
+        *(service.get_contacts(user, first_name="Ann") for _ in range(10)),
+        service.get_contacts(user, first_name="Bob"),
+    )
+    assert queries.count("Ann") == 1 and queries.count("Bob") == 1
+    assert all(r is results[0] and len(r) == 1 for r in results[:10])
+    assert results[10] == []
+
+    # ORM results are bound to their session and are never shared.
+    queries.clear()
+    orm_service = ContactService(db_session)
+    await asyncio.gather(*(orm_service.get_contacts(user) for _ in range(3)))
+    assert len(queries) == 3
+
+
+@pytest.mark.asyncio
+async def test_reads_do_not_join_queries_older_than_a_write(db_session, monkeypatch):
+    user = await UserRepository(db_session).create_user(
+        UserCreate(
+            username="rereader", email="reread@example.com", password="x", role="user"
+        )
+    )
+    body = ContactCreate(
+        first_name="Ann",
+        last_name="Lee",
+        email="ann@example.com",
+        phone="+123456789",
+        birthday="1990-01-01",
+    )
+
+    queries = []
+    get_contacts = ContactRepository.get_contacts
+
+    async def counting_get_contacts(self, **kwargs):
+        queries.append(kwargs["first_name"])
+        await asyncio.sleep(0.05)
+        return await get_contacts(self, **kwargs)
+
+    monkeypatch.setattr(ContactRepository, "get_contacts", counting_get_contacts)
+    service = ContactService(db_session, read_only=True)
+
+    async def write_then_read():
+        await asyncio.sleep(0.01)
+        await ContactRepository(db_session).create_contact(user, body)
+        return await service.get_contacts(user, first_name="Ann")
+
+    before, after = await asyncio.gather(
+        service.get_contacts(user, first_name="Ann"), write_then_read()
+    )
+    assert len(queries) == 2
+    assert len(after) == 1
+
+    # A caller inside its read-your-writes window never joins a query.
+    queries.clear()
+    db_session.info["read_your_writes"] = True
+    try:
+        await asyncio.gather(
+            *(service.get_contacts(user, first_name="Ann") for _ in range(3))
+        )
+    finally:
+        del db_session.info["read_your_writes"]
+    assert len(queries) == 3
@@ -0,0 +1,14 @@
+from src import calibrate_hashing
+
+
+def test_calibrate_bcrypt_stops_at_target():
+    values, timings = calibrate_hashing.calibrate_bcrypt(target=0.0, repeat=1)
+    assert values == {"PASSWORD_BCRYPT_ROUNDS": calibrate_hashing.BCRYPT_ROUNDS[0]}
+    assert len(timings) == 1
+
+
+def test_main_prints_settings(capsys):
+    calibrate_hashing.main(["--target-ms", "0", "--repeat", "1"])
+    out = capsys.readouterr().out
+    assert 'PASSWORD_SCHEMES=["bcrypt"]' in out
+    assert "PASSWORD_BCRYPT_ROUNDS=8" in out
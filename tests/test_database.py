@@ -0,0 +1,182 @@
+import pytest
+import pytest_asyncio
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import create_async_engine
+from starlette.requests import Request
+
+from src.conf.config import settings
+from src.database.db import DatabaseSessionManager, engine_options, request_session
+from src.database.models import Base, User
+
+
+async def create_marked_database(path, marker):
+    url = f"sqlite+aiosqlite:///{path}"
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(
+            insert(User).values(username=marker, email=f"{marker}@example.com")
+        )
+    await engine.dispose()
+    return url
+
+
+class ExpiringStore:
+    """Redis stand-in that honors ``px`` expiry."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.items = {}
+
+    def get(self, key):
+        value, expires = self.items.get(key, (None, 0.0))
+        return value if self.now < expires else None
+
+    def set(self, key, value, px=None):
+        self.items[key] = (value, self.now + px / 1000)
+
+
+async def served_by(manager, key=None):
+    async with manager.read_session(key) as session:
+        result = await session.execute(select(User.username))
+        return result.scalar_one()
+
+
+@pytest_asyncio.fixture
+async def databases(tmp_path):
+    return [
+        await create_marked_database(tmp_path / f"{name}.db", name)
+        for name in ("primary", "replica1", "replica2")
+    ]
+
+
+@pytest.mark.asyncio
+async def test_reads_round_robin_over_replicas(databases):
+    primary, *replicas = databases
+    manager = DatabaseSessionManager(primary, replicas)
+
+    served = [await served_by(manager) for _ in range(4)]
+    assert served == ["replica1", "replica2", "replica1", "replica2"]
+
+    async with manager.session() as session:
+        result = await session.execute(select(User.username))
+        assert result.scalar_one() == "primary"
+
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_least_connections_prefers_idle_replica(databases):
+    primary, *replicas = databases
+    manager = DatabaseSessionManager(primary, replicas, strategy="least_connections")
+
+    async with manager.read_session() as busy:
+        result = await busy.execute(select(User.username))
+        assert result.scalar_one() == "replica1"
+        assert await served_by(manager) == "replica2"
+
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_read_your_writes_uses_primary(databases):
+    primary, *replicas = databases
+    store = ExpiringStore()
+    manager = DatabaseSessionManager(
+        primary, replicas, read_your_writes_seconds=60, redis=store
+    )
+    # A second worker sees the window through the shared store.
+    other_worker = DatabaseSessionManager(
+        primary, replicas, read_your_writes_seconds=60, redis=store
+    )
+
+    async with manager.session("writer") as session:
+        session.add(User(username="new", email="new@example.com"))
+        await session.commit()
+
+    async with other_worker.read_session("writer") as session:
+        result = await session.execute(select(User.username).order_by(User.id))
+        assert result.scalars().all() == ["primary", "new"]
+        assert session.info["read_your_writes"]
+
+    assert await served_by(manager, "someone_else") == "replica1"
+
+    store.now = 61
+    assert await served_by(manager, "writer") == "replica2"
+
+    await other_worker.close()
+
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_unhealthy_replica_is_skipped(databases, tmp_path):
+    primary, replica, _ = databases
+    broken = f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'replica.db'}"
+    manager = DatabaseSessionManager(primary, [broken, replica])
+
+    health = await manager.check_replicas()
+    assert health == {broken: False, replica: True}
+
+    served = {await served_by(manager) for _ in range(3)}
+    assert served == {"replica1"}
+
+    manager.replicas[1].mark_down(60)
+    assert await served_by(manager) == "primary"
+
+    await manager.close()
+
+
+def make_request(token=None):
+    headers = [(b"authorization", f"Bearer {token}".encode())] if token else []
+    return Request({"type": "http", "headers": headers})
+
+
+@pytest.mark.asyncio
+async def test_request_dependencies_share_primary_session(databases):
+    primary, *replicas = databases
+    manager = DatabaseSessionManager(primary)
+    request = make_request()
+
+    async with request_session(request, manager, read_only=True) as read:
+        async with request_session(request, manager) as write:
+            assert write is read
+        assert request.state.db_sessions == {manager: read}
+    assert request.state.db_sessions == {}
+
+    async with request_session(make_request(), manager) as other:
+        assert other is not read
+    await manager.close()
+
+    manager = DatabaseSessionManager(primary, replicas)
+    async with request_session(request, manager, read_only=True) as read:
+        async with request_session(request, manager) as write:
+            assert write is not read
+            assert (await read.execute(select(User.username))).scalar() == "replica1"
+            assert (await write.execute(select(User.username))).scalar() == "primary"
+    await manager.close()
+
+
+def test_engine_options_size_statement_caches():
+    options = engine_options("postgresql+asyncpg://user:pass@db/notebook")
+    assert options["connect_args"] == {"prepared_statement_cache_size": 500}
+    assert options["query_cache_size"] == 500
+
+    assert "connect_args" not in engine_options("sqlite+aiosqlite:///app.db")
+    engine = create_async_engine(
+        "postgresql+asyncpg://user:pass@db/notebook",
+        **engine_options("postgresql+asyncpg://user:pass@db/notebook"),
+    )
+    assert engine.sync_engine._compiled_cache.capacity == 500
+
+
+def test_engine_options_for_pgbouncer(monkeypatch):
+    monkeypatch.setattr(settings, "DB_PGBOUNCER", True)
+    connect_args = engine_options("postgresql+asyncpg://user:pass@db/notebook")[
+        "connect_args"
+    ]
+    assert connect_args["statement_cache_size"] == 0
+    assert connect_args["prepared_statement_cache_size"] == 0
+    name = connect_args["prepared_statement_name_func"]
+    assert name() != name()
@@ -0,0 +1,57 @@
+import pytest
+
+from collections import Counter
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from benchmarks.datagen import (
+    bulk_load,
+    copy_records,
+    generate_contacts,
+    generate_users,
+)
+from src.database.models import Base, Contact
+from src.schemas import ContactCreate
+
+
+def test_generated_contacts_are_deterministic_and_valid():
+    first = list(generate_contacts([1, 2], per_user=365, seed=7))
+    second = list(generate_contacts([1, 2], per_user=365, seed=7))
+    assert first == second
+
+    for row in first:
+        ContactCreate(**{k: v for k, v in row.items() if k != "user_id"})
+
+    assert len({row["email"] for row in first}) == len(first)
+    days = Counter(row["birthday"].strftime("%m-%d") for row in first[:365])
+    assert len(days) == 365
+
+
+@pytest.mark.asyncio
+async def test_bulk_load(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'gen.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    user_ids = await bulk_load(engine, users=3, contacts_per_user=50, chunk_size=40)
+
+    async with engine.connect() as conn:
+        count = await conn.scalar(select(func.count()).select_from(Contact))
+    await engine.dispose()
+
+    assert len(user_ids) == 3
+    assert count == 150
+    assert len(list(generate_users(3))) == 3
+
+
+def test_copy_records_match_contact_columns():
+    rows = list(generate_contacts([1], per_user=3))
+    columns, records = copy_records(rows)
+
+    assert set(columns) <= set(Contact.__table__.columns.keys())
+    assert {"email_normalized", "phone_normalized", "updated_at"} <= set(columns)
+    assert "id" not in columns and "version" not in columns
+    assert len(records) == 3
+    assert all(len(record) == len(columns) for record in records)
+    assert copy_records([]) == ([], [])
@@ -1,5 +1,7 @@
 import pytest
 
+from datetime import date
+
 import src.services.email as email_module
 
 
@@ -36,3 +38,123 @@ async def test_send_reset_password_email_handles_connection_error(monkeypatch):
         "user",
         "http://host/",
     )
+
+
+class FakeSMTP:
+    """aiosmtplib.SMTP stand-in; ``failures`` are raised by the next sends."""
+
+    opened = []
+    failures = []
+
+    def __init__(self, **kwargs):
+        self.messages = []
+
+    async def connect(self):
+        FakeSMTP.opened.append(self)
+
+    async def send_message(self, message):
+        if FakeSMTP.failures:
+            raise FakeSMTP.failures.pop(0)
+        self.messages.append(message)
+
+    async def quit(self):
+        pass
+
+
+class FakeContact:
+    first_name = "Ann"
+    last_name = "Lee"
+    birthday = date(1990, 5, 17)
+
+
+@pytest.fixture
+def fake_smtp(monkeypatch):
+    FakeSMTP.opened, FakeSMTP.failures = [], []
+    monkeypatch.setattr(email_module, "SMTP", FakeSMTP)
+    return FakeSMTP
+
+
+@pytest.mark.asyncio
+async def test_pooled_mailer_reuses_connection(fake_smtp):
+    async with email_module.PooledMailer(max_messages=2) as mailer:
+        for _ in range(3):
+            await email_module.send_birthday_digest(
+                mailer, "test@example.com", "user", [FakeContact()]
+            )
+
+    assert len(fake_smtp.opened) == 2
+    assert len(fake_smtp.opened[0].messages) == 2
+    message = fake_smtp.opened[0].messages[0]
+    assert message["To"] == "test@example.com"
+    assert "Ann Lee" in message.get_content()
+
+
+@pytest.mark.asyncio
+async def test_pooled_mailer_retries_only_connection_failures(fake_smtp):
+    from aiosmtplib import SMTPRecipientsRefused, SMTPServerDisconnected
+
+    async with email_module.PooledMailer() as mailer:
+        fake_smtp.failures = [SMTPServerDisconnected("dropped")]
+        await email_module.send_birthday_digest(
+            mailer, "test@example.com", "user", [FakeContact()]
+        )
+        assert len(fake_smtp.opened) == 2
+        assert len(fake_smtp.opened[1].messages) == 1
+
+        fake_smtp.failures = [SMTPRecipientsRefused([]), "unused"]
+        with pytest.raises(email_module.MessageRejected):
+            await email_module.send_birthday_digest(
+                mailer, "bad@example.com", "user", [FakeContact()]
+            )
+        assert fake_smtp.failures == ["unused"]
+        assert len(fake_smtp.opened) == 2
+
+        fake_smtp.failures = [ConnectionResetError(), TimeoutError()]
+        with pytest.raises(email_module.MailerError):
+            await email_module.send_birthday_digest(
+                mailer, "test@example.com", "user", [FakeContact()]
+            )
+        assert len(fake_smtp.opened) == 3
+
+
+@pytest.mark.asyncio
+async def test_pooled_mailer_classifies_smtp_errors(fake_smtp):
+    from aiosmtplib import (
+        SMTPAuthenticationError,
+        SMTPDataError,
+        SMTPNotSupported,
+        SMTPResponseException,
+        SMTPSenderRefused,
+    )
+
+    async def send():
+        await email_module.send_birthday_digest(
+            mailer, "test@example.com", "user", [FakeContact()]
+        )
+
+    async with email_module.PooledMailer() as mailer:
+        # Temporary replies and login errors are retried on a new connection.
+        for failure in (
+            SMTPResponseException(421, "Service not available"),
+            SMTPDataError(451, "Local error"),
+            SMTPAuthenticationError(454, "Try again later"),
+        ):
+            await mailer.close()
+            fake_smtp.opened.clear()
+            fake_smtp.failures = [failure]
+            await send()
+            assert len(fake_smtp.opened) == 2
+
+        fake_smtp.failures = [SMTPDataError(451, "Local error")] * 2
+        with pytest.raises(email_module.MessageRejected):
+            await send()
+
+        # Permanent errors unrelated to the message are not retried.
+        for failure in (
+            SMTPSenderRefused(550, "Sender denied", "noreply@example.com"),
+            SMTPNotSupported("STARTTLS not supported"),
+        ):
+            fake_smtp.failures = [failure, "unused"]
+            with pytest.raises(email_module.MailerError):
+                await send()
+            assert fake_smtp.failures == ["unused"]
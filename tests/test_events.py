@@ -0,0 +1,162 @@
+import asyncio
+
+import orjson
+import pytest
+
+from src.repository.contacts import ContactRepository
+from src.repository.users import UserRepository
+from src.schemas import ContactCreate, ContactUpdate, UserCreate
+from src.services.events import EventBroker, RedisEventBroker, sse_stream
+
+
+@pytest.mark.asyncio
+async def test_broker_fans_out_per_user():
+    broker = EventBroker(queue_size=1)
+
+    with broker.subscribe(1) as first, broker.subscribe(1) as second:
+        with broker.subscribe(2) as other:
+            assert broker.subscriber_count() == 3
+            await broker.publish(1, {"type": "created"})
+            await broker.publish(1, {"type": "updated"})
+
+            assert first.get_nowait() == {"type": "created"}
+            assert second.get_nowait() == {"type": "created"}
+            assert first.empty() and other.empty()
+
+    assert broker.subscriber_count() == 0
+
+
+@pytest.mark.asyncio
+async def test_repository_publishes_mutations(db_session):
+    broker = EventBroker()
+    user = await UserRepository(db_session).create_user(
+        UserCreate(
+            username="events_owner",
+            email="events_owner@example.com",
+            password="pass",
+            role="user",
+        )
+    )
+    repo = ContactRepository(db_session, events=broker)
+
+    with broker.subscribe(user.id) as queue:
+        contact = await repo.create_contact(
+            user,
+            ContactCreate(
+                first_name="Eve",
+                last_name="Events",
+                email="eve@example.com",
+                phone="+123456789",
+                birthday="1990-01-01",
+            ),
+        )
+        await repo.update_contact(user, contact.id, ContactUpdate(first_name="Eva"))
+        await repo.remove_contact(user, contact.id)
+
+        events = [queue.get_nowait() for _ in range(3)]
+
+    assert [e["type"] for e in events] == ["created", "updated", "deleted"]
+    assert {e["id"] for e in events} == {contact.id}
+    assert events[1]["data"]["first_name"] == "Eva"
+    assert events[0]["version"] < events[1]["version"] < events[2]["version"]
+
+
+@pytest.mark.asyncio
+async def test_sse_stream_frames_and_keepalive():
+    queue = asyncio.Queue()
+    stream = sse_stream(queue, keepalive=0.01)
+
+    assert await anext(stream) == b": keepalive\n\n"
+
+    event = {"type": "deleted", "id": 3, "version": 7, "data": {"id": 3}}
+    queue.put_nowait(event)
+    frame = await anext(stream)
+    assert frame.startswith(b"id: 7\nevent: deleted\ndata: ")
+    assert orjson.loads(frame.split(b"data: ")[1]) == event
+    await stream.aclose()
+
+
+class FakePubSub:
+    def __init__(self, messages):
+        self.messages = list(messages)
+        self.channels = []
+        self.history = []
+
+    async def subscribe(self, *channels):
+        self.channels.extend(channels)
+        self.history.append(("subscribe", *channels))
+
+    async def unsubscribe(self, *channels):
+        for channel in channels:
+            self.channels.remove(channel)
+        self.history.append(("unsubscribe", *channels))
+
+    async def get_message(self, ignore_subscribe_messages=False, timeout=0.0):
+        for message in self.messages:
+            if message["channel"] in self.channels:
+                self.messages.remove(message)
+                return message
+        await asyncio.sleep(timeout)
+        return None
+
+    async def aclose(self):
+        pass
+
+
+class FakeAsyncRedis:
+    def __init__(self, messages=(), stall=False):
+        self.published = []
+        self.stall = stall
+        self.pubsub_instance = FakePubSub(messages)
+
+    async def publish(self, channel, data):
+        if self.stall:
+            await asyncio.Event().wait()
+        self.published.append((channel, data))
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return self.pubsub_instance
+
+
+@pytest.mark.asyncio
+async def test_redis_broker_publishes_and_dispatches():
+    message = {
+        "type": "message",
+        "channel": "contacts:events:5",
+        "data": orjson.dumps({"type": "created", "id": 1}).decode(),
+    }
+    client = FakeAsyncRedis([message])
+    broker = RedisEventBroker(client)
+
+    await broker.publish(5, {"type": "updated"})
+    await asyncio.sleep(0.01)
+    assert client.published == [("contacts:events:5", b'{"type":"updated"}')]
+
+    with broker.subscribe(5) as queue:
+        event = await asyncio.wait_for(queue.get(), 1)
+        with broker.subscribe(6):
+            await asyncio.sleep(0.2)
+            assert client.pubsub_instance.channels == [
+                "contacts:events:5",
+                "contacts:events:6",
+            ]
+        await asyncio.sleep(0.2)
+        assert client.pubsub_instance.channels == ["contacts:events:5"]
+    assert event == {"type": "created", "id": 1}
+    await asyncio.sleep(0.2)
+    assert broker._listener.done()
+    assert client.pubsub_instance.history[-1] == ("unsubscribe", "contacts:events:6")
+    await broker.close()
+
+
+@pytest.mark.asyncio
+async def test_redis_broker_publish_does_not_wait_for_redis():
+    client = FakeAsyncRedis(stall=True)
+    broker = RedisEventBroker(client, publish_timeout=0.01)
+
+    await asyncio.wait_for(broker.publish(5, {"type": "updated"}), 0.05)
+    await asyncio.sleep(0.05)
+
+    assert client.published == []
+    assert broker.breaker.failures == 1
+    await broker.close()
@@ -0,0 +1,63 @@
+import io
+import json
+import logging
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from src.services import logs
+
+
+@pytest.mark.asyncio
+async def test_request_id_header_is_generated_and_echoed(client):
+    resp = await client.get("/api/auth/refresh-token")
+    assert len(resp.headers["x-request-id"]) == 32
+
+    resp = await client.get(
+        "/api/auth/refresh-token", headers={"X-Request-ID": "abc-123"}
+    )
+    assert resp.headers["x-request-id"] == "abc-123"
+
+
+@pytest.mark.asyncio
+async def test_access_log_samples_only_successes(caplog):
+    async def app(scope, receive, send):
+        status = 404 if scope["path"] == "/missing" else 200
+        await send({"type": "http.response.start", "status": status})
+        await send({"type": "http.response.body", "body": b""})
+
+    middleware = logs.RequestContextMiddleware(app, sample_rate=0.0, slow_ms=1e9)
+    transport = ASGITransport(app=middleware)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        with caplog.at_level(logging.INFO, logger="access"):
+            await ac.get("/ok")
+            await ac.get("/missing", headers={"X-Request-ID": "req-1"})
+
+    records = [r for r in caplog.records if r.name == "access"]
+    assert [(r.path, r.status) for r in records] == [("/missing", 404)]
+    assert records[0].duration_ms >= 0
+
+
+def test_setup_logging_writes_json_with_request_id():
+    stream = io.StringIO()
+    listener = logs.setup_logging("INFO", "json", stream)
+    token = logs.request_id_var.set("req-42")
+    try:
+        logging.getLogger("sqlalchemy.engine").warning("SELECT %d", 1)
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logging.getLogger("test").exception("failed", extra={"user_id": 7})
+    finally:
+        logs.request_id_var.reset(token)
+        listener.stop()
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            if isinstance(handler, logs._StructuredQueueHandler):
+                root.removeHandler(handler)
+
+    sql, error = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert sql["message"] == "SELECT 1"
+    assert sql["request_id"] == "req-42"
+    assert error["user_id"] == 7
+    assert "ValueError: boom" in error["exc_info"]
@@ -0,0 +1,90 @@
+import time
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from src.repository.users import UserRepository
+from src.schemas import UserCreate
+from src.services import profiler as profiler_module
+from src.services.auth import create_access_token
+
+
+def busy(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_sampling_profiler_collapses_stacks():
+    profiler = profiler_module.SamplingProfiler(interval=0.001).start()
+    busy(0.1)
+    profiler.stop()
+
+    assert profiler.samples > 0
+    top = profiler.collapsed().splitlines()[0]
+    stack, count = top.rsplit(" ", 1)
+    assert int(count) > 0
+    assert stack.split(";")[-1].startswith("busy (tests/test_profiler.py:")
+
+
+@pytest.mark.asyncio
+async def test_profiler_endpoints_are_admin_only(client, db_session):
+    repo = UserRepository(db_session)
+    for name, role in [("profiler_admin", "admin"), ("profiler_user", "user")]:
+        user = await repo.create_user(
+            UserCreate(
+                username=name, email=f"{name}@example.com", password="x", role=role
+            )
+        )
+        user.confirmed = True
+    await db_session.commit()
+    admin = {
+        "Authorization": f"Bearer {await create_access_token({'sub': 'profiler_admin'})}"
+    }
+    user = {
+        "Authorization": f"Bearer {await create_access_token({'sub': 'profiler_user'})}"
+    }
+
+    resp = await client.post("/api/admin/profiler/start", headers=user)
+    assert resp.status_code == 403
+
+    resp = await client.post(
+        "/api/admin/profiler/start?seconds=5&interval_ms=1", headers=admin
+    )
+    assert resp.status_code == 202
+    resp = await client.post("/api/admin/profiler/start", headers=admin)
+    assert resp.status_code == 409
+
+    busy(0.05)
+    resp = await client.post("/api/admin/profiler/stop", headers=admin)
+    assert resp.status_code == 200
+    assert "worker.collapsed" in resp.headers["content-disposition"]
+    assert int(resp.headers["x-profile-samples"]) > 0
+    assert "busy (tests/test_profiler.py:" in resp.text
+    assert not profiler_module.worker_profiler.running
+
+    resp = await client.get("/api/admin/profiler/requests/unknown", headers=admin)
+    assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_request_profiling_needs_token():
+    app = FastAPI()
+
+    @app.get("/work")
+    async def work():
+        busy(0.05)
+        return {}
+
+    middleware = profiler_module.RequestProfilerMiddleware(app, "secret", 0.001)
+    transport = ASGITransport(app=middleware)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        resp = await ac.get("/work", headers={"X-Profile": "wrong"})
+        assert "x-profile-id" not in resp.headers
+
+        resp = await ac.get("/work", headers={"X-Profile": "secret"})
+
+    profile = profiler_module.request_profiles.get(resp.headers["x-profile-id"])
+    assert profile.samples > 0
+    assert "work (tests/test_profiler.py:" in profile.collapsed()
@@ -0,0 +1,152 @@
+import time
+
+import pytest
+import redis
+
+from src.repository.users import UserRepository
+from src.schemas import UserCreate
+from src.services import auth as auth_service
+from src.services.auth import create_access_token
+from src.services.redis import CircuitBreaker, ResilientRedis
+
+
+class FlakyRedis:
+    def __init__(self):
+        self.store = {}
+        self.down = False
+        self.calls = 0
+
+    def _command(self):
+        self.calls += 1
+        if self.down:
+            raise redis.ConnectionError("Connection refused")
+
+    def get(self, key):
+        self._command()
+        return self.store.get(key)
+
+    def set(self, key, value, **options):
+        self._command()
+        self.store[key] = value
+        return True
+
+    def delete(self, *keys):
+        self._command()
+        for key in keys:
+            self.store.pop(key, None)
+
+    def expire(self, key, seconds):
+        self._command()
+
+    def eval(self, script, numkeys, key, value):
+        # Only the compare-and-delete script is used.
+        self._command()
+        if self.store.get(key) != value:
+            return 0
+        del self.store[key]
+        return 1
+
+    def ping(self):
+        self._command()
+        return True
+
+
+def test_breaker_opens_falls_back_and_recovers():
+    client = FlakyRedis()
+    cache = ResilientRedis(
+        client, CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    )
+    cache.set("user:a", "cached")
+
+    client.down = True
+    assert cache.get("user:a") == "cached"
+    assert cache.get("user:b") is None
+    assert cache.breaker.state == CircuitBreaker.OPEN
+
+    calls = client.calls
+    assert cache.get("user:a") == "cached"
+    assert client.calls == calls
+    assert cache.breaker.rejected_total == 1
+
+    time.sleep(0.06)
+    assert cache.get("user:a") == "cached"
+    assert client.calls == calls + 1
+    assert cache.breaker.state == CircuitBreaker.OPEN
+
+    client.down = False
+    time.sleep(0.06)
+    assert cache.get("user:a") == "cached"
+    assert cache.breaker.state == CircuitBreaker.CLOSED
+    assert 'redis_circuit_state{state="closed"} 1' in cache.breaker.metrics(
+        "redis_circuit"
+    )
+
+
+def test_delete_if_equal_compares_tokens():
+    client = FlakyRedis()
+    cache = ResilientRedis(client)
+    cache.set("lock:a", "mine")
+
+    assert not cache.delete_if_equal("lock:a", "theirs")
+    assert cache.get("lock:a") == "mine"
+    assert cache.delete_if_equal("lock:a", "mine")
+    assert cache.get("lock:a") is None
+
+    client.down = True
+    assert not cache.delete_if_equal("lock:a", "mine")
+
+
+def test_half_open_trial_records_unexpected_errors():
+    client = FlakyRedis()
+    cache = ResilientRedis(
+        client, CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    )
+    client.down = True
+    assert cache.get("user:a") is None
+    assert cache.breaker.state == CircuitBreaker.OPEN
+
+    time.sleep(0.02)
+    client.get = lambda key: 1 / 0
+    with pytest.raises(ZeroDivisionError):
+        cache.get("user:a")
+    assert cache.breaker.state == CircuitBreaker.OPEN
+
+    time.sleep(0.02)
+    del client.get
+    client.down = False
+    assert cache.ping()
+    assert cache.breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_authenticated_requests_survive_redis_outage(
+    client, db_session, monkeypatch
+):
+    flaky = FlakyRedis()
+    flaky.down = True
+    monkeypatch.setattr(
+        auth_service, "redis_client", ResilientRedis(flaky, CircuitBreaker(1, 60))
+    )
+    user = await UserRepository(db_session).create_user(
+        UserCreate(
+            username="no_redis", email="no_redis@example.com", password="x", role="user"
+        )
+    )
+    user.confirmed = True
+    await db_session.commit()
+    headers = {
+        "Authorization": f"Bearer {await create_access_token({'sub': 'no_redis'})}"
+    }
+
+    for _ in range(3):
+        resp = await client.get("/api/contacts/", headers=headers)
+        assert resp.status_code == 200
+    assert flaky.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(client):
+    resp = await client.get("/api/metrics")
+    assert resp.status_code == 200
+    assert "redis_circuit_state" in resp.text
+    assert "redis_circuit_failures_total" in resp.text
@@ -0,0 +1,152 @@
+import pytest
+
+from datetime import date, timedelta
+
+from src.repository.contacts import ContactRepository
+from src.repository.users import UserRepository
+from src.schemas import ContactCreate, UserCreate
+from src.services import reminders as reminders_module
+from src.services.email import MessageRejected
+from src.services.reminders import (
+    BirthdayReminderJob,
+    ReminderCheckpoint,
+    SendThrottle,
+)
+from tests.fakes import DummyRedis
+
+
+async def create_user_with_birthdays(db_session, name, birthdays):
+    user = await UserRepository(db_session).create_user(
+        UserCreate(
+            username=name, email=f"{name}@example.com", password="pass", role="user"
+        )
+    )
+    user.confirmed = True
+    await db_session.commit()
+
+    contact_repo = ContactRepository(db_session)
+    for i, birthday in enumerate(birthdays):
+        await contact_repo.create_contact(
+            user,
+            ContactCreate(
+                first_name=f"Friend{i}",
+                last_name=name,
+                email=f"{name}{i}@example.com",
+                phone="+380123456789",
+                birthday=birthday,
+            ),
+        )
+    return user
+
+
+@pytest.mark.asyncio
+async def test_reminder_job_sends_one_digest_per_user(
+    db_session, session_factory, monkeypatch
+):
+    today = date.today()
+    first = await create_user_with_birthdays(
+        db_session, "remind_first", [today, today + timedelta(days=2)]
+    )
+    second = await create_user_with_birthdays(
+        db_session, "remind_second", [today + timedelta(days=40)]
+    )
+    third = await create_user_with_birthdays(
+        db_session, "remind_third", [today + timedelta(days=1)]
+    )
+
+    sent = []
+
+    async def fake_send_digest(mailer, email, username, contacts):
+        sent.append((email, len(contacts)))
+
+    monkeypatch.setattr(reminders_module, "send_birthday_digest", fake_send_digest)
+
+    redis = DummyRedis()
+    job = BirthdayReminderJob(
+        session_factory,
+        mailer=None,
+        checkpoint=ReminderCheckpoint(redis, today),
+        batch_size=2,
+        send_rate=0,
+    )
+    await job.run(today)
+
+    assert (first.email, 2) in sent
+    assert (third.email, 1) in sent
+    assert second.email not in [email for email, _ in sent]
+    assert sum(1 for email, _ in sent if email == first.email) == 1
+
+    sent.clear()
+    await job.run(today)
+    assert sent == []
+
+
+@pytest.mark.asyncio
+async def test_reminder_job_resumes_from_checkpoint(
+    db_session, session_factory, monkeypatch
+):
+    today = date.today()
+    before = await create_user_with_birthdays(db_session, "resume_before", [today])
+    after = await create_user_with_birthdays(db_session, "resume_after", [today])
+
+    sent = []
+
+    async def fake_send_digest(mailer, email, username, contacts):
+        sent.append(email)
+
+    monkeypatch.setattr(reminders_module, "send_birthday_digest", fake_send_digest)
+
+    checkpoint = ReminderCheckpoint(DummyRedis(), today)
+    checkpoint.save(before.id)
+
+    job = BirthdayReminderJob(
+        session_factory, mailer=None, checkpoint=checkpoint, send_rate=0
+    )
+    await job.run(today)
+
+    assert sent == [after.email]
+    assert checkpoint.load() >= after.id
+
+
+@pytest.mark.asyncio
+async def test_reminder_job_skips_rejected_digests(
+    db_session, session_factory, monkeypatch
+):
+    today = date.today()
+    rejected = await create_user_with_birthdays(db_session, "reject_me", [today])
+    accepted = await create_user_with_birthdays(db_session, "accept_me", [today])
+
+    sent = []
+
+    async def fake_send_digest(mailer, email, username, contacts):
+        if email == rejected.email:
+            raise MessageRejected("550 mailbox unavailable")
+        sent.append(email)
+
+    monkeypatch.setattr(reminders_module, "send_birthday_digest", fake_send_digest)
+
+    checkpoint = ReminderCheckpoint(DummyRedis(), today)
+    checkpoint.save(rejected.id - 1)
+    job = BirthdayReminderJob(
+        session_factory, mailer=None, checkpoint=checkpoint, send_rate=0
+    )
+
+    assert await job.run(today) == 1
+    assert sent == [accepted.email]
+    assert checkpoint.load() >= accepted.id
+
+
+@pytest.mark.asyncio
+async def test_send_throttle_spaces_sends():
+    now = [0.0]
+    sleeps = []
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    throttle = SendThrottle(4, clock=lambda: now[0], sleep=fake_sleep)
+    for _ in range(3):
+        await throttle.wait()
+
+    assert sleeps == [0.25, 0.25]
@@ -1,9 +1,12 @@
 import pytest
 
-from src.repository.contacts import ContactRepository
+from src.repository.contacts import ContactRecord, ContactRepository
 from src.repository.users import UserRepository
+from src.database.models import User
 from src.schemas import ContactCreate, UserCreate
 
+from datetime import date
+
 
 @pytest.mark.asyncio
 async def test_create_and_get_contact(db_session):
@@ -35,3 +38,93 @@ async def test_create_and_get_contact(db_session):
     contacts = await contact_repo.get_contacts(user=user)
     assert len(contacts) == 1
     assert contacts[0].email == "john@example.com"
+
+
+@pytest.mark.asyncio
+async def test_get_upcoming_birthdays_wraps_year(db_session):
+    user_repo = UserRepository(db_session)
+    contact_repo = ContactRepository(db_session)
+
+    user = await user_repo.create_user(
+        UserCreate(
+            username="wrap_owner",
+            email="wrap_owner@example.com",
+            password="pass",
+            role="user",
+        )
+    )
+
+    for name, birthday in [
+        ("December", "1990-12-30"),
+        ("January", "1985-01-02"),
+        ("February", "1992-02-01"),
+    ]:
+        await contact_repo.create_contact(
+            user,
+            ContactCreate(
+                first_name=name,
+                last_name="Wrap",
+                email=f"{name.lower()}@example.com",
+                phone="+123456789",
+                birthday=birthday,
+            ),
+        )
+
+    contacts = await contact_repo.get_upcoming_birthdays(
+        [user.id], date(2024, 12, 28), days=7
+    )
+    assert [c.first_name for c in contacts] == ["December", "January"]
+
+
+@pytest.mark.asyncio
+async def test_read_only_repository_returns_records(db_session):
+    user_repo = UserRepository(db_session)
+    user = await user_repo.create_user(
+        UserCreate(
+            username="readonly_owner",
+            email="readonly_owner@example.com",
+            password="pass",
+            role="user",
+        )
+    )
+    contact_body = ContactCreate(
+        first_name="Read",
+        last_name="Only",
+        email="readonly@example.com",
+        phone="+123456789",
+        birthday="1990-01-01",
+    )
+    created = await ContactRepository(db_session).create_contact(user, contact_body)
+
+    repo = ContactRepository(db_session, read_only=True)
+    contacts = await repo.get_contacts(user=user)
+    assert contacts == [
+        ContactRecord(
+            id=created.id,
+            first_name="Read",
+            last_name="Only",
+            email="readonly@example.com",
+            phone="+123456789",
+            birthday=date(1990, 1, 1),
+            extra_info=None,
+        )
+    ]
+    assert await repo.get_contact_by_id(user, created.id) == contacts[0]
+    assert await repo.get_all_contacts(user) == contacts
+
+    with pytest.raises(RuntimeError):
+        await repo.create_contact(user, contact_body)
+
+
+def test_contact_list_statement_is_cached_across_values():
+    def cache_key(user_id, read_only=False, **filters):
+        repo = ContactRepository(None, read_only=read_only)
+        user = User(id=user_id)
+        args = {"skip": 0, "limit": 100, "first_name": None, "last_name": None}
+        stmt = repo._contacts_stmt(user, **{**args, "email": None, **filters})
+        return stmt._generate_cache_key()
+
+    same = cache_key(1, first_name="ann", skip=10)
+    assert same == cache_key(2, first_name="bob", skip=20)
+    assert same != cache_key(1, last_name="ann", skip=10)
+    assert same != cache_key(1, read_only=True, first_name="ann", skip=10)
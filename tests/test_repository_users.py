@@ -1,8 +1,13 @@
 import pytest
 
-from src.repository.users import UserRepository
+from datetime import datetime, timedelta, UTC
+
+from sqlalchemy import select
+
+from src.repository.sessions import SessionRepository
+from src.repository.users import UserAlreadyExists, UserRepository
 from src.schemas import UserCreate
-from src.database.models import User
+from src.database.models import User, UserSession
 
 
 @pytest.mark.asyncio
@@ -31,3 +36,52 @@ async def test_create_and_get_user(db_session):
     user_by_email = await repo.get_user_by_email("test@example.com")
     assert user_by_email is not None
     assert user_by_email.id == user.id
+
+
+@pytest.mark.asyncio
+async def test_create_user_reports_conflicting_field(db_session):
+    repo = UserRepository(db_session)
+    body = UserCreate(
+        username="unique_user",
+        email="unique@example.com",
+        password="hashedpass",
+        role="user",
+    )
+    await repo.create_user(body)
+
+    with pytest.raises(UserAlreadyExists) as exc:
+        await repo.create_user(body.model_copy(update={"username": "another"}))
+    assert exc.value.field == "email"
+
+    with pytest.raises(UserAlreadyExists) as exc:
+        await repo.create_user(body.model_copy(update={"email": "another@example.com"}))
+    assert exc.value.field == "username"
+
+    assert await repo.get_user_by_username("another") is None
+
+
+@pytest.mark.asyncio
+async def test_expired_sessions_are_deleted(db_session):
+    users = UserRepository(db_session)
+    first, second = [
+        await users.create_user(
+            UserCreate(
+                username=name, email=f"{name}@example.com", password="x", role="user"
+            )
+        )
+        for name in ("expiring_first", "expiring_second")
+    ]
+    sessions = SessionRepository(db_session)
+    past = datetime.now(UTC) - timedelta(days=1)
+    await sessions.add(first.id, "first-old", past)
+    await sessions.add(second.id, "second-old", past)
+
+    # A new login only inserts; expired rows wait for the cleanup job.
+    await sessions.add(first.id, "first-new", datetime.now(UTC) + timedelta(days=1))
+    jtis = set(await db_session.scalars(select(UserSession.jti)))
+    assert {"first-old", "first-new", "second-old"} <= jtis
+    assert not await sessions.is_active(first.id, "first-old")
+
+    assert await sessions.delete_expired() >= 2
+    jtis = set(await db_session.scalars(select(UserSession.jti)))
+    assert not {"first-old", "second-old"} & jtis and "first-new" in jtis
@@ -0,0 +1,74 @@
+import pytest
+
+from src import serve
+
+
+def test_server_options_use_fast_loop_and_settings(monkeypatch):
+    monkeypatch.setattr(serve.settings, "CONTACT_EVENTS_BACKEND", "redis")
+    args = serve.build_parser().parse_args(["--port", "9000", "--workers", "3"])
+    options = serve.server_options(args)
+
+    assert options["port"] == 9000
+    assert options["workers"] == 3
+    assert options["loop"] == "uvloop"
+    assert options["http"] == "httptools"
+    assert options["timeout_keep_alive"] == serve.settings.SERVER_KEEP_ALIVE_SECONDS
+    assert options["timeout_graceful_shutdown"] > 0
+
+
+def test_workers_default_to_cpu_count(monkeypatch):
+    monkeypatch.setattr(serve, "cpu_count", lambda: 6)
+    monkeypatch.setattr(serve.settings, "CONTACT_EVENTS_BACKEND", "redis")
+    monkeypatch.setattr(serve.settings, "PROFILER_TOKEN", "")
+    options = serve.server_options(serve.build_parser().parse_args(["--workers", "0"]))
+    assert options["workers"] == 6
+    assert serve.cpu_count() >= 1
+
+
+def test_per_process_state_limits_workers(monkeypatch, caplog):
+    monkeypatch.setattr(serve, "cpu_count", lambda: 6)
+    monkeypatch.setattr(serve.settings, "CONTACT_EVENTS_BACKEND", "memory")
+    monkeypatch.setattr(serve.settings, "PROFILER_TOKEN", "")
+    assert serve.worker_count(0) == 1
+    assert "CONTACT_EVENTS_BACKEND=memory" in caplog.text
+    assert serve.worker_count(1) == 1
+    with pytest.raises(SystemExit):
+        serve.worker_count(4)
+
+    # Per-worker profiles only warn.
+    monkeypatch.setattr(serve.settings, "CONTACT_EVENTS_BACKEND", "redis")
+    monkeypatch.setattr(serve.settings, "PROFILER_TOKEN", "secret")
+    assert serve.worker_count(0) == 1
+    assert serve.worker_count(4) == 4
+    assert "PROFILER_TOKEN" in caplog.text
+
+
+def test_migrate_command_does_not_start_server(monkeypatch):
+    calls = []
+
+    async def fake_migrate():
+        calls.append("migrate")
+
+    monkeypatch.setattr(serve, "migrate", fake_migrate)
+    serve.main(["migrate"])
+    assert calls == ["migrate"]
+
+
+@pytest.mark.asyncio
+async def test_migrate_upgrades_database_and_shards(monkeypatch):
+    from alembic import command
+
+    from src.database import shards
+
+    calls = []
+    monkeypatch.setattr(serve.settings, "DB_URL", "sqlite+aiosqlite://")
+    monkeypatch.setattr(
+        command, "upgrade", lambda config, revision: calls.append(("db", revision))
+    )
+    monkeypatch.setattr(
+        shards, "migrate_shards", lambda revision: calls.append(("shards", revision))
+    )
+
+    await serve.migrate("head")
+
+    assert calls == [("db", "head"), ("shards", "head")]
@@ -0,0 +1,215 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+
+from collections import Counter
+
+from sqlalchemy import delete, insert, inspect, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.database.db import DatabaseSessionManager
+from src.database.models import Base, Contact, User
+from src.database.shards import (
+    HashRing,
+    ShardRouter,
+    contact_id_start,
+    migrate_shards,
+)
+from src.repository.contacts import ContactRepository
+from src.schemas import ContactCreate
+
+
+class Owner:
+    def __init__(self, id):
+        self.id = id
+
+
+def contact_body(i):
+    return ContactCreate(
+        first_name=f"Shard{i}",
+        last_name="Contact",
+        email=f"shard{i}@example.com",
+        phone="+380123456789",
+        birthday="1990-01-01",
+    )
+
+
+USER_IDS = (1, 2, 3, 7, 42)
+
+
+@pytest_asyncio.fixture
+async def primary(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}"
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(
+            insert(User),
+            [{"id": i, "username": f"u{i}", "email": f"u{i}@x.com"} for i in USER_IDS],
+        )
+    await engine.dispose()
+    manager = DatabaseSessionManager(url)
+    yield manager
+    await manager.close()
+
+
+@pytest_asyncio.fixture
+async def shards(tmp_path):
+    urls = {name: f"sqlite+aiosqlite:///{tmp_path / f'{name}.db'}" for name in "abc"}
+    await asyncio.to_thread(migrate_shards, urls)
+    managers = {name: DatabaseSessionManager(url) for name, url in urls.items()}
+    yield managers
+    for manager in managers.values():
+        await manager.close()
+
+
+async def count_contacts(manager, user_id):
+    async with manager.session() as session:
+        return len(await ContactRepository(session).get_all_contacts(Owner(user_id)))
+
+
+def test_hash_ring_is_stable_when_adding_shard():
+    before = HashRing(["a", "b"])
+    after = HashRing(["a", "b", "c"])
+
+    placements = Counter(before.get(str(i)) for i in range(3000))
+    assert min(placements.values()) > 1000
+
+    moved = [i for i in range(3000) if before.get(str(i)) != after.get(str(i))]
+    assert all(after.get(str(i)) == "c" for i in moved)
+    assert 700 < len(moved) < 1300
+
+
+@pytest.mark.asyncio
+async def test_router_places_contacts_on_user_shard(shards, primary):
+    router = ShardRouter(shards, shard_map={7: "c"}, primary=primary)
+    assert router.shard_for(7) == "c"
+
+    for user_id in (1, 2, 3, 7):
+        async with router.session(user_id) as session:
+            await ContactRepository(session).create_contact(
+                Owner(user_id), contact_body(user_id)
+            )
+
+    for user_id in (1, 2, 3, 7):
+        home = router.shard_for(user_id)
+        for name, manager in shards.items():
+            expected = 1 if name == home else 0
+            assert await count_contacts(manager, user_id) == expected
+
+
+async def ids_on(manager, user_id):
+    async with manager.session() as session:
+        result = await session.scalars(
+            select(Contact.id).where(Contact.user_id == user_id).order_by(Contact.id)
+        )
+        return result.all()
+
+
+@pytest.mark.asyncio
+async def test_shard_schema_has_no_user_foreign_key(shards):
+    for position, manager in enumerate(shards.values()):
+        async with manager.engine.connect() as conn:
+            tables, foreign_keys = await conn.run_sync(
+                lambda c: (
+                    inspect(c).get_table_names(),
+                    inspect(c).get_foreign_keys("contacts"),
+                )
+            )
+        assert "users" not in tables and foreign_keys == []
+
+        async with manager.session() as session:
+            contact = await ContactRepository(session).create_contact(
+                Owner(999), contact_body(position)
+            )
+        assert contact.id == contact_id_start(position)
+
+
+@pytest.mark.asyncio
+async def test_rebalance_moves_misplaced_users(shards, primary):
+    router = ShardRouter(shards, primary=primary)
+    user_id = 42
+    home = router.shard_for(user_id)
+    other = next(name for name in shards if name != home)
+
+    async with shards[other].session() as session:
+        for i in range(3):
+            await ContactRepository(session).create_contact(
+                Owner(user_id), contact_body(i)
+            )
+    ids = await ids_on(shards[other], user_id)
+
+    assert await router.misplaced_users() == [(user_id, other, home)]
+
+    changed = []
+    await router.rebalance(grace=0, on_change=changed.append)
+
+    assert await router.misplaced_users() == []
+    assert await ids_on(shards[home], user_id) == ids
+    assert await count_contacts(shards[other], user_id) == 0
+    assert await router.load_pinned() == {user_id: home}
+    assert changed == ["u42", "u42"]
+
+
+@pytest.mark.asyncio
+async def test_moves_forget_cached_users_by_default(shards, primary, monkeypatch):
+    forgotten = []
+    monkeypatch.setattr("src.services.auth.forget_cached_user", forgotten.append)
+    router = ShardRouter(shards, primary=primary)
+    source = router.shard_for(42)
+    target = next(name for name in shards if name != source)
+
+    await router.move_user(42, source, target, grace=0)
+
+    assert forgotten == ["u42", "u42"]
+
+
+@pytest.mark.asyncio
+async def test_move_keeps_writes_made_before_the_copy(shards, primary):
+    router = ShardRouter(shards, primary=primary)
+    user_id = 7
+    source = router.shard_for(user_id)
+    target = next(name for name in shards if name != source)
+    async with router.session(user_id) as session:
+        await ContactRepository(session).create_contact(Owner(user_id), contact_body(0))
+
+    move = asyncio.create_task(router.move_user(user_id, source, target, grace=0.2))
+    await asyncio.sleep(0.05)
+    async with primary.session() as session:
+        assert await session.scalar(select(User.shard_moving).where(User.id == 7))
+    # A write already past the API check when the move started.
+    async with shards[source].session() as session:
+        await ContactRepository(session).create_contact(Owner(user_id), contact_body(1))
+
+    assert await move == 2
+    assert await count_contacts(shards[target], user_id) == 2
+    assert await count_contacts(shards[source], user_id) == 0
+    pinned = await router.load_pinned()
+    assert router.shard_for(user_id, pinned.get(user_id)) == target
+    async with primary.session() as session:
+        assert not await session.scalar(select(User.shard_moving).where(User.id == 7))
+
+    # Repeating a finished move only cleans up the source.
+    assert await router.move_user(user_id, source, target, grace=0) == 0
+    assert await count_contacts(shards[target], user_id) == 2
+
+
+@pytest.mark.asyncio
+async def test_prune_deletes_contacts_of_deleted_users(shards, primary):
+    router = ShardRouter(shards, primary=primary)
+    for user_id in (1, 2):
+        async with router.session(user_id) as session:
+            await ContactRepository(session).create_contact(
+                Owner(user_id), contact_body(user_id)
+            )
+
+    async with primary.session() as session:
+        await session.execute(delete(User).where(User.id == 1))
+        await session.commit()
+
+    assert await router.orphaned_users() == [1]
+    assert await router.delete_user_contacts(1) == 1
+    assert await router.orphaned_users() == []
+    assert await count_contacts(router.manager_for(1), 1) == 0
+    assert await count_contacts(router.manager_for(2), 2) == 1
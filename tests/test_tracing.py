@@ -0,0 +1,92 @@
+import pytest
+from fastapi import APIRouter, FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.services import tracing
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    exporter = tracing.InMemorySpanExporter()
+    monkeypatch.setattr(tracing, "tracer", tracing.Tracer(exporter, 1.0))
+    return exporter
+
+
+def test_disabled_tracing_returns_functions_unchanged(monkeypatch):
+    monkeypatch.setattr(tracing, "tracer", None)
+
+    async def handler():
+        pass
+
+    class Service:
+        async def run(self):
+            pass
+
+    client = object()
+    assert tracing.traced()(handler) is handler
+    assert tracing.trace_methods(Service).run is Service.__dict__["run"]
+    assert tracing.instrument_redis(client) is client
+
+
+@pytest.mark.asyncio
+async def test_spans_nest_across_layers(exporter):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    tracing.instrument_engine(engine)
+    cache = tracing.instrument_redis({"user:1": "cached"})
+
+    @tracing.trace_methods
+    class Repository:
+        async def fetch(self):
+            async with engine.connect() as conn:
+                return (await conn.execute(text("SELECT 1"))).scalar()
+
+    router = APIRouter(route_class=tracing.TracedRoute)
+
+    @router.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        return {"cached": cache.get("user:1"), "value": await Repository().fetch()}
+
+    app = FastAPI()
+    app.include_router(router)
+    app.add_middleware(tracing.TracingMiddleware)
+    parent = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as ac:
+        resp = await ac.get("/items/1", headers={"traceparent": parent})
+    await engine.dispose()
+
+    assert resp.json() == {"cached": "cached", "value": 1}
+    spans = {span.name: span for span in exporter.spans}
+    server = spans["HTTP GET /items/{item_id}"]
+    assert server.trace_id == 0x0AF7651916CD43DD8448EB211C80319C
+    assert server.parent_id == 0xB7AD6B7169203331
+    assert server.attributes["http.status_code"] == 200
+    assert resp.headers["traceparent"] == server.traceparent
+
+    route = spans["route.read_item"]
+    assert route.parent_id == server.span_id
+    assert spans["redis.get"].parent_id == route.span_id
+    assert spans["Repository.fetch"].parent_id == route.span_id
+    query = spans["db.query"]
+    assert query.parent_id == spans["Repository.fetch"].span_id
+    assert query.attributes["db.statement"] == "SELECT 1"
+
+
+@pytest.mark.asyncio
+async def test_sampler_drops_whole_traces(exporter):
+    tracer = tracing.Tracer(exporter, 0.0)
+    with tracer.start_as_current_span("root") as root:
+        with tracer.start_as_current_span("child"):
+            pass
+    assert not root.sampled
+    assert exporter.spans == []
+
+    sampled = tracing.parse_traceparent(
+        "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+    )
+    with tracer.start_as_current_span("continued", parent=sampled):
+        pass
+    assert exporter.names() == ["continued"]